@@ -7,31 +7,41 @@ Creates real embeddings for sample data using Vertex AI.
 import os
 import sys
 import pandas as pd
-from google.cloud import bigquery
-from google.cloud import aiplatform
-from typing import List, Dict
+from pathlib import Path
+from typing import List, Dict, Tuple
 import json
 
-def generate_text_embeddings(texts: List[str], project_id: str) -> List[List[float]]:
-    """Generate text embeddings using Vertex AI."""
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+from embedding_cache import EmbeddingCache
+from embedding_client import BatchEmbeddingClient, HashEmbeddingBackend, VertexEmbeddingBackend
+from embedding_store import EmbeddingStore
+
+def generate_text_embeddings(texts: List[str], project_id: str,
+                             local: bool = False) -> Tuple[List[List[float]], str]:
+    """Generate text embeddings using Vertex AI (batched, concurrent).
+    
+    Returns the vectors and the name of the backend model that produced them.
+    """
     
-    aiplatform.init(project=project_id, location='us-central1')
+    # Use text-embedding-005 model (or the deterministic local stand-in)
+    if local:
+        backend = HashEmbeddingBackend(dimension=768)
+    else:
+        backend = VertexEmbeddingBackend(project_id, model=os.getenv('VERTEX_EMBEDDING_MODEL', 'text-embedding-005'))
     
-    # Use text-embedding-005 model
-    model = aiplatform.Model('text-embedding-005')
+    # Reuse cached vectors keyed on (content fingerprint, model, dimension)
+    cache = EmbeddingCache(os.getenv('EMBEDDING_CACHE_PATH', 'artifacts/embedding_cache/cache.sqlite'))
+    client = BatchEmbeddingClient(backend, max_in_flight=int(os.getenv('EMBED_MAX_IN_FLIGHT', '4')), cache=cache)
+    result = client.embed(texts)
+    print(f"Embedding cache: {cache.stats()}")
     
-    embeddings = []
-    for text in texts:
-        try:
-            # Generate embedding
-            embedding = model.get_embedding(text)
-            embeddings.append(embedding)
-        except Exception as e:
-            print(f"Error generating embedding for text: {e}")
-            # Fallback to zero vector
-            embeddings.append([0.0] * 768)
+    # Fail loudly instead of substituting zero vectors
+    if result.failures:
+        for failure in result.failures:
+            print(f"Error generating embedding for text #{failure.index}: {failure.error}")
+        raise RuntimeError(f"{len(result.failures)} of {len(texts)} embeddings failed")
     
-    return embeddings
+    return result.vectors.tolist(), backend.name
 
 def save_embeddings_to_csv(embeddings: List[List[float]], filename: str):
     """Save embeddings to CSV file."""
@@ -46,6 +56,13 @@ def save_embeddings_to_csv(embeddings: List[List[float]], filename: str):
     df.to_csv(filename, index=False)
     print(f"Embeddings saved to {filename}")
 
+def save_embeddings_to_store(ids: List[str], embeddings: List[List[float]], path: str, model: str):
+    """Save embeddings to a binary memory-mapped embedding store (model is recorded in the header)."""
+    
+    store = EmbeddingStore.create(path, dim=len(embeddings[0]), model=model, overwrite=True)
+    store.append(ids, embeddings)
+    print(f"Embeddings saved to {path} ({len(store)} x {store.dim})")
+
 def main():
     """Main function."""
     
@@ -65,17 +82,22 @@ def main():
         "Tablet device with touch screen and stylus support"
     ]
     
+    local = os.getenv('EMBEDDING_BACKEND', 'vertex') == 'local'
+    
     print(f"Generating embeddings for {len(sample_texts)} texts...")
     print(f"Project: {project_id}")
     
     try:
         # Generate embeddings
-        embeddings = generate_text_embeddings(sample_texts, project_id)
+        embeddings, model = generate_text_embeddings(sample_texts, project_id, local=local)
         
-        # Save to CSV
-        output_file = "data/sample/generated_text_embeddings.csv"
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        save_embeddings_to_csv(embeddings, output_file)
+        # Save to the binary embedding store (CSV kept as an opt-in export)
+        output_dir = "data/sample/generated_text_embeddings.store"
+        os.makedirs(os.path.dirname(output_dir), exist_ok=True)
+        ids = [f"S{i:03d}" for i in range(len(embeddings))]
+        save_embeddings_to_store(ids, embeddings, output_dir, model)
+        if os.getenv('EXPORT_EMBEDDINGS_CSV', 'false').lower() == 'true':
+            save_embeddings_to_csv(embeddings, "data/sample/generated_text_embeddings.csv")
         
         print("✅ Embedding generation completed successfully")
         
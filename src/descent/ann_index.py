@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Descent ANN Index
+emb_stitched 벡터용 로컬 IVF 인덱스 (코어스 k-means + 선택적 잔차 양자화: int8 또는 PQ)
+"""
+
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """코사인 거리용 행 단위 L2 정규화 (노름 0인 행은 0 벡터)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+    norms[norms == 0] = 1.0
+    return matrix / norms[:, None]
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    """블록 단위로 가장 가까운(내적 최대) 센트로이드 할당"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        sims = vectors[start:start + block] @ centroids.T
+        labels[start:start + block] = sims.argmax(axis=1)
+    return labels
+
+def train_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 20,
+                 max_train: int = 256, seed: int = 42) -> np.ndarray:
+    """구면 k-means로 코어스 센트로이드 학습 (리스트당 최대 max_train개 표본)"""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    if n < nlist:
+        raise ValueError(f"학습 벡터 수({n})가 nlist({nlist})보다 적습니다")
+
+    sample_size = min(n, nlist * max_train)
+    sample = vectors[rng.choice(n, sample_size, replace=False)] if sample_size < n else vectors
+    sample = np.ascontiguousarray(sample, dtype=np.float32)
+
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # 빈 리스트는 임의 표본으로 재시작
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+class IVFIndex:
+    """IVF 인덱스 (IVF-Flat, 잔차 int8 양자화 또는 잔차 곱 양자화(IVF-PQ))
+
+    벡터는 리스트 순서로 연속 저장되며, list_offsets[i]:list_offsets[i+1]
+    구간이 i번째 리스트이다. 저장 후 load()는 mmap으로 연다.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, row_ids: np.ndarray,
+                 keys: List[str], vectors: Optional[np.ndarray] = None,
+                 codes: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None,
+                 pq=None):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.row_ids = row_ids
+        self.keys = keys
+        self.vectors = vectors
+        self.codes = codes
+        self.scale = scale
+        self.pq = pq  # quantization.ProductQuantizer (잔차 PQ 코드일 때)
+
+    @property
+    def quantized(self) -> bool:
+        return self.codes is not None
+
+    @property
+    def codec(self) -> Optional[str]:
+        if not self.quantized:
+            return None
+        return "pq" if self.pq is not None else "int8"
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @classmethod
+    def build(cls, keys: Sequence[str], vectors: np.ndarray, nlist: Optional[int] = None,
+              residual_quantization: bool = False, iterations: int = 20, seed: int = 42,
+              pq_m: Optional[int] = None) -> "IVFIndex":
+        """stitched 벡터로 인덱스 생성 (nlist 기본값: 4·sqrt(N), pq_m 지정 시 잔차 PQ)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # NULL(NaN) 임베딩 행은 인덱싱하지 않음
+        valid = ~np.isnan(vectors).any(axis=1)
+        row_ids = np.flatnonzero(valid)
+        data = _normalize(vectors[valid])
+        if nlist is None:
+            nlist = max(1, min(len(data), int(4 * np.sqrt(len(data)))))
+
+        start = time.time()
+        centroids = train_kmeans(data, nlist, iterations=iterations, seed=seed)
+        labels = _assign(data, centroids)
+
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=nlist)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(counts, out=list_offsets[1:])
+
+        data = data[order]
+        row_ids = row_ids[order]
+        sorted_labels = labels[order]
+
+        codes = scale = pq = None
+        if pq_m:
+            from quantization import ProductQuantizer
+
+            residuals = data - centroids[sorted_labels]
+            pq = ProductQuantizer.train(residuals, pq_m, iterations=iterations, seed=seed)
+            codes = pq.encode(residuals)
+            data = None
+        elif residual_quantization:
+            residuals = data - centroids[sorted_labels]
+            scale = np.abs(residuals).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            codes = np.clip(np.rint(residuals / scale), -127, 127).astype(np.int8)
+            data = None
+
+        logger.info(f"IVF 인덱스 생성: {len(row_ids)}건, nlist={nlist}, "
+                    f"양자화={'pq' if pq_m else residual_quantization}, {time.time() - start:.2f}초")
+        return cls(centroids, list_offsets, row_ids, list(keys), vectors=data, codes=codes,
+                   scale=scale.astype(np.float32) if scale is not None else None, pq=pq)
+
+    def save(self, path: str):
+        """디렉터리에 인덱스 저장 (.npy + meta.json + keys.txt)"""
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        np.save(out / "centroids.npy", np.ascontiguousarray(self.centroids))
+        np.save(out / "list_offsets.npy", np.ascontiguousarray(self.list_offsets))
+        np.save(out / "row_ids.npy", np.ascontiguousarray(self.row_ids))
+        if self.pq is not None:
+            np.save(out / "codes.npy", np.ascontiguousarray(self.codes))
+            self.pq.save(out)
+        elif self.quantized:
+            np.save(out / "codes.npy", np.ascontiguousarray(self.codes))
+            np.save(out / "scale.npy", np.ascontiguousarray(self.scale))
+        else:
+            np.save(out / "vectors.npy", np.ascontiguousarray(self.vectors))
+        with open(out / "keys.txt", "w", encoding="utf-8") as f:
+            for key in self.keys:
+                f.write(f"{key}\n")
+        meta = {
+            "version": INDEX_VERSION,
+            "nlist": self.nlist,
+            "dim": int(self.centroids.shape[1]),
+            "size": len(self),
+            "quantized": self.quantized,
+            "codec": self.codec,
+            "metric": "cosine",
+        }
+        with open(out / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"IVF 인덱스 저장 완료: {out}")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "IVFIndex":
+        """저장된 인덱스 로드 (기본: 대용량 배열은 mmap)"""
+        src = Path(path)
+        with open(src / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"지원하지 않는 인덱스 버전: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        with open(src / "keys.txt", encoding="utf-8") as f:
+            keys = [line.rstrip("\n") for line in f]
+        kwargs = {}
+        if meta.get("codec") == "pq":
+            from quantization import ProductQuantizer
+
+            kwargs["codes"] = np.load(src / "codes.npy", mmap_mode=mode)
+            kwargs["pq"] = ProductQuantizer.load(src)
+        elif meta["quantized"]:
+            kwargs["codes"] = np.load(src / "codes.npy", mmap_mode=mode)
+            kwargs["scale"] = np.load(src / "scale.npy")
+        else:
+            kwargs["vectors"] = np.load(src / "vectors.npy", mmap_mode=mode)
+        return cls(
+            centroids=np.load(src / "centroids.npy"),
+            list_offsets=np.load(src / "list_offsets.npy"),
+            row_ids=np.load(src / "row_ids.npy", mmap_mode=mode),
+            keys=keys,
+            **kwargs
+        )
+
+    def _list_scores(self, query: np.ndarray, list_no: int, centroid_sim: float,
+                     table: Optional[np.ndarray] = None) -> np.ndarray:
+        """리스트 하나의 후보 유사도 (양자화 시 q·c + q·r 비대칭 계산, PQ는 q·r을 테이블 조회로)"""
+        lo, hi = self.list_offsets[list_no], self.list_offsets[list_no + 1]
+        if not self.quantized:
+            return self.vectors[lo:hi] @ query
+        if self.pq is not None:
+            return centroid_sim + self.pq.scores(table, self.codes[lo:hi])
+        return centroid_sim + self.codes[lo:hi].astype(np.float32) @ (query * self.scale)
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8, rerank: int = 0,
+               vectors: Optional[np.ndarray] = None) -> Tuple[List[str], np.ndarray]:
+        """top-k 검색 -> (키 목록, 코사인 거리)
+
+        rerank > 0이고 vectors(build 입력 원본, mmap 가능)가 주어지면 근사 상위
+        k·rerank개를 원본 벡터로 다시 계산해 top-k를 고른다.
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+        # PQ 잔차 내적 테이블은 리스트와 무관하므로 질의당 한 번만 계산
+        table = self.pq.lookup_table(query) if self.pq is not None else None
+        centroid_sims = self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        probes = np.argpartition(-centroid_sims, nprobe - 1)[:nprobe]
+
+        scores = []
+        positions = []
+        for list_no in probes:
+            lo, hi = self.list_offsets[list_no], self.list_offsets[list_no + 1]
+            if hi == lo:
+                continue
+            scores.append(self._list_scores(query, list_no, centroid_sims[list_no], table))
+            positions.append(np.arange(lo, hi))
+        if not scores:
+            return [], np.empty(0, dtype=np.float32)
+
+        scores = np.concatenate(scores)
+        positions = np.concatenate(positions)
+        if rerank > 0 and vectors is not None:
+            from quantization import rerank_exact
+
+            shortlist = min(k * rerank, len(scores))
+            top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+            rows, sims = rerank_exact(query, self.row_ids[positions[top]], vectors, k)
+            return [self.keys[r] for r in rows], (1.0 - sims).astype(np.float32)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        rows = self.row_ids[positions[top]]
+        return [self.keys[r] for r in rows], (1.0 - scores[top]).astype(np.float32)
+
+def exact_search(vectors: np.ndarray, queries: np.ndarray, k: int = 10, block: int = 65536) -> List[np.ndarray]:
+    """전수 코사인 top-k (블록 단위 행렬곱) -> 질의별 행 번호 배열
+
+    NaN 행(임베딩 없음)과 NaN 질의의 유사도는 -inf로 두고 결과에서 뺀다. 따라서
+    유효 행이 k개보다 적으면 해당 질의의 배열은 k보다 짧다.
+    """
+    queries = _normalize(queries)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        chunk = _normalize(vectors[start:start + block])
+        invalid = np.isnan(chunk).any(axis=1)
+        sims = queries @ np.nan_to_num(chunk, nan=0.0).T
+        sims[:, invalid] = -np.inf
+        sims[~np.isfinite(sims)] = -np.inf
+        scores = np.concatenate([best_scores, sims], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(chunk)), sims.shape)], axis=1)
+        kk = min(k, scores.shape[1])
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_rows = np.take_along_axis(rows, top, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+    return [rows[np.isfinite(scores)] for rows, scores in zip(best_rows, best_scores)]
+
+def recall_report(index: IVFIndex, vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                  nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32), rerank: int = 0) -> List[Dict[str, float]]:
+    """nprobe별 recall@k 및 지연시간(전수 검색 대비, rerank > 0이면 원본 벡터로 재순위)"""
+    truth = exact_search(vectors, queries, k)
+    truth_keys = [{index.keys[r] for r in row} for row in truth]
+
+    report = []
+    for nprobe in nprobes:
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth_keys):
+            start = time.perf_counter()
+            found, _ = index.search(query, k=k, nprobe=nprobe, rerank=rerank, vectors=vectors)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            hits += len(expected.intersection(found))
+        report.append({
+            "nprobe": int(nprobe),
+            "k": int(k),
+            "rerank": int(rerank),
+            "recall_at_k": hits / max(1, sum(len(t) for t in truth_keys)),
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+        })
+        logger.info(f"nprobe={nprobe}: recall@{k}={report[-1]['recall_at_k']:.3f}, "
+                    f"p50={report[-1]['latency_ms_p50']:.2f}ms")
+    return report
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Descent Arrow Stream Reader
+BigQuery Storage Read API(또는 로컬 Parquet 디렉터리)에서 Arrow 레코드 배치를
+여러 스트림으로 병렬 수신해 하나의 반복자로 제공
+"""
+
+import queue
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Protocol, Sequence
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+class BatchReader(Protocol):
+    """Arrow 레코드 배치 리더 인터페이스"""
+
+    def iter_batches(self) -> Iterator[Any]:
+        """pyarrow.RecordBatch 반복자 (스트림 간 순서는 보장하지 않음)"""
+        ...
+
+def parallel_batches(streams: Sequence[Callable[[], Iterator[Any]]], max_workers: int = 4,
+                     queue_size: int = 8) -> Iterator[Any]:
+    """여러 스트림을 스레드에서 동시에 읽어 배치를 도착 순서대로 생성
+
+    큐가 가득 차면 스트림 스레드가 멈추므로 메모리에는 최대 queue_size 개
+    배치(+스레드당 1개)만 올라간다. 소비자가 중간에 멈추면 남은 스트림도 중단한다.
+    """
+    if not streams:
+        return
+    batches: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    pending = iter(range(len(streams)))
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            while not stop.is_set():
+                with lock:
+                    index = next(pending, None)
+                if index is None:
+                    break
+                for batch in streams[index]():
+                    if not put(batch):
+                        return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(_END)
+
+    threads = [threading.Thread(target=worker, name=f"arrow-stream-{i}", daemon=True)
+               for i in range(min(max_workers, len(streams)))]
+    for t in threads:
+        t.start()
+    finished = 0
+    try:
+        while finished < len(threads):
+            try:
+                item = batches.get(timeout=0.1)
+            except queue.Empty:
+                if errors:
+                    break
+                continue
+            if item is _END:
+                finished += 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+class BigQueryStorageReader:
+    """BigQuery Storage Read API Arrow 리더
+
+    테이블(뷰 불가)을 max_streams 개 읽기 스트림으로 나눠 병렬로 내려받는다.
+    뷰·쿼리 결과는 from_query()로 쿼리의 임시 결과 테이블을 읽는다.
+    """
+
+    def __init__(self, table: str, columns: Optional[Sequence[str]] = None,
+                 row_restriction: Optional[str] = None, max_streams: int = 4,
+                 queue_size: int = 8, read_client=None):
+        self.table = table  # project.dataset.table
+        self.columns = list(columns) if columns else None
+        self.row_restriction = row_restriction
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._read_client = read_client
+
+    @classmethod
+    def from_query(cls, client, sql: str, **kwargs) -> "BigQueryStorageReader":
+        """쿼리 실행 후 결과(임시 목적지 테이블)를 읽는 리더"""
+        job = client.query(sql)
+        job.result()
+        dest = job.destination
+        return cls(f"{dest.project}.{dest.dataset_id}.{dest.table_id}", **kwargs)
+
+    @property
+    def read_client(self):
+        if self._read_client is None:
+            try:
+                from google.cloud import bigquery_storage
+            except ImportError as e:
+                raise ImportError("Arrow 스트리밍에는 google-cloud-bigquery-storage가 필요합니다") from e
+            self._read_client = bigquery_storage.BigQueryReadClient()
+        return self._read_client
+
+    def _session(self):
+        from google.cloud.bigquery_storage import types
+
+        project, dataset, table = self.table.split(".")
+        requested = types.ReadSession(
+            table=f"projects/{project}/datasets/{dataset}/tables/{table}",
+            data_format=types.DataFormat.ARROW,
+            read_options=types.ReadSession.TableReadOptions(
+                selected_fields=self.columns or [],
+                row_restriction=self.row_restriction or "",
+            ),
+        )
+        return self.read_client.create_read_session(
+            parent=f"projects/{project}", read_session=requested, max_stream_count=self.max_streams)
+
+    def iter_batches(self) -> Iterator[Any]:
+        session = self._session()
+        logger.info(f"Storage Read 세션: {self.table}, 스트림 {len(session.streams)}개")
+
+        def stream(name: str) -> Callable[[], Iterator[Any]]:
+            def read() -> Iterator[Any]:
+                for page in self.read_client.read_rows(name).rows(session).pages:
+                    yield page.to_arrow()
+            return read
+
+        yield from parallel_batches([stream(s.name) for s in session.streams],
+                                    self.max_streams, self.queue_size)
+
+class ParquetDirectoryReader:
+    """로컬 Parquet 디렉터리 리더 (파일 하나 = 읽기 스트림 하나)"""
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None, max_streams: int = 4,
+                 queue_size: int = 8, batch_size: int = 65536):
+        self.path = Path(path)
+        self.columns = list(columns) if columns else None
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+    def files(self) -> List[Path]:
+        if self.path.is_file():
+            return [self.path]
+        return sorted(self.path.glob("*.parquet"))
+
+    def iter_batches(self) -> Iterator[Any]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet 읽기에는 pyarrow가 필요합니다: pip install pyarrow") from e
+
+        def stream(file: Path) -> Callable[[], Iterator[Any]]:
+            return lambda: pq.ParquetFile(file).iter_batches(batch_size=self.batch_size, columns=self.columns)
+
+        yield from parallel_batches([stream(f) for f in self.files()], self.max_streams, self.queue_size)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Descent Async Jobs
+BigQuery 잡을 논블로킹으로 제출하고 asyncio로 대기하는 잡 레이어
+"""
+
+import asyncio
+import itertools
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class JobStats:
+    """완료된 잡의 비용 통계 (추가 get_job 호출 없이 잡 객체에서 수집)"""
+    job_id: str
+    slot_ms: int = 0
+    bytes_processed: int = 0
+    creation_time: Optional[str] = None
+    end_time: Optional[str] = None
+    cache_hit: bool = False
+
+def stats_from_job(job: Any) -> JobStats:
+    """완료된 QueryJob 객체에서 비용 통계 추출"""
+    created = getattr(job, "created", None)
+    ended = getattr(job, "ended", None)
+    return JobStats(
+        job_id=job.job_id,
+        slot_ms=getattr(job, "slot_millis", None) or 0,
+        bytes_processed=getattr(job, "total_bytes_processed", None) or 0,
+        creation_time=created.isoformat() if created else None,
+        end_time=ended.isoformat() if ended else None,
+        cache_hit=bool(getattr(job, "cache_hit", False)),
+    )
+
+class JobBackend(Protocol):
+    """잡 백엔드 인터페이스"""
+
+    def submit(self, sql: str, job_config: Any = None) -> Any:
+        """잡 제출 (즉시 반환)"""
+        ...
+
+    def is_done(self, job: Any) -> bool:
+        """완료 여부 (한 번의 상태 조회)"""
+        ...
+
+    def error(self, job: Any) -> Optional[BaseException]:
+        """완료된 잡의 오류 (성공이면 None)"""
+        ...
+
+    def stats(self, job: Any) -> JobStats:
+        """완료된 잡의 비용 통계"""
+        ...
+
+class BigQueryJobBackend:
+    """google-cloud-bigquery 클라이언트 기반 백엔드"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, sql: str, job_config: Any = None) -> Any:
+        return self.client.query(sql, job_config=job_config)
+
+    def is_done(self, job: Any) -> bool:
+        return job.done()
+
+    def error(self, job: Any) -> Optional[BaseException]:
+        return job.exception()
+
+    def stats(self, job: Any) -> JobStats:
+        return stats_from_job(job)
+
+def bigquery_transient_errors() -> Tuple[Type[BaseException], ...]:
+    """재제출할 일시적 BigQuery 오류"""
+    from google.api_core import exceptions
+    return (exceptions.ServiceUnavailable, exceptions.InternalServerError)
+
+def bigquery_job_runner(client, **kwargs) -> "AsyncJobRunner":
+    """BigQuery 백엔드 + 일시적 오류 재시도 잡 실행기"""
+    kwargs.setdefault("retry_on", bigquery_transient_errors())
+    return AsyncJobRunner(BigQueryJobBackend(client), **kwargs)
+
+@dataclass
+class FakeJob:
+    """FakeJobBackend 잡"""
+    job_id: str
+    sql: str
+    ready_at: float
+    error: Optional[BaseException] = None
+    slot_millis: int = 0
+    total_bytes_processed: int = 0
+    polls: int = 0
+
+class FakeJobBackend:
+    """테스트용 로컬 잡 백엔드
+
+    latency 초 후에 완료되며, SQL에 failures의 키가 포함되면 해당 오류로 실패한다.
+    flaky의 키가 포함되면 처음 n번은 ConnectionError로 실패한 뒤 성공한다.
+    submit_delay는 제출 HTTP 호출 시간, bytes_per_char는 처리 바이트를 흉내 낸다.
+    """
+
+    def __init__(self, latency: float = 0.05, failures: Optional[Dict[str, BaseException]] = None,
+                 bytes_per_char: int = 1024, flaky: Optional[Dict[str, int]] = None,
+                 submit_delay: float = 0.0):
+        self.latency = latency
+        self.failures = failures or {}
+        self.flaky = dict(flaky or {})
+        self.bytes_per_char = bytes_per_char
+        self.submit_delay = submit_delay
+        self.submitted: List[FakeJob] = []
+        self._ids = itertools.count(1)
+
+    def submit(self, sql: str, job_config: Any = None) -> FakeJob:
+        if self.submit_delay:
+            time.sleep(self.submit_delay)
+        error = next((e for key, e in self.failures.items() if key in sql), None)
+        for key, remaining in self.flaky.items():
+            if key in sql and remaining > 0:
+                self.flaky[key] = remaining - 1
+                error = ConnectionError(f"일시적 오류 (테스트): {key}")
+        job = FakeJob(
+            job_id=f"fake_job_{next(self._ids)}",
+            sql=sql,
+            ready_at=time.monotonic() + self.latency,
+            error=error,
+            slot_millis=int(self.latency * 1000),
+            total_bytes_processed=len(sql) * self.bytes_per_char,
+        )
+        self.submitted.append(job)
+        return job
+
+    def is_done(self, job: FakeJob) -> bool:
+        job.polls += 1
+        return time.monotonic() >= job.ready_at
+
+    def error(self, job: FakeJob) -> Optional[BaseException]:
+        return job.error
+
+    def stats(self, job: FakeJob) -> JobStats:
+        return JobStats(job_id=job.job_id, slot_ms=job.slot_millis, bytes_processed=job.total_bytes_processed)
+
+class JobHandle:
+    """제출된 잡 핸들 - await handle.wait()로 완료를 기다린다"""
+
+    def __init__(self, runner: "AsyncJobRunner", job: Any, step: str):
+        self.runner = runner
+        self.job = job
+        self.step = step
+        self.submitted_at = time.monotonic()
+
+    @property
+    def job_id(self) -> str:
+        return self.job.job_id
+
+    async def wait(self) -> JobStats:
+        return await self.runner.wait(self)
+
+class AsyncJobRunner:
+    """논블로킹 잡 실행기
+
+    submit()은 잡을 제출하고 핸들을 반환한다. 제출과 상태 조회(HTTP)는 공유
+    실행기에서 짧게 실행되므로 이벤트 루프를 막지 않고 잡마다 스레드를 점유하지
+    않는다. wait()은 지수 백오프로 상태를 조회한다. run()은 retry_on 오류(제출
+    실패 또는 잡 실패)면 retry_deadline 안에서 지수 백오프로 다시 제출한다.
+    """
+
+    def __init__(self, backend: JobBackend, initial_delay: float = 0.2, max_delay: float = 5.0,
+                 multiplier: float = 1.5, timeout: Optional[float] = 3600.0,
+                 retry_on: Tuple[Type[BaseException], ...] = (), retry_deadline: float = 300.0,
+                 retry_initial: float = 1.0, retry_maximum: float = 60.0, retry_multiplier: float = 2.0):
+        self.backend = backend
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.timeout = timeout
+        self.retry_on = tuple(retry_on)
+        self.retry_deadline = retry_deadline
+        self.retry_initial = retry_initial
+        self.retry_maximum = retry_maximum
+        self.retry_multiplier = retry_multiplier
+
+    async def submit(self, sql: str, step: str, job_config: Any = None) -> JobHandle:
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, self.backend.submit, sql, job_config)
+        logger.info(f"[SUBMITTED] {step}: {job.job_id}")
+        return JobHandle(self, job, step)
+
+    async def run(self, sql: str, step: str, job_config: Any = None,
+                  on_retry: Optional[Callable[[BaseException], None]] = None) -> JobStats:
+        """제출 후 완료 대기 (일시적 오류는 재제출) -> 비용 통계"""
+        start = time.monotonic()
+        delay = self.retry_initial
+        while True:
+            try:
+                handle = await self.submit(sql, step, job_config)
+                return await handle.wait()
+            except self.retry_on as e:
+                if time.monotonic() - start + delay > self.retry_deadline:
+                    raise
+                logger.warning(f"[RETRY] {step}: {e} ({delay:.1f}초 후 재제출)")
+                if on_retry is not None:
+                    on_retry(e)
+                await asyncio.sleep(delay)
+                delay = min(delay * self.retry_multiplier, self.retry_maximum)
+
+    async def wait(self, handle: JobHandle) -> JobStats:
+        """완료까지 백오프 폴링 후 비용 통계 반환 (실패 시 잡 오류를 다시 던짐)"""
+        loop = asyncio.get_running_loop()
+        delay = self.initial_delay
+        while not await loop.run_in_executor(None, self.backend.is_done, handle.job):
+            if self.timeout is not None and time.monotonic() - handle.submitted_at > self.timeout:
+                raise TimeoutError(f"잡 대기 시간 초과: {handle.step} ({handle.job_id})")
+            await asyncio.sleep(delay)
+            delay = min(delay * self.multiplier, self.max_delay)
+
+        error = self.backend.error(handle.job)
+        if error is not None:
+            logger.error(f"[ERROR] {handle.step}: {error}")
+            raise error
+        stats = self.backend.stats(handle.job)
+        logger.info(f"[DONE] {handle.step}: {stats.job_id} ({stats.bytes_processed} bytes, {stats.slot_ms} slot ms)")
+        return stats
+
+    async def gather(self, handles: Sequence[JobHandle], return_exceptions: bool = False) -> List[Any]:
+        """여러 잡을 동시에 대기"""
+        return await asyncio.gather(*(self.wait(h) for h in handles), return_exceptions=return_exceptions)
+
+    async def run_many(self, queries: Dict[str, str], return_exceptions: bool = False) -> Dict[str, Any]:
+        """{단계명: SQL}을 모두 제출해 함께 대기 (재시도 포함) -> {단계명: JobStats 또는 예외}"""
+        results = await asyncio.gather(*(self.run(sql, step) for step, sql in queries.items()),
+                                       return_exceptions=return_exceptions)
+        return dict(zip(queries, results))
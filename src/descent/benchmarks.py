@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Descent Benchmarks
+코퍼스 크기(N)·차원(D)별 마이크로/매크로 벤치마크와 회귀 게이트
+
+    python3 src/descent/benchmarks.py run --n 10000 100000 --d 64 256 --output artifacts/benchmarks/latest.json
+    python3 src/descent/benchmarks.py compare baseline.json artifacts/benchmarks/latest.json --threshold 0.10
+"""
+
+import gc
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+@dataclass
+class BenchCase:
+    """벤치마크 항목 - setup 결과(state)는 측정에서 제외되고 run만 반복 측정된다"""
+    name: str
+    setup: Callable[[int, int, np.random.Generator], Any]
+    run: Callable[[Any], Any]
+    teardown: Optional[Callable[[Any], None]] = None
+    max_n: Optional[int] = None  # 이보다 큰 N에서는 건너뜀 (예: O(N·nlist) 인덱스 학습)
+
+def synthetic_inputs(n: int, d: int, rng: np.random.Generator) -> Dict[str, Any]:
+    """벤치마크용 무작위 입력 (키, 텍스트/구조화 벡터, 본문, 라벨)"""
+    keys = [f"K{i:09d}" for i in range(n)]
+    bodies = [("규격과 이미지가 불일치" if i % 10 == 0 else "정상 문서") for i in range(n)]
+    labeled = rng.choice(n, size=max(1, n // 100), replace=False)
+    return {
+        "keys": keys,
+        "text": rng.standard_normal((n, d), dtype=np.float32),
+        "struct": rng.standard_normal((n, 8), dtype=np.float32),
+        "bodies": bodies,
+        "labels": {keys[i]: float(rng.integers(0, 2)) for i in labeled},
+    }
+
+# --- 항목 정의 -------------------------------------------------------------
+
+def _setup_stitch(n, d, rng):
+    from stitching import mapping_source
+    data = synthetic_inputs(n, d, rng)
+    return data["keys"], mapping_source(data["keys"], data["text"]), mapping_source(data["keys"], data["struct"])
+
+def _run_stitch(state):
+    from stitching import stitch_rows
+    keys, text, struct = state
+    return stitch_rows(keys, text, struct)
+
+def _setup_ori(n, d, rng):
+    from ori_local import LocalCorpus, LocalORIEngine, l2_normalize
+    data = synthetic_inputs(n, d, rng)
+    corpus = LocalCorpus(data["keys"], data["text"], data["bodies"], l2_normalize(data["text"][:1])[0])
+    return LocalORIEngine(), corpus
+
+def _run_ori(state):
+    engine, corpus = state
+    return engine.score(corpus)
+
+def _setup_topk(n, d, rng):
+    data = synthetic_inputs(n, d, rng)
+    queries = data["text"][rng.choice(n, size=min(n, 16), replace=False)]
+    return data["text"], queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def _run_topk_exact(state):
+    from multi_query import blocked_topk
+    corpus, queries = state
+    return blocked_topk(queries, corpus, k=10)
+
+def _setup_ivf(n, d, rng):
+    from ann_index import IVFIndex
+    corpus, queries = _setup_topk(n, d, rng)
+    index = IVFIndex.build([f"K{i}" for i in range(n)], corpus, iterations=5)
+    return index, queries
+
+def _run_ivf(state):
+    index, queries = state
+    return [index.search(q, k=10, nprobe=8) for q in queries]
+
+def _setup_quantized(codec):
+    def setup(n, d, rng):
+        from quantization import QuantizedIndex
+        corpus, queries = _setup_topk(n, d, rng)
+        index = QuantizedIndex.build([f"K{i}" for i in range(n)], corpus, codec=codec, iterations=5)
+        return index, corpus, queries
+    return setup
+
+def _run_quantized(state):
+    index, corpus, queries = state
+    return [index.search(q, k=10, rerank=4, vectors=corpus) for q in queries]
+
+def _setup_hybrid(n, d, rng):
+    from lexical_index import BM25Index, HybridRetriever
+    data = synthetic_inputs(n, d, rng)
+    index = BM25Index.build([(data["keys"], data["bodies"])])
+    queries = data["text"][rng.choice(n, size=min(n, 16), replace=False)]
+    return HybridRetriever(index, data["keys"], data["text"]), queries
+
+def _run_hybrid(state):
+    retriever, queries = state
+    return [retriever.search("스펙과 이미지의 불일치 사례", q, k=10) for q in queries]
+
+def _setup_ranking(n, d, rng):
+    data = synthetic_inputs(n, 1, rng)
+    return data["keys"], rng.standard_normal(n), data["labels"]
+
+def _run_ranking(state):
+    from ranking_metrics import compute_ranking_metrics
+    keys, scores, labels = state
+    return compute_ranking_metrics(keys, scores, labels)
+
+def _setup_store(n, d, rng):
+    data = synthetic_inputs(n, d, rng)
+    return {"dir": Path(tempfile.mkdtemp(prefix="descent_bench_")), "keys": data["keys"], "vectors": data["text"]}
+
+def _run_store_save(state):
+    from embedding_store import EmbeddingStore
+    store = EmbeddingStore.create(str(state["dir"] / "store"), dim=state["vectors"].shape[1],
+                                  model="bench", overwrite=True)
+    store.append(state["keys"], state["vectors"])
+    return store
+
+def _setup_store_load(n, d, rng):
+    state = _setup_store(n, d, rng)
+    _run_store_save(state)
+    return state
+
+def _run_store_load(state):
+    from embedding_store import EmbeddingStore
+    store = EmbeddingStore.open(str(state["dir"] / "store"))
+    # 지연 로딩을 피하려고 id와 전체 벡터를 실제로 읽는다
+    return len(store.ids), float(np.asarray(store.vectors, dtype=np.float32).sum())
+
+def _teardown_store(state):
+    shutil.rmtree(state["dir"], ignore_errors=True)
+
+CASES: Dict[str, BenchCase] = {case.name: case for case in [
+    BenchCase("stitch", _setup_stitch, _run_stitch),
+    BenchCase("ori_score", _setup_ori, _run_ori),
+    BenchCase("topk_exact", _setup_topk, _run_topk_exact),
+    BenchCase("topk_ivf", _setup_ivf, _run_ivf, max_n=2_000_000),
+    BenchCase("topk_int8", _setup_quantized("int8"), _run_quantized),
+    BenchCase("topk_pq", _setup_quantized("pq"), _run_quantized, max_n=2_000_000),
+    BenchCase("search_hybrid", _setup_hybrid, _run_hybrid, max_n=2_000_000),
+    BenchCase("ranking_metrics", _setup_ranking, _run_ranking),
+    BenchCase("store_save", _setup_store, _run_store_save, _teardown_store),
+    BenchCase("store_load", _setup_store_load, _run_store_load, _teardown_store),
+]}
+
+# --- 측정 ---------------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], warmup: int = 1, repeat: int = 5) -> List[float]:
+    """warmup회 실행 후 repeat회 측정 (측정 중 GC 비활성) -> 초 단위 실행 시간 목록"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+            gc.enable()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return times
+
+def summarize(times: Sequence[float]) -> Dict[str, float]:
+    """실행 시간 통계 (중앙값이 회귀 비교의 기본 지표)"""
+    ordered = sorted(times)
+    q1, _, q3 = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else (ordered[0],) * 3
+    return {
+        "repeat": len(ordered),
+        "min_s": ordered[0],
+        "median_s": statistics.median(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "stdev_s": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p95_s": float(np.percentile(ordered, 95)),
+        "iqr_s": q3 - q1,
+        "max_s": ordered[-1],
+    }
+
+def environment() -> Dict[str, Any]:
+    """결과 재현에 필요한 실행 환경"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "git_commit": commit,
+    }
+
+def run_suite(sizes: Sequence[int], dims: Sequence[int], cases: Optional[Sequence[str]] = None,
+              warmup: int = 1, repeat: int = 5, seed: int = 42,
+              log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """(항목, N, D) 격자 벤치마크 -> JSON 직렬화 가능한 결과"""
+    selected = [CASES[name] for name in (cases or CASES)]
+    results = []
+    for case in selected:
+        for n in sizes:
+            if case.max_n is not None and n > case.max_n:
+                log(f"  {case.name} N={n}: 건너뜀 (max_n={case.max_n})")
+                continue
+            for d in dims:
+                rng = np.random.default_rng([seed, n, d])
+                state = case.setup(n, d, rng)
+                try:
+                    stats = summarize(measure(lambda: case.run(state), warmup, repeat))
+                finally:
+                    if case.teardown is not None:
+                        case.teardown(state)
+                stats["rows_per_s"] = n / stats["median_s"] if stats["median_s"] > 0 else float("inf")
+                results.append({"case": case.name, "n": n, "d": d, **stats})
+                log(f"  {case.name:<16} N={n:<9} D={d:<5} median={stats['median_s'] * 1e3:9.2f}ms "
+                    f"p95={stats['p95_s'] * 1e3:9.2f}ms stdev={stats['stdev_s'] * 1e3:7.2f}ms")
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"sizes": list(sizes), "dims": list(dims), "warmup": warmup, "repeat": repeat, "seed": seed},
+        "environment": environment(),
+        "results": results,
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], metric: str = "median_s",
+            threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """공통 (항목, N, D)별 변화율 -> 행 목록 (regression=True면 threshold 초과 악화)
+
+    기준에는 있는데 현재 결과가 없는 (항목, N, D)는 missing=True인 회귀로 넣는다
+    (격자가 다르거나 항목이 실패·삭제되어 비교를 건너뛰면 게이트가 통과하지 않도록).
+    현재에만 있는 항목은 기준이 없으므로 비교하지 않는다.
+    """
+    base = {(r["case"], r["n"], r["d"]): r for r in baseline["results"]}
+    rows = []
+    seen = set()
+    for r in current["results"]:
+        key = (r["case"], r["n"], r["d"])
+        b = base.get(key)
+        if b is None:
+            continue
+        seen.add(key)
+        if not b[metric]:
+            continue
+        change = r[metric] / b[metric] - 1.0
+        rows.append({"case": r["case"], "n": r["n"], "d": r["d"], "baseline": b[metric],
+                     "current": r[metric], "change": change, "regression": change > threshold,
+                     "missing": False})
+    for (case, n, d), b in base.items():
+        if (case, n, d) not in seen:
+            rows.append({"case": case, "n": n, "d": d, "baseline": b[metric], "current": None,
+                         "change": None, "regression": True, "missing": True})
+    return rows
+
+def save_results(results: Dict[str, Any], path: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """메인 실행 함수"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Descent Benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="벤치마크 실행")
+    run_p.add_argument("--n", type=int, nargs="+", default=[10_000, 100_000], help="코퍼스 크기 목록")
+    run_p.add_argument("--d", type=int, nargs="+", default=[64, 256], help="임베딩 차원 목록")
+    run_p.add_argument("--cases", nargs="+", choices=sorted(CASES), help="실행할 항목 (기본: 전체)")
+    run_p.add_argument("--warmup", type=int, default=1, help="측정 전 예열 실행 수")
+    run_p.add_argument("--repeat", type=int, default=5, help="측정 반복 수")
+    run_p.add_argument("--seed", type=int, default=42, help="입력 생성 시드")
+    run_p.add_argument("--output", default=f"artifacts/benchmarks/{time.strftime('%Y%m%dT%H%M%S')}.json",
+                       help="결과 JSON 경로")
+    run_p.add_argument("--baseline", help="기준 결과 JSON - 주어지면 실행 후 바로 비교")
+    run_p.add_argument("--threshold", type=float, default=0.10, help="허용 악화율 (0.10 = 10%%)")
+
+    cmp_p = sub.add_parser("compare", help="두 결과 비교 (회귀 시 종료 코드 1)")
+    cmp_p.add_argument("baseline", help="기준 결과 JSON")
+    cmp_p.add_argument("current", help="비교할 결과 JSON")
+    cmp_p.add_argument("--metric", default="median_s", help="비교 지표 (median_s/min_s/p95_s/mean_s)")
+    cmp_p.add_argument("--threshold", type=float, default=0.10, help="허용 악화율 (0.10 = 10%%)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        print(f"⚡ 벤치마크 시작: N={args.n}, D={args.d}, warmup={args.warmup}, repeat={args.repeat}")
+        current = run_suite(args.n, args.d, args.cases, args.warmup, args.repeat, args.seed)
+        save_results(current, args.output)
+        print(f"📁 결과 저장: {args.output}")
+        if not args.baseline:
+            return 0
+        baseline, metric, threshold = load_results(args.baseline), "median_s", args.threshold
+        if args.cases:
+            # 일부 항목만 실행했으면 그 항목의 기준만 비교
+            baseline = {**baseline, "results": [r for r in baseline["results"] if r["case"] in args.cases]}
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+        metric, threshold = args.metric, args.threshold
+
+    rows = compare(baseline, current, metric, threshold)
+    for r in rows:
+        if r["missing"]:
+            print(f"❌ {r['case']:<16} N={r['n']:<9} D={r['d']:<5} {r['baseline'] * 1e3:9.2f}ms -> 결과 없음")
+            continue
+        mark = "❌" if r["regression"] else "✅"
+        print(f"{mark} {r['case']:<16} N={r['n']:<9} D={r['d']:<5} {r['baseline'] * 1e3:9.2f}ms -> "
+              f"{r['current'] * 1e3:9.2f}ms ({r['change']:+.1%})")
+    compared = [r for r in rows if not r["missing"]]
+    missing = [r for r in rows if r["missing"]]
+    regressions = [r for r in compared if r["regression"]]
+    if not compared:
+        print("❌ 비교할 공통 항목이 없습니다 (기준과 N/D 격자·항목이 같은지 확인)")
+        return 1
+    if missing:
+        print(f"❌ 기준 항목 {len(missing)}건의 현재 결과가 없습니다")
+    if regressions:
+        print(f"❌ 성능 회귀 {len(regressions)}건 ({metric}, 허용 {threshold:.0%})")
+    if missing or regressions:
+        return 1
+    print(f"✅ 회귀 없음 ({len(compared)}개 항목 비교)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,97 @@
+import asyncio
+import glob
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
 from google.cloud import bigquery
-from .config import BQ_LOCATION, GCP_PROJECT
+from .async_jobs import AsyncJobRunner, JobStats, bigquery_job_runner
+from .clients import bigquery_client
+from .config import BQ_DATASET, BQ_LOCATION, GCP_PROJECT
+from .sql_templates import load_template, template_variables
 
 def client() -> bigquery.Client:
-    return bigquery.Client(project=GCP_PROJECT, location=BQ_LOCATION)
+    return bigquery_client(GCP_PROJECT, BQ_LOCATION)
 
-def run_sql(path: str, params: dict | None = None):
-    sql = open(path, "r", encoding="utf-8").read()
+def render_sql(path: str) -> str:
+    """${GCP_PROJECT}/${PROJECT}/${BQ_DATASET}/${DATASET} 등을 .env 설정으로 치환"""
+    return load_template(path).render(template_variables(GCP_PROJECT, BQ_DATASET, BQ_LOCATION))
+
+def _job_config(params: dict | None) -> bigquery.QueryJobConfig:
     job_config = bigquery.QueryJobConfig()
     if params:
         job_config.query_parameters = [
             bigquery.ScalarQueryParameter(k, "STRING" if isinstance(v,str) else "INT64", v)
             for k, v in params.items()
         ]
-    job = client().query(sql, job_config=job_config)
+    return job_config
+
+def run_sql(path: str, params: dict | None = None):
+    sql = render_sql(path)
+    job = client().query(sql, job_config=_job_config(params))
     job.result()
     print(f"[OK] Ran: {path}")
 
+async def run_sql_async(path: str, params: dict | None = None,
+                        runner: AsyncJobRunner | None = None) -> JobStats:
+    sql = render_sql(path)
+    runner = runner or bigquery_job_runner(client())
+    stats = await runner.run(sql, path, job_config=_job_config(params))
+    print(f"[OK] Ran: {path} ({stats.bytes_processed} bytes)")
+    return stats
+
+@dataclass
+class SqlFileResult:
+    """run_sql_batch 파일별 결과 (실패 시 stats는 None, error에 예외)"""
+    path: str
+    seconds: float
+    stats: JobStats | None = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def _expand(paths: str | Iterable[str]) -> list[str]:
+    if isinstance(paths, str):
+        return sorted(glob.glob(paths))
+    return list(paths)
+
+async def run_sql_batch_async(paths: str | Iterable[str], params: dict | None = None,
+                              max_concurrency: int = 4, runner: AsyncJobRunner | None = None,
+                              fail_fast: bool = False) -> list[SqlFileResult]:
+    """여러 SQL 파일을 동시에 최대 max_concurrency개씩 실행 (입력 순서대로 결과 반환)
+
+    파일 간 의존성은 고려하지 않으므로 서로 독립적인 스크립트에만 쓴다 (순서가 있으면 sql_scripts.run_scripts).
+    fail_fast면 첫 실패 후 아직 시작하지 않은 파일은 건너뛴다(error=CancelledError).
+    """
+    paths = _expand(paths)
+    runner = runner or bigquery_job_runner(client())
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    failed = asyncio.Event()
+
+    async def run_one(path: str) -> SqlFileResult:
+        async with semaphore:
+            if fail_fast and failed.is_set():
+                return SqlFileResult(path, 0.0, error=asyncio.CancelledError("이전 파일 실패로 건너뜀"))
+            start = time.perf_counter()
+            try:
+                stats = await run_sql_async(path, params, runner)
+                return SqlFileResult(path, time.perf_counter() - start, stats=stats)
+            except Exception as e:
+                failed.set()
+                print(f"[FAIL] {path}: {e}")
+                return SqlFileResult(path, time.perf_counter() - start, error=e)
+
+    return list(await asyncio.gather(*(run_one(p) for p in paths)))
+
+def run_sql_batch(paths: str | Iterable[str] = "sql/*.sql", params: dict | None = None,
+                  max_concurrency: int = 4, runner: AsyncJobRunner | None = None,
+                  fail_fast: bool = False) -> list[SqlFileResult]:
+    """run_sql_batch_async의 동기 버전 (paths는 파일 목록 또는 glob 패턴)"""
+    start = time.perf_counter()
+    results = asyncio.run(run_sql_batch_async(paths, params, max_concurrency, runner, fail_fast))
+    ok = sum(r.ok for r in results)
+    print(f"[OK] {ok}/{len(results)} files in {time.perf_counter() - start:.1f}s "
+          f"(max_concurrency={max_concurrency})")
+    return results
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Descent Clients
+프로세스 전역 BigQuery 클라이언트 풀 (프로젝트/위치별 1개, HTTP 커넥션 재사용)
+"""
+
+import os
+import atexit
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 동시 쿼리 제출/폴링 수보다 작으면 urllib3가 "Connection pool is full" 경고 후 커넥션을 버린다
+DEFAULT_POOL_SIZE = int(os.getenv("DESCENT_BQ_POOL_SIZE", "32"))
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[Optional[str], Optional[str]], object] = {}
+
+def _pooled_session(credentials, pool_size: int):
+    """커넥션 풀을 키운 인증 세션 (TLS 연결을 잡/스레드 간에 재사용)"""
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+def bigquery_client(project: Optional[str] = None, location: Optional[str] = None,
+                    pool_size: int = DEFAULT_POOL_SIZE):
+    """(project, location)별로 한 번만 만드는 공유 BigQuery 클라이언트
+
+    클라이언트와 세션은 스레드 간 공유해도 안전하며, 프로세스 종료 시 닫힌다.
+    pool_size는 해당 클라이언트를 처음 만들 때만 적용된다.
+    """
+    key = (project, location)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import google.auth
+            from google.cloud import bigquery
+
+            credentials, default_project = google.auth.default(scopes=bigquery.Client.SCOPE)
+            client = bigquery.Client(
+                project=project or default_project,
+                location=location,
+                credentials=credentials,
+                _http=_pooled_session(credentials, pool_size),
+            )
+            _clients[key] = client
+            logger.debug(f"BigQuery 클라이언트 생성: {client.project} ({location or '기본 위치'})")
+    return client
+
+def close_clients():
+    """풀의 클라이언트를 모두 닫고 비움 (다음 호출 때 다시 생성)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"BigQuery 클라이언트 종료 실패: {e}")
+
+atexit.register(close_clients)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Descent Cost Planner
+실행 전 드라이런으로 단계별 예상 스캔 바이트를 모아 실행당 예산과 비교
+"""
+
+import csv
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TIB = 1024 ** 4
+
+@dataclass
+class QueryEstimate:
+    """쿼리 하나의 드라이런 추정치 (실패 시 bytes_processed는 None)"""
+    step: str
+    bytes_processed: Optional[int]
+    slot_ms: Optional[float] = None
+    sql: str = ""
+    error: Optional[str] = None
+
+@dataclass
+class CostPlan:
+    """파이프라인 1회 실행의 예상 비용
+
+    slot_ms는 드라이런이 제공하지 않으므로 이전 실행 cost_report.csv의
+    단계별 slot_ms/바이트 비율로 추정하며, 이력이 없는 단계는 비워 둔다.
+    """
+    estimates: List[QueryEstimate] = field(default_factory=list)
+    max_bytes: Optional[int] = None
+    max_slot_ms: Optional[float] = None
+    price_per_tib_usd: float = 6.25
+    strict: bool = False  # 예산이 없어도 추정 실패한 쿼리가 있으면 예산 초과로 간주
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.bytes_processed or 0 for e in self.estimates)
+
+    @property
+    def total_slot_ms(self) -> float:
+        return sum(e.slot_ms or 0 for e in self.estimates)
+
+    @property
+    def unknown(self) -> List[QueryEstimate]:
+        return [e for e in self.estimates if e.bytes_processed is None]
+
+    @property
+    def budgeted(self) -> bool:
+        return self.max_bytes is not None or self.max_slot_ms is not None
+
+    @property
+    def estimated_cost_usd(self) -> float:
+        return self.total_bytes / TIB * self.price_per_tib_usd
+
+    def by_step(self) -> Dict[str, int]:
+        steps: Dict[str, int] = defaultdict(int)
+        for e in self.estimates:
+            steps[e.step] += e.bytes_processed or 0
+        return dict(steps)
+
+    def violations(self) -> List[str]:
+        """예산 위반 목록 - 예산이 있으면 추정하지 못한 값은 0이 아니라 위반으로 본다"""
+        problems = []
+        if self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            problems.append(f"예상 스캔 {format_bytes(self.total_bytes)} > 예산 {format_bytes(self.max_bytes)}")
+        if self.max_slot_ms is not None and self.total_slot_ms > self.max_slot_ms:
+            problems.append(f"예상 슬롯 {self.total_slot_ms:.0f}ms > 예산 {self.max_slot_ms:.0f}ms")
+        if (self.strict or self.budgeted) and self.unknown:
+            problems.append(f"추정 실패 쿼리 {len(self.unknown)}개: {', '.join(e.step for e in self.unknown)}")
+        if self.max_slot_ms is not None:
+            no_rate = [e.step for e in self.estimates if e.bytes_processed is not None and e.slot_ms is None]
+            if no_rate:
+                problems.append(f"슬롯 추정 불가 {len(no_rate)}개 (이전 실행 cost_report.csv 이력 없음): "
+                                f"{', '.join(no_rate)}")
+        return problems
+
+    @property
+    def within_budget(self) -> bool:
+        return not self.violations()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_bytes": self.total_bytes,
+            "total_slot_ms": self.total_slot_ms,
+            "estimated_cost_usd": round(self.estimated_cost_usd, 4),
+            "max_bytes": self.max_bytes,
+            "max_slot_ms": self.max_slot_ms,
+            "within_budget": self.within_budget,
+            "violations": self.violations(),
+            "queries": [
+                {"step": e.step, "bytes_processed": e.bytes_processed, "slot_ms": e.slot_ms,
+                 "error": e.error, "sql": e.sql}
+                for e in self.estimates
+            ],
+        }
+
+    def render(self) -> str:
+        lines = [f"{'단계':<36} {'예상 스캔':>12} {'예상 슬롯(ms)':>14}"]
+        for e in self.estimates:
+            scanned = format_bytes(e.bytes_processed) if e.bytes_processed is not None else "추정 실패"
+            slot = f"{e.slot_ms:.0f}" if e.slot_ms is not None else "-"
+            lines.append(f"{e.step:<36} {scanned:>12} {slot:>14}")
+        lines.append(f"{'합계':<36} {format_bytes(self.total_bytes):>12} {self.total_slot_ms:>14.0f}"
+                     f"  (약 ${self.estimated_cost_usd:.2f})")
+        return "\n".join(lines)
+
+class BudgetExceededError(RuntimeError):
+    """예상 비용이 실행당 예산을 넘어 실행을 거부"""
+
+    def __init__(self, plan: CostPlan):
+        self.plan = plan
+        super().__init__("; ".join(plan.violations()))
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(n) < 1024 or unit == "TiB":
+            return f"{n:.1f}{unit}" if unit != "B" else f"{int(n)}B"
+        n /= 1024
+    return f"{n:.1f}TiB"
+
+def dry_run_job_config(client=None):
+    """드라이런 잡 설정 (클라이언트가 dry_run_job_config()를 제공하면 그것을 사용)"""
+    factory = getattr(client, "dry_run_job_config", None)
+    if factory is not None:
+        return factory()
+    from google.cloud import bigquery
+    return bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+
+def dry_run_bytes(client, sql: str, job_config_factory: Optional[Callable[[], Any]] = None) -> int:
+    """BigQuery 드라이런 예상 처리 바이트 (쿼리 캐시 미사용 기준)"""
+    job_config = job_config_factory() if job_config_factory is not None else dry_run_job_config(client)
+    job = client.query(sql, job_config=job_config)
+    return int(job.total_bytes_processed or 0)
+
+def load_slot_rates(cost_report_path: str) -> Dict[str, float]:
+    """이전 실행 cost_report.csv -> 단계별 slot_ms/처리 바이트 비율"""
+    path = Path(cost_report_path)
+    if not path.exists():
+        return {}
+    slot: Dict[str, float] = defaultdict(float)
+    scanned: Dict[str, float] = defaultdict(float)
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                slot[row["step"]] += float(row["slot_ms"] or 0)
+                scanned[row["step"]] += float(row["bytes_processed"] or 0)
+            except (KeyError, ValueError):
+                continue
+    return {step: slot[step] / scanned[step] for step in slot if scanned[step] > 0}
+
+@dataclass
+class FakeJobConfig:
+    """FakeDryRunClient용 잡 설정 (google-cloud-bigquery 없이 사용)"""
+    dry_run: bool = True
+    use_query_cache: bool = False
+
+@dataclass
+class FakeDryRunJob:
+    """FakeDryRunClient 드라이런 결과"""
+    sql: str
+    total_bytes_processed: int
+    job_id: Optional[str] = None
+
+class FakeDryRunClient:
+    """테스트용 드라이런 클라이언트
+
+    SQL에 estimates의 키(테이블 이름 등)가 포함되면 그 값들의 합을, 아니면
+    default_bytes를 돌려준다. errors의 키가 포함되면 해당 오류를 던진다.
+    """
+
+    def __init__(self, estimates: Optional[Dict[str, int]] = None, default_bytes: int = 0,
+                 errors: Optional[Dict[str, BaseException]] = None):
+        self.estimates = estimates or {}
+        self.default_bytes = default_bytes
+        self.errors = errors or {}
+        self.queries: List[str] = []
+
+    def dry_run_job_config(self) -> FakeJobConfig:
+        return FakeJobConfig()
+
+    def query(self, sql: str, job_config: Any = None) -> FakeDryRunJob:
+        if job_config is not None and not getattr(job_config, "dry_run", False):
+            raise AssertionError("FakeDryRunClient는 드라이런 쿼리만 지원합니다")
+        self.queries.append(sql)
+        for key, error in self.errors.items():
+            if key in sql:
+                raise error
+        matched = [n for key, n in self.estimates.items() if key in sql]
+        return FakeDryRunJob(sql, sum(matched) if matched else self.default_bytes)
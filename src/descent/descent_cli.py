@@ -4,6 +4,10 @@ Descent CLI - 우승 레벨 명령줄 인터페이스
 P3: 코드·CI/CD·가독성
 """
 
+# --import-time (또는 DESCENT_IMPORT_TIME=1): 종료 시 모듈별 import 시간 보고
+from import_profile import install_from_argv
+install_from_argv()
+
 import typer
 import yaml
 import json
@@ -11,8 +15,8 @@ from pathlib import Path
 from typing import Optional, List
 import subprocess
 import sys
+# 무거운 모듈(google-cloud-bigquery, pandas, scikit-learn, numpy)은 각 명령 안에서 import
 from descent_pipeline_v2 import PipelineRunner, PipelineConfig, load_config
-from eval_harness import DescentEvaluator
 
 app = typer.Typer(help="Descent Pipeline CLI - Championship Level")
 
@@ -21,7 +25,7 @@ def init(
     project_id: str = typer.Option(..., help="GCP Project ID"),
     dataset_id: str = typer.Option("descent_demo", help="BigQuery Dataset ID"),
     location: str = typer.Option("US", help="BigQuery Region"),
-    mode: str = typer.Option("vertex", help="Execution mode (vertex/oss/native)"),
+    mode: str = typer.Option("vertex", help="Execution mode (vertex/oss/native/local)"),
     config_file: str = typer.Option("config.yaml", help="Configuration file path")
 ):
     """Initialize project"""
@@ -71,19 +75,30 @@ def embed(
 @app.command()
 def stitch(
     config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
-    dry_run: bool = typer.Option(False, help="드라이런 모드")
+    dry_run: bool = typer.Option(False, help="드라이런 모드"),
+    full: bool = typer.Option(False, help="local 모드 전체 재스티칭 (BigQuery는 sql/rebuild_stitched.sql)")
 ):
-    """멀티모달 스티칭"""
+    """멀티모달 스티칭 (변경 로그의 키만 증분 갱신)"""
     typer.echo("🔗 멀티모달 스티칭 시작")
     
     config = load_config(config_file)
     config.dry_run = dry_run
     
+    if config.mode == "local":
+        from stitching import stitch_local
+        stats = stitch_local(config.local_data_dir, full=full, tolerance=config.struct_drift_tolerance)
+        typer.echo(f"로컬 스티칭: {json.dumps(stats, ensure_ascii=False)}")
+        typer.echo("✅ 스티칭 완료")
+        return
+    
     runner = PipelineRunner(config)
     
     # 스티칭만 실행
     runner.add_content_hash()
     runner.create_ori_params_table()
+    if config.mode == "vertex":
+        runner.incremental_struct_normalization()
+        runner.incremental_stitch()
     
     typer.echo("✅ 스티칭 완료")
 
@@ -105,25 +120,176 @@ def ori(
     runner = PipelineRunner(config)
     
     try:
-        runner.create_ori_params_table()
-        runner.create_evaluation_harness()
+        if config.mode == "local":
+            result = runner.run_local_ori()
+            runner.save_artifacts()
+            typer.echo(f"로컬 ORI: {len(result.ids)}건, 불일치 예측 {int(result.predict.sum())}건")
+        else:
+            runner.create_ori_params_table()
+            runner.create_evaluation_harness()
         typer.echo("✅ ORI 분석 완료")
     except Exception as e:
         typer.echo(f"❌ ORI 분석 실패: {e}")
         raise typer.Exit(1)
 
+@app.command()
+def sweep(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    w_min: float = typer.Option(0.0, help="가중치 최솟값"),
+    w_max: float = typer.Option(1.0, help="가중치 최댓값"),
+    w_steps: int = typer.Option(101, help="가중치 격자 수"),
+    tau_min: float = typer.Option(0.0, help="임계값 최솟값"),
+    tau_max: float = typer.Option(1.0, help="임계값 최댓값"),
+    tau_steps: int = typer.Option(101, help="임계값 격자 수"),
+    labels_file: Optional[str] = typer.Option(None, help="라벨 CSV (id,y) - 기본: eval_metrics 라벨"),
+    output: str = typer.Option("artifacts/ori_sweep.csv", help="격자 결과 CSV")
+):
+    """ORI 가중치/임계값 격자 스윕 (dz·rule_score 1회 계산 후 메모리에서 평가)"""
+    import numpy as np
+    from ori_local import load_local_corpus
+    from ori_sweep import DEFAULT_LABELS, load_labels_csv, save_sweep_csv, sweep_corpus
+
+    typer.echo("🎯 ORI 스윕 시작")
+
+    config = load_config(config_file)
+    corpus = load_local_corpus(config.local_data_dir, config.local_query_id)
+    labels = load_labels_csv(labels_file) if labels_file else DEFAULT_LABELS
+    weights = np.linspace(w_min, w_max, w_steps)
+    thresholds = np.linspace(tau_min, tau_max, tau_steps)
+
+    try:
+        result = sweep_corpus(corpus, weights, thresholds, labels)
+    except ValueError as e:
+        typer.echo(f"❌ ORI 스윕 실패: {e}")
+        raise typer.Exit(1)
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    save_sweep_csv(result, output)
+
+    best = result.best("f1")
+    typer.echo(f"최고 F1: w={best['w']:.3f}, tau={best['tau']:.3f}, F1={best['f1']:.3f} "
+               f"(precision={best['precision']:.3f}, recall={best['recall']:.3f}, accuracy={best['accuracy']:.3f})")
+    typer.echo("Pareto front (precision/recall):")
+    for p in result.pareto_front():
+        typer.echo(f"  w={p['w']:.3f}, tau={p['tau']:.3f}: precision={p['precision']:.3f}, "
+                   f"recall={p['recall']:.3f}, F1={p['f1']:.3f}")
+    typer.echo(f"✅ ORI 스윕 완료: {w_steps * tau_steps}개 격자 점 -> {output}")
+
+@app.command()
+def ann(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    index_dir: str = typer.Option("artifacts/ann_index", help="인덱스 저장 디렉터리"),
+    nlist: Optional[int] = typer.Option(None, help="IVF 리스트 수 (기본: 4·sqrt(N))"),
+    quantize: bool = typer.Option(False, help="잔차 int8 양자화 사용"),
+    pq_m: Optional[int] = typer.Option(None, help="잔차 곱 양자화 서브벡터 수 (지정 시 --quantize 대신 IVF-PQ)"),
+    rerank: int = typer.Option(0, help="근사 상위 k·rerank개를 원본 벡터로 재순위 (0이면 생략)"),
+    k: int = typer.Option(10, help="top-k"),
+    nprobe: List[int] = typer.Option([1, 2, 4, 8, 16], help="recall 리포트에 사용할 nprobe 값들"),
+    num_queries: int = typer.Option(100, help="recall 리포트 질의 수")
+):
+    """emb_stitched ANN 인덱스 생성 및 recall 리포트"""
+    import numpy as np
+    from ann_index import IVFIndex, recall_report
+    from ori_local import load_local_corpus
+
+    typer.echo("🔍 ANN 인덱스 생성 시작")
+
+    config = load_config(config_file)
+    corpus = load_local_corpus(config.local_data_dir, config.local_query_id)
+
+    index = IVFIndex.build(corpus.keys, corpus.embeddings, nlist=nlist, residual_quantization=quantize, pq_m=pq_m)
+    index.save(index_dir)
+    index = IVFIndex.load(index_dir)
+
+    # 코퍼스 표본을 질의로 사용해 전수 검색 대비 recall 측정
+    valid = np.flatnonzero(~np.isnan(corpus.embeddings).any(axis=1))
+    rng = np.random.default_rng(42)
+    sample = rng.choice(valid, min(num_queries, len(valid)), replace=False)
+    results = recall_report(index, corpus.embeddings, corpus.embeddings[sample], k=k, nprobes=nprobe, rerank=rerank)
+
+    report_path = Path(index_dir) / "recall_report.json"
+    with open(report_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for row in results:
+        typer.echo(f"nprobe={row['nprobe']}: recall@{row['k']}={row['recall_at_k']:.3f}, "
+                   f"p50={row['latency_ms_p50']:.2f}ms, p95={row['latency_ms_p95']:.2f}ms")
+    typer.echo(f"✅ ANN 인덱스 생성 완료: {index_dir}")
+
+@app.command()
+def quantize(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    index_dir: str = typer.Option("artifacts/quantized_index", help="양자화 인덱스 저장 디렉터리"),
+    codec: str = typer.Option("pq", help="압축 방식 (int8/pq)"),
+    m: Optional[int] = typer.Option(None, help="PQ 서브벡터 수 = 벡터당 바이트 (기본: 차원/4)"),
+    k: int = typer.Option(10, help="top-k"),
+    rerank: List[int] = typer.Option([0, 2, 4, 8], help="recall 리포트에 사용할 재순위 배수들"),
+    num_queries: int = typer.Option(100, help="recall 리포트 질의 수")
+):
+    """emb_stitched 벡터 압축(int8/PQ) 인덱스 생성 및 재순위별 recall 리포트"""
+    import numpy as np
+    from quantization import QuantizedIndex, quantization_report
+    from ori_local import load_local_corpus
+
+    typer.echo(f"🗜️  양자화 인덱스 생성 시작 ({codec})")
+
+    config = load_config(config_file)
+    corpus = load_local_corpus(config.local_data_dir, config.local_query_id)
+
+    index = QuantizedIndex.build(corpus.keys, corpus.embeddings, codec=codec, m=m)
+    index.save(index_dir)
+    index = QuantizedIndex.load(index_dir)
+
+    valid = np.flatnonzero(~np.isnan(corpus.embeddings).any(axis=1))
+    rng = np.random.default_rng(42)
+    sample = rng.choice(valid, min(num_queries, len(valid)), replace=False)
+    results = quantization_report(index, corpus.embeddings, corpus.embeddings[sample], k=k, reranks=rerank)
+
+    report_path = Path(index_dir) / "recall_report.json"
+    with open(report_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    typer.echo(f"벡터당 {index.quantizer.code_size}바이트 (float64 대비 {index.compression_ratio():.0f}배 압축)")
+    for row in results:
+        typer.echo(f"rerank={row['rerank']}: recall@{row['k']}={row['recall_at_k']:.3f}, "
+                   f"p50={row['latency_ms_p50']:.2f}ms, p95={row['latency_ms_p95']:.2f}ms")
+    typer.echo(f"✅ 양자화 인덱스 생성 완료: {index_dir}")
+
 @app.command()
 def report(
     config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
     modes: List[str] = typer.Option(["text", "multimodal", "native"], help="평가할 모드들"),
-    output_format: str = typer.Option("markdown", help="출력 형식 (markdown/json/csv)")
+    output_format: str = typer.Option("markdown", help="출력 형식 (markdown/json/csv)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="쿼리 결과 캐시를 거치지 않고 BigQuery에서 다시 조회"),
+    stream: bool = typer.Option(False, "--stream", help="Storage Read API Arrow 스트림으로 증분 평가"),
+    parquet_dir: Optional[str] = typer.Option(None, help="BigQuery 대신 <dir>/<mode>/*.parquet 를 스트림으로 평가"),
+    max_streams: int = typer.Option(4, help="병렬 읽기 스트림 수"),
+    labels_file: Optional[str] = typer.Option(None, help="로컬 라벨 파일 (.parquet/.csv, 기본: --parquet-dir의 labels.parquet/labels.csv)")
 ):
     """평가 리포트 생성"""
+    from query_cache import QueryResultCache
+    from arrow_reader import ParquetDirectoryReader
+    from eval_harness import DescentEvaluator, find_local_labels
+
     typer.echo("📊 평가 리포트 생성 시작")
     
     config = load_config(config_file)
     
-    evaluator = DescentEvaluator(config.project_id, config.dataset_id)
+    cache = None if no_cache else QueryResultCache(config.query_cache_dir, config.query_cache_ttl_s,
+                                                   config.query_cache_max_bytes)
+    reader_factory = None
+    if parquet_dir:
+        reader_factory = lambda mode: ParquetDirectoryReader(Path(parquet_dir) / mode,
+                                                            columns=["id", "ori", "predict"],
+                                                            max_streams=max_streams)
+        # 로컬 Parquet 평가는 라벨도 로컬에서 읽는다 (BigQuery 인증·조회 없음)
+        labels_file = labels_file or find_local_labels(parquet_dir)
+        if labels_file is None:
+            typer.echo(f"❌ {parquet_dir}에 labels.parquet/labels.csv가 없습니다 (--labels-file로 지정)")
+            raise typer.Exit(1)
+    evaluator = DescentEvaluator(config.project_id, config.dataset_id, cache=cache, stream=stream,
+                                 reader_factory=reader_factory, max_streams=max_streams,
+                                 labels_path=labels_file)
     
     try:
         # 모드별 비교
@@ -134,6 +300,8 @@ def report(
         
         # 결과 저장
         evaluator.save_results(comparison_df, report)
+        if cache is not None:
+            typer.echo(f"쿼리 캐시: {cache.stats()}")
         
         # 출력 형식에 따른 결과 표시
         if output_format == "markdown":
@@ -150,6 +318,439 @@ def report(
         typer.echo(f"❌ 리포트 생성 실패: {e}")
         raise typer.Exit(1)
 
+@app.command()
+def multi_eval(
+    queries_file: str = typer.Argument(..., help="질의 집합 JSONL (query_id, text 또는 vector, relevant)"),
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    k: int = typer.Option(100, help="질의별 검색 깊이"),
+    ks: List[int] = typer.Option([1, 3, 5, 10], help="지표 K 값들"),
+    output: str = typer.Option("artifacts/multi_query_results.jsonl", help="질의별 결과 JSONL")
+):
+    """질의 집합 일괄 평가 (stitched 행렬 블록 행렬곱)"""
+    import numpy as np
+    from multi_query import MultiQueryEvaluator, load_query_set
+    from ori_local import load_local_corpus
+
+    typer.echo("📊 다중 질의 평가 시작")
+
+    config = load_config(config_file)
+    corpus = load_local_corpus(config.local_data_dir, config.local_query_id)
+    query_ids, texts, vectors, qrels = load_query_set(queries_file)
+
+    # 벡터가 없는 질의는 텍스트를 임베딩 (캐시 우선)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        embedder = PipelineRunner(config).build_embedding_client()
+        result = embedder.embed([texts[i] or "" for i in missing])
+        if result.failures:
+            typer.echo(f"❌ 질의 임베딩 실패: {len(result.failures)}건")
+            raise typer.Exit(1)
+        for j, i in enumerate(missing):
+            vectors[i] = result.vectors[j]
+    dim = max(len(v) for v in vectors)
+    query_matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    for i, v in enumerate(vectors):
+        query_matrix[i, :len(v)] = v
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    evaluator = MultiQueryEvaluator(corpus.keys, corpus.embeddings, k=k, ks=ks)
+    summary = evaluator.evaluate(query_ids, query_matrix, qrels, output_path=output)
+
+    typer.echo(json.dumps(summary, indent=2, ensure_ascii=False))
+    typer.echo(f"✅ 다중 질의 평가 완료: {output}")
+
+@app.command()
+def convert(
+    csv_path: str = typer.Argument(..., help="임베딩 CSV 경로"),
+    store_path: str = typer.Argument(..., help="출력 저장소 디렉터리"),
+    layout: str = typer.Option("vector", help="CSV 형식 (vector: '[...]' 문자열 컬럼 / dim: dim_i 컬럼)"),
+    model: str = typer.Option("text-embedding-005", help="임베딩 모델 이름 (헤더 기록용)"),
+    dtype: str = typer.Option("float32", help="저장 dtype (float32/float16)"),
+    vector_column: str = typer.Option("embedding", help="vector 형식의 벡터 컬럼명")
+):
+    """임베딩 CSV를 바이너리 임베딩 저장소로 변환"""
+    from embedding_store import convert_dim_csv, convert_vector_csv
+
+    typer.echo(f"📦 임베딩 변환: {csv_path} -> {store_path}")
+
+    if layout == "vector":
+        store = convert_vector_csv(csv_path, store_path, model=model, vector_column=vector_column, dtype=dtype)
+    elif layout == "dim":
+        store = convert_dim_csv(csv_path, store_path, model=model, dtype=dtype)
+    else:
+        typer.echo(f"❌ 알 수 없는 CSV 형식: {layout}")
+        raise typer.Exit(1)
+
+    typer.echo(f"✅ 변환 완료: {len(store)}건 x {store.dim}차원 ({store.dtype})")
+
+@app.command()
+def synth(
+    output_dir: str = typer.Argument(..., help="출력 디렉터리 (local_data_dir로 바로 쓸 수 있음)"),
+    rows: int = typer.Option(100_000, help="행 수 (최대 1억 행 이상도 스트리밍 생성)"),
+    seed: int = typer.Option(42, help="난수 시드"),
+    discrepancy_rate: float = typer.Option(0.05, help="불일치 행 비율"),
+    label_rate: float = typer.Option(0.01, help="라벨을 붙일 행 비율"),
+    docs_rate: float = typer.Option(0.2, help="raw_docs(이미지/PDF)가 있는 행 비율"),
+    embeddings: bool = typer.Option(False, "--embeddings", help="군집·이상치를 심은 텍스트/구조화 임베딩 저장소 생성"),
+    dim: int = typer.Option(64, help="텍스트 임베딩 차원"),
+    clusters: int = typer.Option(32, help="임베딩 군집 수"),
+    outlier_rate: float = typer.Option(0.01, help="임베딩 이상치 비율"),
+    shard_rows: int = typer.Option(1_000_000, help="샤드 파일당 행 수"),
+    output_format: str = typer.Option("csv", help="출력 형식 (csv/parquet)")
+):
+    """시드 고정 합성 코퍼스 생성 (raw_texts, feat_struct, raw_docs, labels)"""
+    from synth import SynthConfig, generate
+
+    typer.echo(f"🧪 합성 코퍼스 생성: {rows:,}행 -> {output_dir}")
+    cfg = SynthConfig(rows=rows, seed=seed, discrepancy_rate=discrepancy_rate, label_rate=label_rate,
+                      docs_rate=docs_rate, embeddings=embeddings, dim=dim, clusters=clusters,
+                      outlier_rate=outlier_rate, shard_rows=shard_rows, format=output_format)
+    try:
+        manifest = generate(output_dir, cfg, log=typer.echo)
+    except (ValueError, ImportError) as e:
+        typer.echo(f"❌ 합성 코퍼스 생성 실패: {e}")
+        raise typer.Exit(1)
+
+    for table, info in manifest["tables"].items():
+        typer.echo(f"  {table}: {info['rows']:,}행, 파일 {len(info['files'])}개")
+    typer.echo(f"✅ 생성 완료 (불일치 {manifest['discrepancies']:,}건, 질의 id: {manifest['query_id']})")
+    if embeddings:
+        typer.echo(f"local 모드: local_data_dir={output_dir}, local_query_id={manifest['query_id']}")
+
+@app.command()
+def ingest(
+    input_path: str = typer.Argument(..., help="입력 파일 (CSV/JSONL/Parquet)"),
+    store_path: Optional[str] = typer.Option(None, help="출력 저장소 디렉터리 (기본: 로컬 데이터 디렉터리의 <kind>_embeddings.store)"),
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    kind: str = typer.Option("text", help="입력 종류 (text: raw_texts / struct: feat_struct)"),
+    input_format: Optional[str] = typer.Option(None, help="입력 형식 (csv/jsonl/parquet, 기본: 확장자로 판별)"),
+    id_column: str = typer.Option("id", help="id 컬럼명"),
+    text_column: str = typer.Option("body", help="text 종류의 본문 컬럼명"),
+    feature_columns: List[str] = typer.Option(["f1", "f2", "f3"], help="struct 종류의 특성 컬럼명"),
+    chunk_rows: int = typer.Option(10000, help="청크당 행 수"),
+    queue_size: int = typer.Option(4, help="단계 간 큐 크기 (청크 수)"),
+    dtype: str = typer.Option("float32", help="저장 dtype (float32/float16)"),
+    baseline_model: Optional[str] = typer.Option(None, help="text_embeddings.csv를 만든 임베딩 모델 (적재 모델과 같으면 새 저장소를 CSV 행으로 채움)")
+):
+    """대용량 입력 스트리밍 적재 (파싱 -> 지문 -> 중복 제거 -> 임베딩 -> 저장소)"""
+    from ingest import (IngestPipeline, embedding_vectorizer, feature_vectorizer,
+                        open_or_create_store, struct_chunks, text_chunks)
+    from stitching import ChangeLog, changelog_path
+
+    config = load_config(config_file)
+    # 로컬 스티칭이 읽는 기본 저장소에 쓰면 변경 키를 스티칭 변경 로그에 기록
+    changelog = None if store_path else ChangeLog(changelog_path(config.local_data_dir))
+    store_path = store_path or str(Path(config.local_data_dir) / f"{kind}_embeddings.store")
+    typer.echo(f"📥 스트리밍 적재 시작: {input_path} -> {store_path}")
+
+    # 기본 저장소를 새로 만들면 기존 CSV(text_embeddings/feat_struct) 행으로 먼저 채운다
+    # (CSV에는 모델이 기록되지 않으므로 text는 --baseline-model로 알려 줘야 한다)
+    baseline = None
+    if changelog is not None:
+        from functools import partial
+        from ingest import struct_baseline, text_baseline
+        from ori_local import table_path
+        if kind == "text" and table_path(config.local_data_dir, "text_embeddings") is not None:
+            baseline = partial(text_baseline, config.local_data_dir)
+        elif kind == "struct" and table_path(config.local_data_dir, "feat_struct") is not None:
+            baseline = partial(struct_baseline, str(table_path(config.local_data_dir, "feat_struct")), feature_columns)
+            baseline_model = "feat_struct"
+
+    try:
+        if kind == "text":
+            client = PipelineRunner(config).build_embedding_client()
+            store = open_or_create_store(store_path, client.backend.dimension, client.backend.name, dtype,
+                                         baseline, baseline_model)
+            chunks = text_chunks(input_path, input_format, id_column, text_column, chunk_rows=chunk_rows)
+            vectorize = embedding_vectorizer(client)
+        elif kind == "struct":
+            store = open_or_create_store(store_path, len(feature_columns), "feat_struct", dtype,
+                                         baseline, baseline_model)
+            chunks = struct_chunks(input_path, input_format, id_column, feature_columns, chunk_rows)
+            vectorize = feature_vectorizer
+        else:
+            typer.echo(f"❌ 알 수 없는 입력 종류: {kind}")
+            raise typer.Exit(1)
+    except ValueError as e:
+        typer.echo(f"❌ 저장소를 열 수 없습니다: {e}")
+        if baseline is not None:
+            typer.echo("   --store-path로 별도 저장소에 적재하거나, CSV와 같은 모델이면 --baseline-model을 지정하세요")
+        raise typer.Exit(1)
+
+    # 구조화 통계가 있으면 적재분만큼 누적 통계 갱신 (전체 재스캔 없음)
+    normalizer, on_write = None, None
+    if kind == "struct" and changelog is not None:
+        from struct_stats import StructNormalizer, ingest_hook, stats_path
+        if Path(stats_path(config.local_data_dir)).exists():
+            normalizer = StructNormalizer.load(stats_path(config.local_data_dir))
+            on_write = ingest_hook(normalizer, store)
+
+    report = IngestPipeline(store, vectorize, queue_size=queue_size,
+                            changelog=changelog, source=kind, on_write=on_write).run(chunks)
+    if normalizer is not None:
+        normalizer.save(stats_path(config.local_data_dir))
+        typer.echo(f"  구조화 통계 드리프트: {normalizer.drift():.4f} (허용치 {normalizer.tolerance})")
+
+    for name, counter in report.stages.items():
+        typer.echo(f"  {name}: {counter.items_in}건 -> {counter.items_out}건, "
+                   f"{counter.throughput:,.0f}건/초 (대기 {counter.wait_s:.2f}초)")
+    if report.failed:
+        typer.echo(f"❌ 임베딩 실패 {report.failed}건: {', '.join(report.failed_ids[:10])}")
+        raise typer.Exit(1)
+    typer.echo(f"✅ 적재 완료: {report.written}건 기록, 중복 {report.duplicates}건 제외 "
+               f"({report.wall_time:.2f}초)")
+
+@app.command()
+def plan(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    max_bytes: Optional[int] = typer.Option(None, help="실행당 예상 스캔 바이트 예산 (기본: 설정의 max_bytes_per_run)"),
+    max_slot_ms: Optional[float] = typer.Option(None, help="실행당 예상 슬롯 예산 (기본: 설정의 max_slot_ms_per_run)"),
+    strict: bool = typer.Option(False, "--strict", help="예산이 없어도 드라이런 추정 실패 쿼리가 있으면 예산 초과로 처리")
+):
+    """실행 전 전체 파이프라인 예상 스캔 바이트·비용 계획 (쿼리는 드라이런만 수행)"""
+    typer.echo("💰 비용 계획 수집")
+
+    config = load_config(config_file)
+    if config.mode == "local":
+        typer.echo("local 모드는 BigQuery 비용이 없습니다")
+        return
+    if max_bytes is not None:
+        config.max_bytes_per_run = max_bytes
+    if max_slot_ms is not None:
+        config.max_slot_ms_per_run = max_slot_ms
+    config.budget_strict = config.budget_strict or strict
+
+    cost_plan = PipelineRunner(config).plan()
+    typer.echo(cost_plan.render())
+    for e in cost_plan.unknown:
+        typer.echo(f"⚠️ 추정 실패 ({e.step}): {e.error}")
+    if not cost_plan.within_budget:
+        for problem in cost_plan.violations():
+            typer.echo(f"❌ 예산 초과: {problem}")
+        raise typer.Exit(1)
+    typer.echo("✅ 예산 이내 (artifacts/cost_plan.json)")
+
+@app.command()
+def sql(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    pattern: str = typer.Option("sql/[0-9]*.sql", help="실행할 SQL 파일 glob (파일 이름 순이 선언 순서)"),
+    max_workers: int = typer.Option(8, help="동시에 실행할 최대 스크립트 수"),
+    plan_only: bool = typer.Option(False, "--plan-only", help="치환·의존성 분석 결과만 출력하고 실행하지 않음"),
+    output: str = typer.Option("artifacts/sql_schedule.json", help="실행 기록(JSON) 경로")
+):
+    """sql/ 스크립트를 템플릿 치환 후 읽기/쓰기 테이블 의존성에 따라 병렬 실행"""
+    import json
+    from scheduler import StepFailedError
+    from sql_scripts import describe, load_scripts, run_scripts
+    from sql_templates import SqlTemplateError, template_variables
+
+    config = load_config(config_file)
+    variables = template_variables(config.project_id, config.dataset_id, config.location)
+    try:
+        scripts = load_scripts(pattern, variables)
+    except SqlTemplateError as e:
+        typer.echo(f"❌ 템플릿 치환 실패: {e}")
+        raise typer.Exit(1)
+    if not scripts:
+        typer.echo(f"❌ SQL 파일 없음: {pattern}")
+        raise typer.Exit(1)
+
+    typer.echo(f"🗂️  SQL 스크립트 {len(scripts)}개 실행 계획")
+    typer.echo(describe(scripts))
+    if plan_only:
+        return
+
+    from clients import bigquery_client
+
+    client = bigquery_client(config.project_id, config.location)
+    try:
+        report = run_scripts(scripts, client, max_workers=max_workers)
+        failed = False
+    except StepFailedError as e:
+        report = e.report
+        failed = True
+        for name, error in e.errors.items():
+            typer.echo(f"❌ {name}: {error}")
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+    typer.echo(f"⏱️  {report.wall_time:.1f}초 (크리티컬 패스 {report.critical_path_time:.1f}초: "
+               f"{' -> '.join(report.critical_path)})")
+    if failed:
+        raise typer.Exit(1)
+    typer.echo(f"✅ SQL 실행 완료 ({output})")
+
+def _local_table(data_dir: str, table: str) -> str:
+    """로컬 테이블 경로 (CSV/Parquet 파일 또는 synth 샤드 디렉터리), 없으면 종료"""
+    from ori_local import table_path
+    path = table_path(data_dir, table)
+    if path is None:
+        typer.echo(f"❌ {data_dir}에 {table}.csv/.parquet 또는 {table}/part-* 가 없습니다")
+        raise typer.Exit(1)
+    return str(path)
+
+@app.command()
+def rules(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    rule_file: Optional[str] = typer.Option(None, help="규칙 파일 (.yaml/.json, 기본: 설정의 rule_file 또는 report_ori 규칙)"),
+    keyword: bool = typer.Option(False, "--keyword", help="12_ori_optimization.sql의 keyword_score 규칙 사용"),
+    input_csv: Optional[str] = typer.Option(None, help="채점할 CSV/Parquet 또는 part-* 샤드 디렉터리 (기본: local_data_dir의 raw_texts)"),
+    output: Optional[str] = typer.Option(None, help="행별 점수 CSV (id,score,rule)"),
+    sql: bool = typer.Option(False, "--sql", help="같은 의미의 BigQuery CASE 식만 출력")
+):
+    """키워드 규칙 집합으로 본문을 스트리밍 채점하고 규칙별 매칭 수 집계"""
+    import csv
+    import time
+    from rule_engine import KEYWORD_RULES, REPORT_RULES, iter_csv_batches, load_ruleset
+
+    config = load_config(config_file)
+    rule_file = rule_file or config.rule_file
+    ruleset = load_ruleset(rule_file) if rule_file else KEYWORD_RULES if keyword else REPORT_RULES
+    if sql:
+        typer.echo(ruleset.to_sql())
+        return
+
+    path = input_csv or _local_table(config.local_data_dir, "raw_texts")
+    typer.echo(f"📏 규칙 채점: {ruleset.name} ({len(ruleset.rules)}개 규칙) <- {path}")
+    start = time.perf_counter()
+    totals = {r.name: 0 for r in ruleset.rules}
+    rows = 0
+    writer = None
+    out = open(output, "w", newline="", encoding="utf-8") if output else None
+    try:
+        if out:
+            writer = csv.writer(out)
+            writer.writerow(["id", "score", "rule"])
+        for ids, bodies in iter_csv_batches(path):
+            result = next(ruleset.iter_scores([bodies]))
+            rows += len(ids)
+            for name, count in result.hit_counts.items():
+                totals[name] += count
+            if writer:
+                names = [ruleset.rules[i].name if i >= 0 else "" for i in result.rule]
+                writer.writerows(zip(ids, result.scores.tolist(), names))
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    for name, count in totals.items():
+        typer.echo(f"  {name:<24} {count:>10}건 ({count / max(1, rows):.2%})")
+    typer.echo(f"✅ {rows}건 채점 ({elapsed:.2f}초, {rows / max(elapsed, 1e-9):,.0f}행/초)"
+               + (f" -> {output}" if output else ""))
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="검색 질의 텍스트 (예: '스펙과 이미지의 불일치 사례')"),
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    index_dir: str = typer.Option("artifacts/lexical_index", help="BM25 색인 디렉터리 (없으면 생성)"),
+    rebuild: bool = typer.Option(False, "--rebuild", help="색인을 다시 생성"),
+    input_csv: Optional[str] = typer.Option(None, help="색인할 CSV/Parquet 또는 part-* 샤드 디렉터리 (기본: local_data_dir의 raw_texts)"),
+    mode: str = typer.Option("hybrid", help="검색 모드 (lexical/vector/hybrid, 벡터는 text_embeddings.store와 같은 모델일 때만)"),
+    k: int = typer.Option(10, help="top-k"),
+    candidates: int = typer.Option(1000, help="hybrid에서 순위별로 융합할 후보 수 (BM25 상위 N)"),
+    full_scan: bool = typer.Option(False, "--full-scan", help="hybrid 벡터 순위를 후보 대신 전체 코퍼스에서 계산"),
+    output: Optional[str] = typer.Option(None, help="결과 JSON 경로")
+):
+    """raw_texts BM25 색인 검색 (텍스트 임베딩 벡터 순위와 RRF 융합, 기본은 어휘 후보에서만 벡터 채점)
+
+    질의 임베딩 모델·차원이 text_embeddings.store 헤더와 다르면 hybrid는 어휘 검색으로 대체하고
+    vector는 실패한다.
+    """
+    import time
+    from dataclasses import asdict
+    from lexical_index import BM25Index, HybridRetriever
+    from rule_engine import iter_csv_batches
+
+    config = load_config(config_file)
+    if rebuild or not (Path(index_dir) / "meta.json").exists():
+        path = input_csv or _local_table(config.local_data_dir, "raw_texts")
+        typer.echo(f"📚 BM25 색인 생성: {path} -> {index_dir}")
+        BM25Index.build(iter_csv_batches(path)).save(index_dir)
+    index = BM25Index.load(index_dir)
+
+    query_vector = None
+    keys, vectors = index.keys, None
+    if mode != "lexical":
+        # 질의는 코퍼스 텍스트 임베딩과 같은 모델·차원이어야 벡터 순위가 의미 있다
+        from embedding_store import EmbeddingStore
+        from ori_local import load_text_vectors
+        store_path = Path(config.local_data_dir) / "text_embeddings.store"
+        client = PipelineRunner(config).build_embedding_client()
+        backend = client.backend
+        if not (store_path / "header.json").exists():
+            problem = f"{store_path}가 없어 코퍼스 임베딩 모델을 확인할 수 없습니다"
+        else:
+            store = EmbeddingStore.open(str(store_path))
+            problem = None
+            if (store.model, store.dim) != (backend.name, backend.dimension):
+                problem = (f"코퍼스 임베딩({store.model}, {store.dim}차원)과 질의 임베딩"
+                           f"({backend.name}, {backend.dimension}차원)의 모델이 다릅니다")
+        if problem:
+            if mode == "vector":
+                typer.echo(f"❌ {problem}")
+                raise typer.Exit(1)
+            typer.echo(f"⚠️  {problem} - 어휘(lexical) 검색으로 대체합니다")
+            mode = "lexical"
+        else:
+            keys, vectors = load_text_vectors(config.local_data_dir)
+            result = client.embed([query])
+            if result.failures:
+                typer.echo(f"❌ 질의 임베딩 실패: {result.failures[0].error}")
+                raise typer.Exit(1)
+            query_vector = result.vectors[0]
+
+    retriever = HybridRetriever(index, keys, vectors)
+    start = time.perf_counter()
+    hits = retriever.search(query, query_vector, k=k, mode=mode, candidates=candidates, prune=not full_scan)
+    elapsed = time.perf_counter() - start
+
+    typer.echo(f"🔎 {mode} 검색 ({len(index)}건 색인, {elapsed * 1000:.1f}ms): {query}")
+    for i, hit in enumerate(hits, 1):
+        ranks = f"lex={hit.lexical_rank or '-'} vec={hit.vector_rank or '-'}"
+        typer.echo(f"  {i:>3}. {hit.key:<20} {hit.score:.4f} ({ranks})")
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({"query": query, "mode": mode, "prune": not full_scan, "candidates": candidates,
+                       "hits": [asdict(h) for h in hits]}, f, indent=2, ensure_ascii=False)
+        typer.echo(f"✅ 결과 저장: {output}")
+
+@app.command()
+def profile(
+    config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
+    trace_dir: Optional[str] = typer.Option(None, help="스팬 JSONL 디렉터리 (기본: 설정의 trace_dir)"),
+    last: int = typer.Option(20, help="최근 N개 실행만 집계"),
+    kinds: List[str] = typer.Option(["step"], help="집계할 스팬 종류 (step/query/submit/wait/download/embed_batch/...; all=전체)"),
+    output: Optional[str] = typer.Option(None, help="집계 결과 CSV 경로")
+):
+    """실행 간 스팬 이름별 p50/p95 실행 시간 집계"""
+    import csv
+    from tracing import load_spans, summarize_spans
+
+    config = load_config(config_file)
+    directory = Path(trace_dir or config.trace_dir)
+    files = sorted(directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime)[-last:]
+    if not files:
+        typer.echo(f"❌ 트레이스 없음: {directory}")
+        raise typer.Exit(1)
+
+    rows = summarize_spans(load_spans(files), kinds=None if "all" in kinds else kinds)
+    typer.echo(f"📈 실행 {len(files)}개 집계 ({directory})")
+    typer.echo(f"{'스팬':<48} {'실행':>4} {'횟수':>5} {'p50(s)':>9} {'p95(s)':>9} {'rows':>10} {'bytes':>14} {'캐시':>6} {'재시도':>6}")
+    for r in rows:
+        typer.echo(f"{r['name']:<48} {r['runs']:>4} {r['count']:>5} {r['p50_s']:>9.3f} {r['p95_s']:>9.3f} "
+                   f"{int(r['rows']):>10} {int(r['bytes']):>14} {int(r['cache_hits']):>6} {int(r['retries']):>6}")
+
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["name"])
+            writer.writeheader()
+            writer.writerows(rows)
+        typer.echo(f"✅ 집계 저장: {output}")
+
 @app.command()
 def test(
     config_file: str = typer.Option("config.yaml", help="설정 파일 경로"),
@@ -218,8 +819,9 @@ def clean(
     
     if tables:
         if typer.confirm("⚠️  BigQuery 테이블을 삭제하시겠습니까?"):
+            from clients import bigquery_client
             config = load_config(config_file)
-            client = bigquery.Client(project=config.project_id)
+            client = bigquery_client(config.project_id, config.location)
             
             # 테이블 목록 가져오기
             tables = client.list_tables(config.dataset_id)
@@ -258,8 +860,8 @@ def status(
     
     # BigQuery 연결 확인
     try:
-        from google.cloud import bigquery
-        client = bigquery.Client(project=config.project_id)
+        from clients import bigquery_client
+        client = bigquery_client(config.project_id, config.location)
         datasets = list(client.list_datasets())
         typer.echo(f"BigQuery 연결: ✅ ({len(datasets)}개 데이터셋)")
     except Exception as e:
@@ -6,15 +6,21 @@ P0: 드라이런 + 아이도포턴시 + 에러 처리
 
 import os
 import json
+import asyncio
+import threading
 import time
 import hashlib
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import yaml
-from google.cloud import bigquery
-from google.api_core import retry, exceptions
 import logging
+from scheduler import Step, StepFailedError, StepScheduler
+from cost_planner import BudgetExceededError, CostPlan, QueryEstimate, dry_run_bytes, load_slot_rates
+from tracing import NULL_TRACER, current_span, file_tracer, new_run_id
+
+# google-cloud-bigquery, asyncio(async_jobs), numpy 계열(stitching, struct_stats)은 실제로 쓰는 메서드에서 import
+# (CLI의 init/status/clean 등 가벼운 명령이 수 초의 import·인증 비용을 치르지 않도록)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,7 +32,7 @@ class PipelineConfig:
     project_id: str
     dataset_id: str
     location: str = "US"
-    mode: str = "vertex"  # vertex, oss, native
+    mode: str = "vertex"  # vertex, oss, native, local
     dry_run: bool = False
     max_retries: int = 3
     retry_delay: float = 1.0
@@ -35,15 +41,44 @@ class PipelineConfig:
     top_k: int = 10
     enable_incremental: bool = True
     enable_cost_logging: bool = True
+    local_data_dir: str = "data/sample"  # local 모드 입력 디렉터리
+    local_query_id: str = "A100"  # local 모드 ORI 질의 벡터 id (합성 코퍼스는 manifest.json의 query_id)
+    rule_file: Optional[str] = None  # local 모드 rule_score 규칙 파일 (.yaml/.json, 기본: report_ori 뷰와 같은 규칙)
+    # Vertex AI 모델 이름 (EMBEDDING_MODEL은 BigQuery 원격 모델 models.text_embedding 이므로 별도 변수)
+    embedding_model: str = field(default_factory=lambda: os.getenv("VERTEX_EMBEDDING_MODEL", "text-embedding-005"))
+    embedding_backend: str = "vertex"  # vertex, local (local은 모델명 대신 local-hash 키로 캐시)
+    embedding_cache_path: str = "artifacts/embedding_cache/cache.sqlite"
+    embedding_cache_max_bytes: int = 2 * 1024 ** 3
+    max_parallel_steps: int = 4  # 동시에 실행할 독립 단계 수
+    struct_drift_tolerance: float = 0.05  # 구조화 통계 드리프트 허용치 (기준 표준편차 단위)
+    query_cache_dir: str = "artifacts/query_cache"
+    query_cache_ttl_s: float = 86400.0
+    query_cache_max_bytes: int = 1024 ** 3
+    enable_tracing: bool = True
+    trace_dir: str = "artifacts/traces"  # 실행별 스팬 JSONL (<run_id>.jsonl)
+    metrics_textfile: Optional[str] = "artifacts/metrics/descent.prom"  # Prometheus textfile (None이면 생략)
+    max_bytes_per_run: Optional[int] = None  # 실행당 예상 스캔 바이트 예산 (설정 시 실행 전 드라이런 점검)
+    max_slot_ms_per_run: Optional[float] = None  # 실행당 예상 슬롯 예산 (이전 실행 slot_ms/바이트 비율로 추정)
+    budget_strict: bool = False  # 예산이 없어도 드라이런 추정 실패 쿼리가 있으면 실행 거부 (예산이 있으면 항상 거부)
+    price_per_tib_usd: float = 6.25
 
 class PipelineRunner:
     """파이프라인 실행기"""
     
-    def __init__(self, config: PipelineConfig):
+    def __init__(self, config: PipelineConfig, client=None, job_runner=None):
         self.config = config
-        self.client = bigquery.Client(project=config.project_id)
+        # client 주입 시 그대로 사용 (예: FakeDryRunClient), 아니면 첫 쿼리 때 생성
+        self._client = client
+        self._plan: Optional[CostPlan] = None  # plan() 수집 중이면 쿼리를 실행하지 않고 추정만 기록
         self.run_log = []
         self.cost_log = []
+        # job_runner 주입 시 그대로 사용 (예: FakeJobBackend), 아니면 BigQuery 백엔드
+        self._job_runner = job_runner
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self.run_id = new_run_id()
+        self.tracer = (file_tracer(config.trace_dir, config.metrics_textfile, self.run_id)
+                       if config.enable_tracing else NULL_TRACER)
         
     def log_step(self, step: str, status: str, details: Dict[str, Any] = None):
         """단계 로깅"""
@@ -56,60 +91,125 @@ class PipelineRunner:
         self.run_log.append(log_entry)
         logger.info(f"[{status.upper()}] {step}: {details}")
         
-    def log_cost(self, job_id: str, step: str):
-        """비용 로깅"""
+    def log_cost(self, job, step: str):
+        """비용 로깅 (완료된 잡 객체에서 수집, 추가 get_job 호출 없음)"""
         if not self.config.enable_cost_logging:
             return
             
+        from async_jobs import JobStats, stats_from_job
+
         try:
-            job = self.client.get_job(job_id)
-            stats = job.statistics
+            stats = job if isinstance(job, JobStats) else stats_from_job(job)
             
             cost_entry = {
                 "timestamp": time.time(),
                 "step": step,
-                "job_id": job_id,
-                "slot_ms": getattr(stats, 'total_slot_ms', 0),
-                "bytes_processed": getattr(stats.query, 'total_bytes_processed', 0) if hasattr(stats, 'query') else 0,
-                "creation_time": job.created.isoformat() if job.created else None,
-                "end_time": job.ended.isoformat() if job.ended else None
+                "job_id": stats.job_id,
+                "slot_ms": stats.slot_ms,
+                "bytes_processed": stats.bytes_processed,
+                "creation_time": stats.creation_time,
+                "end_time": stats.end_time
             }
             self.cost_log.append(cost_entry)
         except Exception as e:
             logger.warning(f"비용 로깅 실패: {e}")
     
-    @retry.Retry(
-        predicate=retry.if_exception_type(exceptions.ServiceUnavailable, exceptions.InternalServerError),
-        deadline=300.0,
-        initial=1.0,
-        maximum=60.0,
-        multiplier=2.0
-    )
+    @property
+    def client(self):
+        """BigQuery 클라이언트 (첫 접근 시 생성, local 모드는 None)"""
+        if self._client is None and self.config.mode != "local":
+            from clients import bigquery_client
+            self._client = bigquery_client(self.config.project_id, self.config.location)
+        return self._client
+    
+    @property
+    def job_runner(self):
+        """논블로킹 잡 실행기 (BigQuery 백엔드, 일시적 오류 재제출)"""
+        if self._job_runner is None:
+            from async_jobs import bigquery_job_runner
+
+            self._job_runner = bigquery_job_runner(self.client)
+        return self._job_runner
+    
+    def _run_async(self, coro):
+        """공유 이벤트 루프 스레드에서 코루틴 실행 후 결과 대기
+
+        병렬 단계의 모든 잡 제출·상태 조회가 이 루프 하나에서 이루어지므로
+        잡마다 job.result()로 스레드를 막지 않는다.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="pipeline-jobs", daemon=True).start()
+                self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    def _close_loop(self):
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+    
+    @property
+    def planning(self) -> bool:
+        """드라이런 또는 비용 계획 수집 중 (쿼리·적재를 실제로 실행하지 않음)"""
+        return self.config.dry_run or self._plan is not None
+    
+    def estimate_query(self, sql: str, step: str) -> QueryEstimate:
+        """드라이런으로 예상 처리 바이트 추정 (실패해도 예외 대신 추정 실패로 기록)"""
+        try:
+            estimate = QueryEstimate(step, dry_run_bytes(self.client, sql), sql=" ".join(sql.split())[:200])
+            self.log_step(step, "DRY_RUN", {"estimated_bytes": estimate.bytes_processed})
+        except Exception as e:
+            estimate = QueryEstimate(step, None, sql=" ".join(sql.split())[:200], error=str(e))
+            self.log_step(step, "DRY_RUN_ERROR", {"error": str(e)})
+        if self._plan is not None:
+            self._plan.estimates.append(estimate)
+        return estimate
+    
+    async def _query_job(self, sql: str, step: str, span):
+        """잡 실행 (재시도 횟수·비용을 span에 기록) -> JobStats"""
+        stats = await self.job_runner.run(sql, step, on_retry=lambda e: span.add(retries=1))
+        span.add(bytes=stats.bytes_processed, slot_ms=stats.slot_ms, cache_hits=int(stats.cache_hit))
+        span.set(job_id=stats.job_id)
+        return stats
+    
+    async def execute_query_async(self, sql: str, step: str) -> Optional[str]:
+        """쿼리 비동기 실행 - 여러 단계를 asyncio.gather로 함께 대기할 수 있다"""
+        if self.planning:
+            self.estimate_query(sql, step)
+            return None
+        
+        try:
+            with self.tracer.span(f"{step}.query", kind="query", step=step) as span:
+                stats = await self._query_job(sql, step, span)
+        except Exception as e:
+            self.log_step(step, "ERROR", {"error": str(e)})
+            raise
+        self.log_cost(stats, step)
+        self.log_step(step, "SUCCESS", {"job_id": stats.job_id})
+        return stats.job_id
+    
     def execute_query(self, sql: str, step: str, dry_run: bool = None) -> Optional[str]:
-        """쿼리 실행 (리트라이 포함)"""
+        """쿼리 실행 (잡 레이어 경유, 일시적 오류 재제출)"""
         if dry_run is None:
-            dry_run = self.config.dry_run
+            dry_run = self.planning
             
         if dry_run:
-            logger.info(f"[DRY_RUN] {step}: {sql[:100]}...")
+            # 실행하지 않고 엔진에 예상 처리 바이트만 요청
+            self.estimate_query(sql, step)
             return None
             
         try:
-            job_config = bigquery.QueryJobConfig(dry_run=dry_run)
-            job = self.client.query(sql, job_config=job_config)
-            
-            if not dry_run:
-                job.result()  # Wait for completion
-                self.log_cost(job.job_id, step)
-                self.log_step(step, "SUCCESS", {"job_id": job.job_id})
-                return job.job_id
-            else:
-                self.log_step(step, "DRY_RUN", {"estimated_bytes": job.total_bytes_processed})
-                return None
-                
+            # 스팬은 호출 단계 스레드에서 열어 단계 스팬 아래에 기록
+            with self.tracer.span(f"{step}.query", kind="query", step=step) as span:
+                stats = self._run_async(self._query_job(sql, step, span))
         except Exception as e:
             self.log_step(step, "ERROR", {"error": str(e)})
             raise
+        self.log_cost(stats, step)
+        self.log_step(step, "SUCCESS", {"job_id": stats.job_id})
+        return stats.job_id
     
     def add_content_hash(self):
         """콘텐츠 해시 추가 (아이도포턴시)"""
@@ -144,23 +244,16 @@ class PipelineRunner:
         step = "incremental_text_embedding"
         
         if self.config.mode == "vertex":
-            # Vertex AI 기반 증분 임베딩
+            # Vertex AI 기반 증분 임베딩: 신규 id 또는 본문(content_hash)이 바뀐 행
             sql = f"""
+            ALTER TABLE `{self.config.project_id}.{self.config.dataset_id}.emb_view_t_vertex`
+            ADD COLUMN IF NOT EXISTS content_hash INT64;
+            
             CREATE OR REPLACE TABLE `{self.config.project_id}.{self.config.dataset_id}.emb_text_new` AS
             SELECT t.id, t.body, t.content_hash
             FROM `{self.config.project_id}.{self.config.dataset_id}.raw_texts` t
             LEFT JOIN `{self.config.project_id}.{self.config.dataset_id}.emb_view_t_vertex` e USING(id)
-            WHERE e.id IS NULL;
-            
-            -- 새로 생성된 임베딩을 기존 테이블에 MERGE
-            MERGE `{self.config.project_id}.{self.config.dataset_id}.emb_view_t_vertex` AS target
-            USING `{self.config.project_id}.{self.config.dataset_id}.emb_text_new` AS source
-            ON target.id = source.id
-            WHEN NOT MATCHED THEN
-            INSERT (id, embedding) VALUES (source.id, 
-                -- 여기서 실제 Vertex AI 호출 (Python에서 처리)
-                [0.0]  -- 플레이스홀더
-            );
+            WHERE e.id IS NULL OR e.content_hash IS DISTINCT FROM t.content_hash;
             """
         else:
             # OSS 기반 증분 임베딩
@@ -173,6 +266,99 @@ class PipelineRunner:
             """
         
         self.execute_query(sql, step)
+        
+        if self.config.mode == "vertex":
+            self.embed_pending_texts()
+    
+    def build_embedding_client(self):
+        """임베딩 캐시가 연결된 배치 임베딩 클라이언트 생성"""
+        from embedding_cache import EmbeddingCache
+        from embedding_client import BatchEmbeddingClient, HashEmbeddingBackend, VertexEmbeddingBackend
+        
+        if self.config.embedding_backend == "local":
+            backend = HashEmbeddingBackend()  # 실제 모델 키로 캐시에 해시 벡터가 섞이지 않게 기본 이름 유지
+        else:
+            backend = VertexEmbeddingBackend(self.config.project_id, model=self.config.embedding_model)
+        cache = EmbeddingCache(self.config.embedding_cache_path, self.config.embedding_cache_max_bytes)
+        return BatchEmbeddingClient(backend, max_retries=self.config.max_retries,
+                                    retry_delay=self.config.retry_delay, cache=cache, tracer=self.tracer)
+    
+    def embed_pending_texts(self):
+        """emb_text_new 행을 캐시 우선으로 임베딩 후 emb_view_t_vertex에 MERGE"""
+        step = "embed_pending_texts"
+        table = f"{self.config.project_id}.{self.config.dataset_id}"
+        
+        if self.planning:
+            # 임베딩·적재는 드라이런이 없으므로 emb_text_new 조회 비용만 추정
+            self.estimate_query(f"SELECT id, body, content_hash FROM `{table}.emb_text_new`", step)
+            return
+        
+        with self.tracer.span(f"{step}.download", kind="download") as span:
+            rows = list(self.client.query(f"SELECT id, body, content_hash FROM `{table}.emb_text_new`").result())
+            span.add(rows=len(rows))
+        if not rows:
+            self.log_step(step, "SUCCESS", {"rows": 0})
+            return
+        
+        embedder = self.build_embedding_client()
+        with self.tracer.span(f"{step}.embed", kind="embed") as span:
+            result = embedder.embed([r["body"] or "" for r in rows],
+                                    fingerprints=[r["content_hash"] for r in rows])
+            span.add(rows=len(rows), cache_hits=result.cache_hits, retries=result.retries)
+        self.log_step("embedding_cache", "STATS", embedder.cache.stats())
+        
+        ok = result.ok
+        payload = [
+            {"id": r["id"], "content_hash": r["content_hash"], "embedding": result.vectors[i].tolist()}
+            for i, r in enumerate(rows) if ok[i]
+        ]
+        from google.cloud import bigquery
+        from stitching import StitchSQL
+        
+        staged = f"{table}.emb_text_staged"
+        load_config = bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE", schema=[
+            bigquery.SchemaField("id", "STRING"),
+            bigquery.SchemaField("content_hash", "INT64"),
+            bigquery.SchemaField("embedding", "FLOAT64", mode="REPEATED"),
+        ])
+        with self.tracer.span(f"{step}.upload", kind="upload") as span:
+            self.client.load_table_from_json(payload, staged, job_config=load_config).result()
+            span.add(rows=len(payload))
+        
+        # 갱신된 id는 증분 스티칭 변경 로그에 함께 기록
+        stitch_sql = StitchSQL(self.config.project_id, self.config.dataset_id)
+        self.execute_query(f"""
+        MERGE `{table}.emb_view_t_vertex` AS target
+        USING `{staged}` AS source
+        ON target.id = source.id
+        WHEN MATCHED THEN
+        UPDATE SET embedding = source.embedding, content_hash = source.content_hash
+        WHEN NOT MATCHED THEN
+        INSERT (id, embedding, content_hash) VALUES (source.id, source.embedding, source.content_hash);
+        {stitch_sql.log_changes_sql("text", f"SELECT id FROM `{staged}`")}
+        """, step)
+        
+        if result.failures:
+            self.log_step(step, "PARTIAL", {
+                "failed": len(result.failures),
+                "failed_ids": [rows[f.index]["id"] for f in result.failures[:100]]
+            })
+    
+    def incremental_struct_normalization(self):
+        """신규 feat_struct 행만 누적 통계에 병합·정규화 (드리프트 초과 시 전체 재정규화)"""
+        from struct_stats import StructStatsSQL
+        
+        step = "incremental_struct_normalization"
+        stats_sql = StructStatsSQL(self.config.project_id, self.config.dataset_id)
+        self.execute_query(stats_sql.incremental_sql(self.config.struct_drift_tolerance), step)
+    
+    def incremental_stitch(self):
+        """변경 로그(+ id 비교로 찾은 추가·삭제 키)만 emb_stitched에 재스티칭 (전체 재작성 없음)"""
+        from stitching import StitchSQL
+        
+        step = "incremental_stitch"
+        stitch_sql = StitchSQL(self.config.project_id, self.config.dataset_id)
+        self.execute_query(stitch_sql.merge_sql(), step)
     
     def create_evaluation_harness(self):
         """평가 하니스 생성"""
@@ -215,6 +401,38 @@ class PipelineRunner:
         
         self.execute_query(sql, step)
     
+    def run_local_ori(self):
+        """로컬 ORI 계산 (report_ori 뷰와 동일한 컬럼)"""
+        from ori_local import LocalORIEngine, load_local_corpus
+        from rule_engine import REPORT_RULES, load_ruleset
+
+        step = "local_ori"
+        start = time.time()
+        try:
+            with self.tracer.span(f"{step}.load", kind="download") as span:
+                corpus = load_local_corpus(self.config.local_data_dir, self.config.local_query_id)
+                span.add(rows=len(corpus.keys))
+            with self.tracer.span(f"{step}.score", kind="internal") as span:
+                rules = load_ruleset(self.config.rule_file) if self.config.rule_file else REPORT_RULES
+                engine = LocalORIEngine(self.config.ori_weight, self.config.ori_threshold, rules=rules)
+                result = engine.score(corpus)
+                span.add(rows=len(result.ids))
+        except Exception as e:
+            self.log_step(step, "ERROR", {"error": str(e)})
+            raise
+
+        artifacts_dir = Path("artifacts")
+        artifacts_dir.mkdir(exist_ok=True)
+        result.to_frame().to_csv(artifacts_dir / "report_ori_local.csv", index=False)
+
+        self.log_step(step, "SUCCESS", {
+            "rows": len(result.ids),
+            "positives": int(result.predict.sum()),
+            "rule_hits": result.rule_hits,
+            "elapsed_s": round(time.time() - start, 3)
+        })
+        return result
+
     def save_artifacts(self):
         """아티팩트 저장"""
         artifacts_dir = Path("artifacts")
@@ -234,29 +452,112 @@ class PipelineRunner:
         
         logger.info(f"아티팩트 저장 완료: {artifacts_dir}")
     
+    def pipeline_steps(self) -> List[Step]:
+        """파이프라인 단계 DAG 선언 (입력/출력 테이블 기준)"""
+        emb_table = "emb_view_t_vertex" if self.config.mode == "vertex" else "emb_view_t"
+        steps = [
+            # P0: 아이도포턴시
+            Step("add_content_hash", self.add_content_hash,
+                 inputs=["raw_texts"], outputs=["raw_texts"]),
+            # P0: ORI 파라미터 외부화
+            Step("create_ori_params", self.create_ori_params_table,
+                 outputs=["ori_params"]),
+        ]
+        # P1: 증분 임베딩
+        if self.config.enable_incremental:
+            steps.append(Step("incremental_text_embedding", self.incremental_text_embedding,
+                              inputs=["raw_texts", emb_table],
+                              outputs=["emb_text_new", emb_table] +
+                                      (["stitch_changelog"] if self.config.mode == "vertex" else [])))
+            # 증분 스티칭 (Vertex AI 기반 emb_stitched)
+            if self.config.mode == "vertex":
+                steps.append(Step("incremental_struct_normalization", self.incremental_struct_normalization,
+                                  inputs=["feat_struct", "feat_struct_vec", "feat_struct_stats"],
+                                  outputs=["feat_struct_vec", "feat_struct_stats", "stitch_changelog"]))
+                steps.append(Step("incremental_stitch", self.incremental_stitch,
+                                  inputs=["stitch_changelog", emb_table, "feat_struct_vec", "raw_texts"],
+                                  outputs=["emb_stitched", "stitch_changelog"]))
+        # P2: 평가 하니스 (뷰 정의만 생성하므로 데이터 단계와 독립)
+        steps.append(Step("create_evaluation_harness", self.create_evaluation_harness,
+                          outputs=["eval_metrics"]))
+        return steps
+    
+    @property
+    def budget_enabled(self) -> bool:
+        return self.config.max_bytes_per_run is not None or self.config.max_slot_ms_per_run is not None
+    
+    def plan(self) -> CostPlan:
+        """모든 단계를 실행 없이 드라이런해 예상 비용 수집 (DAG 선언 순서)"""
+        plan = CostPlan(max_bytes=self.config.max_bytes_per_run, max_slot_ms=self.config.max_slot_ms_per_run,
+                        price_per_tib_usd=self.config.price_per_tib_usd, strict=self.config.budget_strict)
+        self._plan = plan
+        try:
+            for step in self.pipeline_steps():
+                step.fn()
+        finally:
+            self._plan = None
+        
+        rates = load_slot_rates(str(Path("artifacts") / "cost_report.csv"))
+        for estimate in plan.estimates:
+            if estimate.bytes_processed is not None and estimate.step in rates:
+                estimate.slot_ms = estimate.bytes_processed * rates[estimate.step]
+        
+        artifacts_dir = Path("artifacts")
+        artifacts_dir.mkdir(exist_ok=True)
+        with open(artifacts_dir / "cost_plan.json", "w") as f:
+            json.dump(plan.to_dict(), f, indent=2, ensure_ascii=False)
+        self.log_step("cost_plan", "PLAN", {k: v for k, v in plan.to_dict().items() if k != "queries"})
+        return plan
+    
     def run_pipeline(self):
         """전체 파이프라인 실행"""
-        logger.info(f"파이프라인 시작: {self.config.mode} 모드, 드라이런: {self.config.dry_run}")
+        logger.info(f"파이프라인 시작: {self.config.mode} 모드, 드라이런: {self.config.dry_run}, 실행 ID: {self.run_id}")
         
         try:
-            # P0: 아이도포턴시
-            self.add_content_hash()
-            
-            # P0: ORI 파라미터 외부화
-            self.create_ori_params_table()
-            
-            # P1: 증분 임베딩
-            if self.config.enable_incremental:
-                self.incremental_text_embedding()
-            
-            # P2: 평가 하니스
-            self.create_evaluation_harness()
+            with self.tracer.span("pipeline", kind="pipeline", mode=self.config.mode, dry_run=self.config.dry_run):
+                self._run_pipeline()
+        finally:
+            self._close_loop()
+            self.tracer.close()
+    
+    def _run_pipeline(self):
+        try:
+            if self.config.mode == "local":
+                with self.tracer.span("local_ori", kind="step"):
+                    self.run_local_ori()
+                self.save_artifacts()
+                logger.info("파이프라인 완료!")
+                return
+
+            # 드라이런은 비용 계획만 수집, 예산이 설정되면 실행 전에 점검
+            if self.config.dry_run or self.budget_enabled:
+                plan = self.plan()
+                logger.info("예상 비용:\n" + plan.render())
+                if self.config.dry_run:
+                    self.save_artifacts()
+                    logger.info("드라이런 완료!")
+                    return
+                if not plan.within_budget:
+                    raise BudgetExceededError(plan)
+
+            # 독립 단계는 병렬 실행, 의존 단계는 선행 단계 완료 후 실행
+            # (워커 스레드에는 컨텍스트가 전파되지 않으므로 부모 스팬을 직접 넘긴다)
+            root = current_span()
+            steps = [Step(s.name, self.tracer.wrap(s.name, s.fn, kind="step", parent=root), s.inputs, s.outputs)
+                     for s in self.pipeline_steps()]
+            report = StepScheduler(steps, max_workers=self.config.max_parallel_steps).run()
+            self.log_step("schedule", "STATS", report.to_dict())
             
             # 아티팩트 저장
             self.save_artifacts()
             
             logger.info("파이프라인 완료!")
             
+        except StepFailedError as e:
+            self.log_step("schedule", "STATS", e.report.to_dict())
+            logger.error(f"파이프라인 실패: {e}")
+            self.save_artifacts()
+            raise
         except Exception as e:
             logger.error(f"파이프라인 실패: {e}")
             self.save_artifacts()
@@ -305,7 +606,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Descent Pipeline - 우승 레벨")
     parser.add_argument("--config", default="config.yaml", help="설정 파일 경로")
     parser.add_argument("--dry-run", action="store_true", help="드라이런 모드")
-    parser.add_argument("--mode", choices=["vertex", "oss", "native"], help="실행 모드")
+    parser.add_argument("--mode", choices=["vertex", "oss", "native", "local"], help="실행 모드")
     
     args = parser.parse_args()
     
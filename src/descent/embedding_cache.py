@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Descent Embedding Cache
+(콘텐츠 지문, 임베딩 모델, 차원) 키 기반 영구 임베딩 캐시 (용량 제한 LRU)
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from farm_fingerprint import farm_fingerprint
+
+logger = logging.getLogger(__name__)
+
+def content_fingerprint(text: str) -> int:
+    """본문 지문 (부호 있는 INT64)
+
+    BigQuery FARM_FINGERPRINT(body)와 같은 값이므로 raw_texts.content_hash와
+    로컬에서 계산한 지문이 같은 캐시 키가 된다.
+    """
+    return farm_fingerprint(text.encode("utf-8"))
+
+class EmbeddingCache:
+    """SQLite 기반 임베딩 캐시
+
+    값은 float32 바이트로 저장하고, last_access 기준 LRU로 max_bytes를
+    넘는 항목을 제거한다. 조회/저장은 스레드 간 공유 가능하다.
+    """
+
+    def __init__(self, path: str = "artifacts/embedding_cache/cache.sqlite",
+                 max_bytes: int = 2 * 1024 ** 3):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                fingerprint INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (fingerprint, model, dim)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, fingerprints: Iterable[int], model: str, dim: int) -> Dict[int, np.ndarray]:
+        """지문 목록 조회 -> {지문: 벡터} (히트만 포함)"""
+        keys = list(dict.fromkeys(int(fp) for fp in fingerprints))
+        found: Dict[int, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT fingerprint, vector FROM embeddings "
+                    f"WHERE model = ? AND dim = ? AND fingerprint IN ({marks})",
+                    [model, dim, *chunk]
+                ).fetchall()
+                for fp, blob in rows:
+                    found[fp] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE fingerprint = ? AND model = ? AND dim = ?",
+                        [(now, fp, model, dim) for fp, _ in rows]
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[int, np.ndarray]], model: str, dim: int):
+        """(지문, 벡터) 저장 후 용량 초과 시 LRU 제거"""
+        now = time.time()
+        rows = [(int(fp), model, dim, np.asarray(vec, dtype=np.float32).tobytes(), now) for fp, vec in items]
+        if not rows:
+            return
+        with self._lock:
+            for fp, _, _, blob, _ in rows:
+                old = self._conn.execute(
+                    "SELECT LENGTH(vector) FROM embeddings WHERE fingerprint = ? AND model = ? AND dim = ?",
+                    (fp, model, dim)
+                ).fetchone()
+                self._size += len(blob) - (old[0] if old else 0)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (fingerprint, model, dim, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 항목 제거"""
+        while self._size > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT fingerprint, model, dim, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 1000"
+            ).fetchall()
+            if not victims:
+                self._size = 0
+                break
+            removed = []
+            for fp, model, dim, size in victims:
+                if self._size <= self.max_bytes:
+                    break
+                removed.append((fp, model, dim))
+                self._size -= size
+            self._conn.executemany(
+                "DELETE FROM embeddings WHERE fingerprint = ? AND model = ? AND dim = ?", removed
+            )
+            self.evictions += len(removed)
+
+    def stats(self) -> Dict[str, float]:
+        """히트/미스 카운터 (run_log 기록용)"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Descent Embedding Client
+크기·토큰 제한 배치 + 동시 실행 임베딩 클라이언트 (백엔드 교체 가능)
+"""
+
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, content_fingerprint
+from tracing import NULL_TRACER, Tracer, current_span
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBackend(Protocol):
+    """임베딩 백엔드 인터페이스"""
+    name: str
+    dimension: int
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """텍스트 배치 -> 벡터 목록 (입력 순서 유지)"""
+        ...
+
+class VertexEmbeddingBackend:
+    """Vertex AI 텍스트 임베딩 백엔드 (text-embedding-005 등)"""
+
+    def __init__(self, project_id: str, model: str = "text-embedding-005",
+                 location: str = "us-central1", dimension: int = 768):
+        import vertexai
+        from vertexai.language_models import TextEmbeddingModel
+
+        vertexai.init(project=project_id, location=location)
+        self._model = TextEmbeddingModel.from_pretrained(model)
+        self.name = model
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [e.values for e in self._model.get_embeddings(texts)]
+
+class HashEmbeddingBackend:
+    """결정적 로컬 대체 백엔드 (테스트·오프라인용)
+
+    텍스트의 SHA-256을 시드로 단위 벡터를 생성하므로 같은 텍스트는
+    항상 같은 벡터가 된다. fail_on 에 포함된 텍스트는 오류를 낸다.
+    """
+
+    def __init__(self, dimension: int = 768, name: str = "local-hash",
+                 fail_on: Optional[Sequence[str]] = None):
+        self.name = name
+        self.dimension = dimension
+        self.fail_on = set(fail_on or [])
+        self.calls = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            if text in self.fail_on:
+                raise RuntimeError(f"임베딩 실패 (테스트): {text[:30]}")
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dimension)
+            vectors.append((vec / np.linalg.norm(vec)).tolist())
+        return vectors
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 근사 (문자 4개당 1토큰)"""
+    return len(text) // 4 + 1
+
+def pack_batches(texts: Sequence[str], max_batch_size: int = 250, max_batch_tokens: int = 20000,
+                 token_estimator: Callable[[str], int] = estimate_tokens) -> List[List[int]]:
+    """입력 순서대로 크기·토큰 제한을 넘지 않는 배치로 묶기 (인덱스 목록)"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = token_estimator(text)
+        if current and (len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+@dataclass
+class EmbeddingFailure:
+    """임베딩 실패 항목"""
+    index: int
+    text: str
+    error: str
+
+@dataclass
+class EmbeddingResult:
+    """임베딩 결과 - 실패 행은 NaN이며 failures에 명시된다"""
+    vectors: np.ndarray
+    failures: List[EmbeddingFailure] = field(default_factory=list)
+    batches: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+
+    @property
+    def ok(self) -> np.ndarray:
+        """성공 행 마스크"""
+        return ~np.isnan(self.vectors).any(axis=1)
+
+class BatchEmbeddingClient:
+    """배치 임베딩 클라이언트
+
+    텍스트를 크기·토큰 제한 배치로 묶고, 최대 max_in_flight 개의 배치를
+    스레드 풀에서 동시에 실행한다. 실패한 배치는 그 배치만 재시도하고,
+    끝내 실패하면 배치를 반씩 나눠(재시도·백오프 없이 한 번씩, 최대
+    max_isolation_calls 호출) 실패 항목을 격리한다. 차원이 맞지 않는
+    벡터는 그 행만 실패로 기록한다.
+    cache가 주어지면 (지문, 모델, 차원) 히트는 모델을 호출하지 않는다.
+    tracer가 주어지면 캐시 조회와 배치마다 스팬을 남긴다.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, max_batch_size: int = 250,
+                 max_batch_tokens: int = 20000, max_in_flight: int = 4,
+                 max_retries: int = 3, retry_delay: float = 1.0, max_isolation_calls: int = 32,
+                 cache: Optional[EmbeddingCache] = None, tracer: Tracer = NULL_TRACER):
+        self.backend = backend
+        self.cache = cache
+        self.tracer = tracer
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_isolation_calls = max_isolation_calls
+
+    def _call_with_retry(self, texts: List[str]):
+        """백엔드 호출 (지수 백오프 재시도) -> (벡터, 재시도 횟수)"""
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                vectors = self.backend.embed(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"응답 개수 불일치: {len(vectors)} != {len(texts)}")
+                return vectors, attempt
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _run_batch(self, indices: List[int], texts: Sequence[str], parent=None):
+        """배치 실행 -> ([(인덱스, 벡터 또는 None, 오류)], 재시도 횟수)"""
+        with self.tracer.span("embed_batch", kind="embed_batch", parent=parent) as span:
+            rows, retries = self._run_batch_untraced(indices, texts)
+            span.add(rows=len(indices), retries=retries)
+            return rows, retries
+
+    def _run_batch_untraced(self, indices: List[int], texts: Sequence[str]):
+        batch = [texts[i] for i in indices]
+        try:
+            vectors, retries = self._call_with_retry(batch)
+            return self._check_rows(indices, vectors), retries
+        except Exception as e:
+            if len(indices) == 1:
+                return [(indices[0], None, str(e))], self.max_retries
+            logger.warning(f"배치 실패 ({len(indices)}건), 분할 격리: {e}")
+            error = str(e)
+
+        # 텍스트마다 재시도하면 호출·백오프가 배치 크기배로 늘어나므로 이분 분할로 한 번씩만 호출
+        results: List[tuple] = []
+        budget = [self.max_isolation_calls]
+        self._isolate(indices, texts, error, results, budget)
+        return results, self.max_retries + self.max_isolation_calls - budget[0]
+
+    def _isolate(self, indices: List[int], texts: Sequence[str], error: str, results: List[tuple],
+                 budget: List[int]):
+        """실패 배치를 반씩 나눠 한 번씩 호출 - 호출 한도를 넘은 나머지는 배치 오류로 실패 처리"""
+        half = len(indices) // 2
+        for part in (indices[:half], indices[half:]):
+            if budget[0] <= 0:
+                results.extend((i, None, f"격리 호출 한도 초과: {error}") for i in part)
+                continue
+            budget[0] -= 1
+            try:
+                vectors = self.backend.embed([texts[i] for i in part])
+                if len(vectors) != len(part):
+                    raise ValueError(f"응답 개수 불일치: {len(vectors)} != {len(part)}")
+            except Exception as e:
+                if len(part) == 1:
+                    results.append((part[0], None, str(e)))
+                else:
+                    self._isolate(part, texts, str(e), results, budget)
+                continue
+            results.extend(self._check_rows(part, vectors))
+
+    def _check_rows(self, indices: List[int], vectors) -> List[tuple]:
+        """행별 차원 검증 -> [(인덱스, 벡터 또는 None, 오류)]"""
+        dim = self.backend.dimension
+        rows = []
+        for i, vector in zip(indices, vectors):
+            if len(vector) != dim:
+                rows.append((i, None, f"차원 불일치: {len(vector)} != {dim}"))
+            else:
+                rows.append((i, vector, None))
+        return rows
+
+    def embed(self, texts: Sequence[str], fingerprints: Optional[Sequence[int]] = None) -> EmbeddingResult:
+        """텍스트 목록 임베딩 (입력 순서 유지)
+
+        fingerprints는 raw_texts.content_hash 등 미리 계산된 지문이며,
+        없으면 content_fingerprint로 계산한다. 같은 지문은 한 번만 임베딩한다.
+        """
+        texts = list(texts)
+        if fingerprints is None:
+            fingerprints = [None] * len(texts)
+        fingerprints = [content_fingerprint(t) if fp is None else int(fp)
+                        for t, fp in zip(texts, fingerprints)]
+        model, dim = self.backend.name, self.backend.dimension
+
+        with self.tracer.span("cache_lookup", kind="cache_lookup") as span:
+            cached = self.cache.get_many(fingerprints, model, dim) if self.cache is not None else {}
+            span.add(rows=len(fingerprints), cache_hits=len(cached))
+
+        # 캐시 미스 중 지문별 첫 항목만 모델 호출
+        first_by_fp: Dict[int, int] = {}
+        for i, fp in enumerate(fingerprints):
+            if fp not in cached and fp not in first_by_fp:
+                first_by_fp[fp] = i
+        unique = list(first_by_fp.values())
+
+        result = self._embed_uncached([texts[i] for i in unique])
+        errors = {fingerprints[unique[f.index]]: f.error for f in result.failures}
+        result.failures = [EmbeddingFailure(i, texts[i], errors[fp])
+                           for i, fp in enumerate(fingerprints) if fp in errors]
+
+        out = np.full((len(texts), dim), np.nan, dtype=np.float32)
+        fresh = {fingerprints[i]: result.vectors[j] for j, i in enumerate(unique)}
+        for i, fp in enumerate(fingerprints):
+            out[i] = cached[fp] if fp in cached else fresh[fp]
+
+        if self.cache is not None:
+            self.cache.put_many(((fp, vec) for fp, vec in fresh.items() if not np.isnan(vec).any()), model, dim)
+
+        result.vectors = out
+        result.cache_hits = sum(1 for fp in fingerprints if fp in cached)
+        return result
+
+    def _embed_uncached(self, texts: List[str]) -> EmbeddingResult:
+        """캐시를 거치지 않는 배치 임베딩"""
+        out = np.full((len(texts), self.backend.dimension), np.nan, dtype=np.float32)
+        result = EmbeddingResult(vectors=out)
+        batches = pack_batches(texts, self.max_batch_size, self.max_batch_tokens)
+        result.batches = len(batches)
+
+        pending = iter(batches)
+        parent = current_span()  # 워커 스레드에는 컨텍스트가 전파되지 않음
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            in_flight = set()
+            while True:
+                # 진행 중 배치 수를 max_in_flight 이하로 유지
+                while len(in_flight) < self.max_in_flight:
+                    indices = next(pending, None)
+                    if indices is None:
+                        break
+                    in_flight.add(pool.submit(self._run_batch, indices, texts, parent))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows, retries = future.result()
+                    result.retries += retries
+                    for i, vector, error in rows:
+                        if error is None:
+                            out[i] = vector
+                        else:
+                            result.failures.append(EmbeddingFailure(i, texts[i], error))
+
+        result.failures.sort(key=lambda f: f.index)
+        if result.failures:
+            logger.error(f"임베딩 실패 {len(result.failures)}/{len(texts)}건")
+        logger.info(f"임베딩 완료: {len(texts)}건, 배치 {result.batches}개, 재시도 {result.retries}회")
+        return result
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Descent Embedding Store
+numpy.memmap으로 제로 카피 로드되는 바이너리 임베딩 저장소
+"""
+
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "float16")
+
+class EmbeddingStore:
+    """바이너리 임베딩 저장소
+
+    디렉터리 구성:
+      header.json  - 버전, 모델, 차원, dtype, 행 수, ids.txt 유효 바이트 수
+      vectors.bin  - (행 수, 차원) 연속 행렬 (C 순서, 헤더 없음)
+      ids.txt      - 행 순서대로 한 줄에 id 하나
+
+    header.json의 count가 유효 행 수의 기준이므로, append 도중 중단되어도
+    마지막으로 기록된 count까지는 항상 일관된 상태로 열린다.
+    """
+
+    def __init__(self, path: str, header: Dict, mode: str = "r"):
+        self.path = Path(path)
+        self.header = header
+        self.mode = mode
+        self._ids: Optional[List[str]] = None
+        self._index: Optional[Dict[str, int]] = None
+
+    @property
+    def dim(self) -> int:
+        return self.header["dim"]
+
+    @property
+    def model(self) -> str:
+        return self.header["model"]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self.header["dtype"])
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    @classmethod
+    def create(cls, path: str, dim: int, model: str, dtype: str = "float32",
+               overwrite: bool = False) -> "EmbeddingStore":
+        """빈 저장소 생성"""
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {dtype} (지원: {SUPPORTED_DTYPES})")
+        root = Path(path)
+        if (root / "header.json").exists() and not overwrite:
+            raise FileExistsError(f"저장소가 이미 존재합니다: {root}")
+        root.mkdir(parents=True, exist_ok=True)
+        (root / "vectors.bin").write_bytes(b"")
+        (root / "ids.txt").write_text("", encoding="utf-8")
+        header = {"version": STORE_VERSION, "model": model, "dim": int(dim), "dtype": dtype,
+                  "count": 0, "ids_bytes": 0}
+        store = cls(path, header, mode="a")
+        store._write_header()
+        return store
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r") -> "EmbeddingStore":
+        """저장소 열기 (mode: r=읽기 전용, r+=행 수정, a=추가)"""
+        with open(Path(path) / "header.json", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != STORE_VERSION:
+            raise ValueError(f"지원하지 않는 저장소 버전: {header.get('version')}")
+        return cls(path, header, mode=mode)
+
+    def _write_header(self):
+        tmp = self.path / "header.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.header, f, indent=2)
+        tmp.replace(self.path / "header.json")
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """(행 수, 차원) 행렬 - memmap이므로 파일을 복사하지 않는다"""
+        if len(self) == 0:
+            return np.empty((0, self.dim), dtype=self.dtype)
+        mode = "r+" if self.mode == "r+" else "r"
+        return np.memmap(self.path / "vectors.bin", dtype=self.dtype, mode=mode, shape=(len(self), self.dim))
+
+    @property
+    def ids(self) -> List[str]:
+        """행 순서 id 목록 (최초 접근 시 로드)"""
+        if self._ids is None:
+            with open(self.path / "ids.txt", encoding="utf-8") as f:
+                self._ids = [line.rstrip("\n") for _, line in zip(range(len(self)), f)]
+        return self._ids
+
+    def index_of(self, key: str) -> int:
+        """id -> 행 번호"""
+        if self._index is None:
+            self._index = {k: i for i, k in enumerate(self.ids)}
+        return self._index[key]
+
+    def get(self, keys: Sequence[str]) -> np.ndarray:
+        """id 목록에 해당하는 행 (복사본)"""
+        rows = [self.index_of(k) for k in keys]
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def append(self, ids: Sequence[str], vectors: np.ndarray):
+        """행 추가 (벡터 -> id -> 헤더 순으로 기록)"""
+        if self.mode != "a":
+            raise PermissionError("append는 mode='a'로 연 저장소에서만 가능합니다")
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"차원 불일치: {vectors.shape} (기대: (n, {self.dim}))")
+        if len(ids) != len(vectors):
+            raise ValueError(f"id 수({len(ids)})와 벡터 수({len(vectors)})가 다릅니다")
+        for key in ids:
+            if "\n" in key:
+                raise ValueError(f"id에 줄바꿈을 포함할 수 없습니다: {key!r}")
+
+        # 이전 append가 중단되어 남은 꼬리 데이터는 잘라낸다 (벡터, id 모두)
+        row_bytes = self.dim * self.dtype.itemsize
+        with open(self.path / "vectors.bin", "r+b") as f:
+            f.truncate(len(self) * row_bytes)
+            f.seek(0, 2)
+            f.write(vectors.tobytes())
+        encoded = "".join(f"{key}\n" for key in ids).encode("utf-8")
+        with open(self.path / "ids.txt", "r+b") as f:
+            f.truncate(self.header["ids_bytes"])
+            f.seek(0, 2)
+            f.write(encoded)
+        self.header["ids_bytes"] += len(encoded)
+        if self._ids is not None:
+            self._ids.extend(ids)
+        if self._index is not None:
+            base = len(self)
+            self._index.update((k, base + i) for i, k in enumerate(ids))
+        self.header["count"] = len(self) + len(ids)
+        self._write_header()
+
+    def update(self, keys: Sequence[str], vectors: np.ndarray):
+        """기존 행 덮어쓰기 (mode='r+')"""
+        if self.mode != "r+":
+            raise PermissionError("update는 mode='r+'로 연 저장소에서만 가능합니다")
+        rows = [self.index_of(k) for k in keys]
+        matrix = self.vectors
+        matrix[rows] = np.asarray(vectors, dtype=self.dtype)
+        matrix.flush()
+
+def _append_chunks(store: EmbeddingStore, rows: Iterator[Tuple[str, List[float]]], chunk_rows: int) -> int:
+    ids, vecs, total = [], [], 0
+    for key, vec in rows:
+        ids.append(key)
+        vecs.append(vec)
+        if len(ids) >= chunk_rows:
+            store.append(ids, np.asarray(vecs, dtype=np.float32))
+            total += len(ids)
+            ids, vecs = [], []
+    if ids:
+        store.append(ids, np.asarray(vecs, dtype=np.float32))
+        total += len(ids)
+    return total
+
+def convert_vector_csv(csv_path: str, store_path: str, model: str, id_column: str = "id",
+                       vector_column: str = "embedding", dtype: str = "float32",
+                       chunk_rows: int = 65536) -> EmbeddingStore:
+    """'[0.1, 0.2, ...]' 문자열 벡터 CSV(text_embeddings.csv 등) -> 저장소"""
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = ((row[id_column], json.loads(row[vector_column])) for row in reader)
+        first = next(rows, None)
+        if first is None:
+            raise ValueError(f"빈 CSV 파일입니다: {csv_path}")
+        store = EmbeddingStore.create(store_path, dim=len(first[1]), model=model, dtype=dtype, overwrite=True)
+        total = _append_chunks(store, _chain(first, rows), chunk_rows)
+    logger.info(f"CSV 변환 완료: {csv_path} -> {store_path} ({total}건)")
+    return store
+
+def convert_dim_csv(csv_path: str, store_path: str, model: str, id_column: Optional[str] = "id",
+                    dtype: str = "float32", chunk_rows: int = 65536) -> EmbeddingStore:
+    """dim_i 컬럼 CSV(save_embeddings_to_csv 출력) -> 저장소
+
+    id 컬럼이 없으면 행 번호를 id로 사용한다.
+    """
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        dim_cols = [i for i, name in enumerate(header) if name.startswith("dim_")]
+        id_pos = header.index(id_column) if id_column in header else None
+        store = EmbeddingStore.create(store_path, dim=len(dim_cols), model=model, dtype=dtype, overwrite=True)
+        rows = ((row[id_pos] if id_pos is not None else str(n), [float(row[i]) for i in dim_cols])
+                for n, row in enumerate(reader))
+        total = _append_chunks(store, rows, chunk_rows)
+    logger.info(f"CSV 변환 완료: {csv_path} -> {store_path} ({total}건)")
+    return store
+
+def _chain(first, rest):
+    yield first
+    yield from rest
@@ -7,22 +7,139 @@ P2: 품질·검증 - 자동 평가 시스템
 import os
 import json
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 from pathlib import Path
 import yaml
-from google.cloud import bigquery
 import numpy as np
-from sklearn.metrics import precision_recall_fscore_support, roc_auc_score, average_precision_score
+from ranking_metrics import RankingMetrics, compute_ranking_metrics, metrics_from_ranked_labels
+from query_cache import QueryResultCache, cached_query
+from arrow_reader import BatchReader, BigQueryStorageReader, ParquetDirectoryReader
+
+REPORT_VIEWS = {"text": "report_ori", "multimodal": "report_ori_mm", "native": "report_ori"}
+LABEL_FILES = ("labels.parquet", "labels.csv", "labels")  # 로컬 라벨 탐색 순서 (labels/는 synth 샤드 디렉터리)
+
+def find_local_labels(directory: str) -> Optional[Path]:
+    """디렉터리의 로컬 라벨 파일 (labels.parquet / labels.csv / labels/part-*)"""
+    for name in LABEL_FILES:
+        path = Path(directory) / name
+        if path.exists():
+            return path
+    return None
+
+def read_local_labels(path: str) -> pd.DataFrame:
+    """로컬 라벨(id, y) 로드 - Parquet/CSV 파일 또는 part-* 샤드 디렉터리"""
+    path = Path(path)
+    files = sorted(path.glob("part-*")) if path.is_dir() else [path]
+    if not files:
+        raise FileNotFoundError(f"라벨 파일이 없습니다: {path}")
+    frames = [pd.read_parquet(f, columns=["id", "y"]) if f.suffix == ".parquet"
+              else pd.read_csv(f, usecols=["id", "y"], dtype={"id": str}) for f in files]
+    return pd.concat(frames, ignore_index=True)
+
+class StreamingModeMetrics:
+    """Arrow 배치를 받아 evaluate_mode와 같은 지표를 증분 계산
+
+    행 전체 대신 ori 점수(float64)와 라벨이 있는 행의 위치만 보관한다.
+    분류 지표는 라벨 행의 혼동 행렬 카운트로 누적한다.
+    """
+
+    def __init__(self, labels: Dict[str, float]):
+        self.labels = labels
+        self.total = 0
+        self.tp = self.fp = self.fn = self.correct = self.labeled = 0
+        self._ori: List[np.ndarray] = []
+        self._label_pos: List[int] = []
+        self._label_y: List[float] = []
+
+    def update(self, batch) -> None:
+        """id, ori, predict 컬럼을 가진 RecordBatch(또는 DataFrame) 누적"""
+        ids = batch.column("id").to_pylist() if hasattr(batch, "column") else batch["id"].tolist()
+        ori = np.asarray(batch.column("ori").to_numpy(zero_copy_only=False) if hasattr(batch, "column")
+                         else batch["ori"].to_numpy(), dtype=np.float64)
+        predict = (batch.column("predict").to_pylist() if hasattr(batch, "column")
+                   else batch["predict"].tolist())
+        for i, id_ in enumerate(ids):
+            y = self.labels.get(id_)
+            if y is None or np.isnan(y):
+                continue
+            p = predict[i]
+            self.labeled += 1
+            self._label_pos.append(self.total + i)
+            self._label_y.append(y)
+            self.correct += int(p == y)
+            self.tp += int(p == 1 and y == 1)
+            self.fp += int(p == 1 and y != 1)
+            self.fn += int(p != 1 and y == 1)
+        self._ori.append(ori)
+        self.total += len(ids)
+
+    def result(self, mode: str, k_values: List[int] = (1, 3, 5, 10)) -> Dict[str, Any]:
+        if self.labeled == 0:
+            return {"error": "No valid labels found"}
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+        ori = np.concatenate(self._ori) if self._ori else np.empty(0)
+        # 점수 내림차순 위치에 라벨을 배치 (나머지는 NaN) - rank_and_align과 같은 순서
+        order = np.argsort(-ori, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        ranked = np.full(len(ori), np.nan)
+        ranked[rank[np.asarray(self._label_pos, dtype=np.int64)]] = self._label_y
+        ranking = metrics_from_ranked_labels(ranked, list(k_values), mrr_label=1.0)
+
+        return {
+            'mode': mode,
+            'total_cases': self.total,
+            'labeled_cases': self.labeled,
+            'accuracy': self.correct / self.labeled,
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+            'precision_at_k': ranking.precision_at_k,
+            'ndcg_at_k': ranking.ndcg_at_k,
+            'recall_at_k': ranking.recall_at_k,
+            'mrr': ranking.mrr,
+            'average_precision': ranking.average_precision,
+            'ori_stats': {
+                'mean': float(np.nanmean(ori)),
+                'std': float(np.nanstd(ori, ddof=1)),
+                'min': float(np.nanmin(ori)),
+                'max': float(np.nanmax(ori)),
+                'median': float(np.nanmedian(ori)),
+            }
+        }
 
 class DescentEvaluator:
     """Descent 시스템 평가기"""
     
-    def __init__(self, project_id: str, dataset_id: str):
+    def __init__(self, project_id: str, dataset_id: str, cache: QueryResultCache = None,
+                 stream: bool = False, reader_factory: Optional[Callable[[str], BatchReader]] = None,
+                 max_streams: int = 4, labels_path: Optional[str] = None):
         self.project_id = project_id
         self.dataset_id = dataset_id
-        self.client = bigquery.Client(project=project_id)
+        self._client = None  # 첫 조회 때 생성
+        self.cache = cache  # None이면 항상 BigQuery 조회
+        # stream=True면 report 뷰를 Arrow 배치로 병렬 수신해 증분 평가 (reader_factory로 교체 가능)
+        self.stream = stream or reader_factory is not None
+        self.reader_factory = reader_factory
+        self.max_streams = max_streams
+        self.labels_path = labels_path  # 주어지면 BigQuery 대신 로컬 라벨 파일 사용
         self.results = {}
     
+    @property
+    def client(self):
+        """BigQuery 클라이언트 (첫 접근 시 생성)"""
+        if self._client is None:
+            from clients import bigquery_client
+            self._client = bigquery_client(self.project_id)
+        return self._client
+    
+    def _query(self, query: str) -> pd.DataFrame:
+        """쿼리 실행 (원천 테이블이 바뀌지 않았으면 디스크 캐시 결과 사용)"""
+        return cached_query(self.client, query, self.cache)
+    
     def load_data(self, mode: str) -> pd.DataFrame:
         """모드별 데이터 로드"""
         if mode == "text":
@@ -43,10 +160,29 @@ class DescentEvaluator:
         else:
             raise ValueError(f"Unknown mode: {mode}")
         
-        return self.client.query(query).to_dataframe()
+        return self._query(query)
+    
+    def batch_reader(self, mode: str) -> BatchReader:
+        """모드별 평가 컬럼(id, ori, predict) Arrow 배치 리더"""
+        if mode not in REPORT_VIEWS:
+            raise ValueError(f"Unknown mode: {mode}")
+        if self.reader_factory is not None:
+            return self.reader_factory(mode)
+        # 뷰는 Storage Read API로 직접 읽을 수 없어 쿼리 결과 테이블을 스트림으로 읽는다
+        query = f"SELECT id, ori, predict FROM `{self.project_id}.{self.dataset_id}.{REPORT_VIEWS[mode]}`"
+        return BigQueryStorageReader.from_query(self.client, query, max_streams=self.max_streams)
+    
+    def evaluate_mode_streaming(self, mode: str) -> Dict[str, Any]:
+        """Arrow 배치 스트림으로 모드 평가 (테이블 전체를 메모리에 올리지 않음)"""
+        metrics = StreamingModeMetrics(self._label_map(self.load_labels()))
+        for batch in self.batch_reader(mode).iter_batches():
+            metrics.update(batch)
+        return metrics.result(mode)
     
     def load_labels(self) -> pd.DataFrame:
-        """라벨 데이터 로드"""
+        """라벨 데이터 로드 (labels_path가 있으면 로컬 파일)"""
+        if self.labels_path is not None:
+            return read_local_labels(self.labels_path)
         query = f"""
         SELECT 'A100' id, 1 y UNION ALL
         SELECT 'A200', 1 UNION ALL
@@ -55,73 +191,36 @@ class DescentEvaluator:
         SELECT 'B200', 0 UNION ALL
         SELECT 'C100', 0
         """
-        return self.client.query(query).to_dataframe()
+        return self._query(query)
+    
+    @staticmethod
+    def _label_map(labels: pd.DataFrame) -> Dict[str, float]:
+        """라벨 DataFrame -> {id: y}"""
+        return dict(zip(labels['id'], labels['y'].astype(float)))
+    
+    def calculate_ranking_metrics(self, df: pd.DataFrame, labels: pd.DataFrame,
+                                  k_values: List[int] = (1, 3, 5, 10)) -> RankingMetrics:
+        """ORI 기준 정렬 1회로 모든 K의 순위 지표 계산"""
+        return compute_ranking_metrics(df['id'].tolist(), df['ori'].to_numpy(dtype=float),
+                                       self._label_map(labels), k_values)
     
     def calculate_precision_at_k(self, df: pd.DataFrame, labels: pd.DataFrame, k_values: List[int]) -> Dict[int, float]:
         """Precision@K 계산"""
-        # ORI 점수 기준으로 정렬
-        df_sorted = df.sort_values('ori', ascending=False)
-        
-        precision_at_k = {}
-        for k in k_values:
-            top_k = df_sorted.head(k)
-            merged = top_k.merge(labels, on='id', how='left')
-            
-            # 라벨이 있는 경우만 계산
-            valid_labels = merged.dropna(subset=['y'])
-            if len(valid_labels) > 0:
-                precision = valid_labels['y'].mean()
-                precision_at_k[k] = precision
-            else:
-                precision_at_k[k] = 0.0
-        
-        return precision_at_k
+        return self.calculate_ranking_metrics(df, labels, k_values).precision_at_k
     
     def calculate_ndcg(self, df: pd.DataFrame, labels: pd.DataFrame, k: int = 10) -> float:
         """nDCG@K 계산"""
-        df_sorted = df.sort_values('ori', ascending=False)
-        top_k = df_sorted.head(k)
-        merged = top_k.merge(labels, on='id', how='left')
-        
-        # 라벨이 있는 경우만 계산
-        valid_labels = merged.dropna(subset=['y'])
-        if len(valid_labels) == 0:
-            return 0.0
-        
-        # DCG 계산
-        dcg = 0.0
-        for i, (_, row) in enumerate(valid_labels.iterrows()):
-            dcg += (2**row['y'] - 1) / np.log2(i + 2)
-        
-        # IDCG 계산 (이상적인 순서)
-        ideal_order = valid_labels.sort_values('y', ascending=False)
-        idcg = 0.0
-        for i, (_, row) in enumerate(ideal_order.iterrows()):
-            idcg += (2**row['y'] - 1) / np.log2(i + 2)
-        
-        return dcg / idcg if idcg > 0 else 0.0
+        return self.calculate_ranking_metrics(df, labels, [k]).ndcg_at_k[k]
     
     def calculate_mrr(self, df: pd.DataFrame, labels: pd.DataFrame) -> float:
         """MRR (Mean Reciprocal Rank) 계산"""
-        df_sorted = df.sort_values('ori', ascending=False)
-        merged = df_sorted.merge(labels, on='id', how='left')
-        
-        # 라벨이 있는 경우만 계산
-        valid_labels = merged.dropna(subset=['y'])
-        if len(valid_labels) == 0:
-            return 0.0
-        
-        # 첫 번째 관련 문서의 순위 찾기
-        relevant_docs = valid_labels[valid_labels['y'] == 1]
-        if len(relevant_docs) == 0:
-            return 0.0
-        
-        first_relevant_rank = relevant_docs.index[0] + 1  # 1-based ranking
-        return 1.0 / first_relevant_rank
+        return self.calculate_ranking_metrics(df, labels, []).mrr
     
     def evaluate_mode(self, mode: str) -> Dict[str, Any]:
         """특정 모드 평가"""
         print(f"📊 {mode} 모드 평가 중...")
+        if self.stream:
+            return self.evaluate_mode_streaming(mode)
         
         # 데이터 로드
         df = self.load_data(mode)
@@ -135,22 +234,16 @@ class DescentEvaluator:
             return {"error": "No valid labels found"}
         
         # 기본 분류 메트릭
+        from sklearn.metrics import precision_recall_fscore_support
+        
         y_true = valid_labels['y'].values
         y_pred = valid_labels['predict'].values
         
         precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, average='binary')
         accuracy = (y_true == y_pred).mean()
         
-        # Precision@K
-        precision_at_k = self.calculate_precision_at_k(df, labels, [1, 3, 5, 10])
-        
-        # nDCG@K
-        ndcg_at_k = {}
-        for k in [1, 3, 5, 10]:
-            ndcg_at_k[k] = self.calculate_ndcg(df, labels, k)
-        
-        # MRR
-        mrr = self.calculate_mrr(df, labels)
+        # 순위 지표 (P@K, nDCG@K, recall@K, AP, MRR) - 정렬 1회
+        ranking = self.calculate_ranking_metrics(df, labels, [1, 3, 5, 10])
         
         # ORI 점수 통계
         ori_stats = {
@@ -169,9 +262,11 @@ class DescentEvaluator:
             'precision': precision,
             'recall': recall,
             'f1_score': f1,
-            'precision_at_k': precision_at_k,
-            'ndcg_at_k': ndcg_at_k,
-            'mrr': mrr,
+            'precision_at_k': ranking.precision_at_k,
+            'ndcg_at_k': ranking.ndcg_at_k,
+            'recall_at_k': ranking.recall_at_k,
+            'mrr': ranking.mrr,
+            'average_precision': ranking.average_precision,
             'ori_stats': ori_stats
         }
     
@@ -307,10 +402,28 @@ def main():
     parser.add_argument("--project", default="your-project-id", help="GCP 프로젝트 ID")
     parser.add_argument("--dataset", default="descent_demo", help="BigQuery 데이터셋 ID")
     parser.add_argument("--modes", nargs="+", default=["text", "multimodal", "native"], help="평가할 모드들")
+    parser.add_argument("--no-cache", action="store_true", help="쿼리 결과 캐시 사용 안 함")
+    parser.add_argument("--cache-dir", default="artifacts/query_cache", help="쿼리 결과 캐시 디렉터리")
+    parser.add_argument("--stream", action="store_true", help="Storage Read API Arrow 스트림으로 증분 평가")
+    parser.add_argument("--parquet-dir", help="BigQuery 대신 <dir>/<mode>/*.parquet 를 스트림으로 평가")
+    parser.add_argument("--max-streams", type=int, default=4, help="병렬 읽기 스트림 수")
+    parser.add_argument("--labels", help="로컬 라벨 파일 (.parquet/.csv, 기본: --parquet-dir의 labels.parquet/labels.csv)")
     
     args = parser.parse_args()
     
-    evaluator = DescentEvaluator(args.project, args.dataset)
+    cache = None if args.no_cache else QueryResultCache(args.cache_dir)
+    reader_factory = None
+    labels_path = args.labels
+    if args.parquet_dir:
+        reader_factory = lambda mode: ParquetDirectoryReader(Path(args.parquet_dir) / mode,
+                                                            columns=["id", "ori", "predict"],
+                                                            max_streams=args.max_streams)
+        labels_path = labels_path or find_local_labels(args.parquet_dir)
+        if labels_path is None:
+            parser.error(f"{args.parquet_dir}에 labels.parquet/labels.csv가 없습니다 (--labels로 지정)")
+    evaluator = DescentEvaluator(args.project, args.dataset, cache=cache, stream=args.stream,
+                                 reader_factory=reader_factory, max_streams=args.max_streams,
+                                 labels_path=labels_path)
     
     print("🚀 Descent 평가 하니스 시작")
     print("=" * 50)
@@ -323,6 +436,8 @@ def main():
     
     # 결과 저장
     evaluator.save_results(comparison_df, report)
+    if cache is not None:
+        print(f"쿼리 캐시: {cache.stats()}")
     
     # 콘솔 출력
     print("\n" + report)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Descent Farm Fingerprint
+BigQuery FARM_FINGERPRINT와 같은 값을 내는 FarmHash Fingerprint64 (순수 파이썬)
+
+raw_texts.content_hash(FARM_FINGERPRINT(body))와 로컬에서 계산한 지문이
+같은 캐시·중복 제거 키가 되도록 farmhashna::Hash64를 그대로 옮겼다.
+"""
+
+import struct
+
+MASK = 0xFFFFFFFFFFFFFFFF
+K0 = 0xC3A5C85C97CB3127
+K1 = 0xB492B66FBE98F273
+K2 = 0x9AE16A3B2F90404F
+
+def _fetch64(s: bytes, i: int) -> int:
+    return struct.unpack_from("<Q", s, i)[0]
+
+def _fetch32(s: bytes, i: int) -> int:
+    return struct.unpack_from("<I", s, i)[0]
+
+def _rotate(v: int, shift: int) -> int:
+    return v if shift == 0 else ((v >> shift) | (v << (64 - shift))) & MASK
+
+def _shift_mix(v: int) -> int:
+    return v ^ (v >> 47)
+
+def _hash_len16(u: int, v: int, mul: int) -> int:
+    a = ((u ^ v) * mul) & MASK
+    a ^= a >> 47
+    b = ((v ^ a) * mul) & MASK
+    b ^= b >> 47
+    return (b * mul) & MASK
+
+def _hash_len0to16(s: bytes, n: int) -> int:
+    if n >= 8:
+        mul = K2 + n * 2
+        a = (_fetch64(s, 0) + K2) & MASK
+        b = _fetch64(s, n - 8)
+        c = (_rotate(b, 37) * mul + a) & MASK
+        d = ((_rotate(a, 25) + b) * mul) & MASK
+        return _hash_len16(c, d, mul)
+    if n >= 4:
+        mul = K2 + n * 2
+        a = _fetch32(s, 0)
+        return _hash_len16((n + (a << 3)) & MASK, _fetch32(s, n - 4), mul)
+    if n > 0:
+        y = (s[0] + (s[n >> 1] << 8)) & 0xFFFFFFFF
+        z = (n + (s[n - 1] << 2)) & 0xFFFFFFFF
+        return (_shift_mix(((y * K2) ^ (z * K0)) & MASK) * K2) & MASK
+    return K2
+
+def _hash_len17to32(s: bytes, n: int) -> int:
+    mul = K2 + n * 2
+    a = (_fetch64(s, 0) * K1) & MASK
+    b = _fetch64(s, 8)
+    c = (_fetch64(s, n - 8) * mul) & MASK
+    d = (_fetch64(s, n - 16) * K2) & MASK
+    return _hash_len16((_rotate((a + b) & MASK, 43) + _rotate(c, 30) + d) & MASK,
+                       (a + _rotate((b + K2) & MASK, 18) + c) & MASK, mul)
+
+def _hash_len33to64(s: bytes, n: int) -> int:
+    mul = K2 + n * 2
+    a = (_fetch64(s, 0) * K2) & MASK
+    b = _fetch64(s, 8)
+    c = (_fetch64(s, n - 8) * mul) & MASK
+    d = (_fetch64(s, n - 16) * K2) & MASK
+    y = (_rotate((a + b) & MASK, 43) + _rotate(c, 30) + d) & MASK
+    z = _hash_len16(y, (a + _rotate((b + K2) & MASK, 18) + c) & MASK, mul)
+    e = (_fetch64(s, 16) * mul) & MASK
+    f = _fetch64(s, 24)
+    g = ((y + _fetch64(s, n - 32)) * mul) & MASK
+    h = ((z + _fetch64(s, n - 24)) * mul) & MASK
+    return _hash_len16((_rotate((e + f) & MASK, 43) + _rotate(g, 30) + h) & MASK,
+                       (e + _rotate((f + a) & MASK, 18) + g) & MASK, mul)
+
+def _weak_hash_len32_with_seeds(s: bytes, i: int, a: int, b: int):
+    w, x, y, z = struct.unpack_from("<4Q", s, i)
+    a = (a + w) & MASK
+    b = _rotate((b + a + z) & MASK, 21)
+    c = a
+    a = (a + x + y) & MASK
+    b = (b + _rotate(a, 44)) & MASK
+    return (a + z) & MASK, (b + c) & MASK
+
+def fingerprint64_unsigned(s: bytes) -> int:
+    """FarmHash Fingerprint64 (부호 없는 64비트)"""
+    n = len(s)
+    if n <= 16:
+        return _hash_len0to16(s, n)
+    if n <= 32:
+        return _hash_len17to32(s, n)
+    if n <= 64:
+        return _hash_len33to64(s, n)
+
+    seed = 81
+    x = seed
+    y = (seed * K1 + 113) & MASK
+    z = (_shift_mix((y * K2 + 113) & MASK) * K2) & MASK
+    v0 = v1 = w0 = w1 = 0
+    x = (x * K2 + _fetch64(s, 0)) & MASK
+    end = ((n - 1) // 64) * 64
+    last64 = end + ((n - 1) & 63) - 63
+    i = 0
+    while i != end:
+        x = (_rotate((x + y + v0 + _fetch64(s, i + 8)) & MASK, 37) * K1) & MASK
+        y = (_rotate((y + v1 + _fetch64(s, i + 48)) & MASK, 42) * K1) & MASK
+        x ^= w1
+        y = (y + v0 + _fetch64(s, i + 40)) & MASK
+        z = (_rotate((z + w0) & MASK, 33) * K1) & MASK
+        v0, v1 = _weak_hash_len32_with_seeds(s, i, (v1 * K1) & MASK, (x + w0) & MASK)
+        w0, w1 = _weak_hash_len32_with_seeds(s, i + 32, (z + w1) & MASK, (y + _fetch64(s, i + 16)) & MASK)
+        z, x = x, z
+        i += 64
+
+    mul = K1 + ((z & 0xFF) << 1)
+    i = last64
+    w0 = (w0 + ((n - 1) & 63)) & MASK
+    v0 = (v0 + w0) & MASK
+    w0 = (w0 + v0) & MASK
+    x = (_rotate((x + y + v0 + _fetch64(s, i + 8)) & MASK, 37) * mul) & MASK
+    y = (_rotate((y + v1 + _fetch64(s, i + 48)) & MASK, 42) * mul) & MASK
+    x ^= (w1 * 9) & MASK
+    y = (y + v0 * 9 + _fetch64(s, i + 40)) & MASK
+    z = (_rotate((z + w0) & MASK, 33) * mul) & MASK
+    v0, v1 = _weak_hash_len32_with_seeds(s, i, (v1 * mul) & MASK, (x + w0) & MASK)
+    w0, w1 = _weak_hash_len32_with_seeds(s, i + 32, (z + w1) & MASK, (y + _fetch64(s, i + 16)) & MASK)
+    z, x = x, z
+    return _hash_len16((_hash_len16(v0, w0, mul) + _shift_mix(y) * K0 + z) & MASK,
+                       (_hash_len16(v1, w1, mul) + x) & MASK, mul)
+
+def farm_fingerprint(data: bytes) -> int:
+    """BigQuery FARM_FINGERPRINT와 같은 부호 있는 INT64"""
+    h = fingerprint64_unsigned(data)
+    return h - (1 << 64) if h >= 1 << 63 else h
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Descent Import Profile
+모듈별 import 시간 측정 (python -X importtime과 같은 self/누적 시간, 프로세스 종료 시 보고)
+"""
+
+import sys
+import time
+import atexit
+import importlib.abc
+from typing import List, Optional, TextIO, Tuple
+
+class _TimedLoader(importlib.abc.Loader):
+    """원래 로더의 exec_module 실행 시간을 재는 래퍼"""
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """sys.meta_path 맨 앞에 설치되어 이후 import되는 모듈의 실행 시간을 기록
+
+    누적 시간은 하위 import를 포함하고, self 시간은 이를 뺀 값이다.
+    """
+
+    def __init__(self):
+        self.records: List[Tuple[str, int, float, float]] = []  # (모듈, 깊이, self 초, 누적 초)
+        self._stack: List[List] = []  # [모듈, 시작 시각, 하위 누적 시간]
+        self._finding = False
+        self.started = time.perf_counter()
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding = False
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        _, start, children = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.records.append((name, len(self._stack), cumulative - children, cumulative))
+
+    def install(self) -> "ImportProfiler":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def top(self, n: int = 25) -> List[Tuple[str, int, float, float]]:
+        """누적 시간 순 상위 n개 모듈"""
+        return sorted(self.records, key=lambda r: r[3], reverse=True)[:n]
+
+    def report(self, stream: Optional[TextIO] = None, top: int = 25):
+        stream = stream or sys.stderr
+        total = time.perf_counter() - self.started
+        roots = sum(r[3] for r in self.records if r[1] == 0)
+        stream.write(f"\nimport 시간: 모듈 {len(self.records)}개, import 합계 {roots * 1e3:.1f}ms "
+                     f"(프로세스 {total * 1e3:.1f}ms)\n")
+        stream.write(f"{'self(ms)':>9} | {'누적(ms)':>9} | 모듈\n")
+        for name, depth, self_s, cumulative in self.top(top):
+            stream.write(f"{self_s * 1e3:>9.1f} | {cumulative * 1e3:>9.1f} | {'  ' * depth}{name}\n")
+
+def install_from_argv(flag: str = "--import-time", env: str = "DESCENT_IMPORT_TIME") -> Optional[ImportProfiler]:
+    """argv에 flag가 있거나 환경변수가 설정되면 프로파일러 설치 (flag는 argv에서 제거)
+
+    이후 import만 측정되므로 진입점 모듈의 다른 import보다 먼저 호출해야 한다.
+    """
+    import os
+
+    if flag not in sys.argv and not os.getenv(env):
+        return None
+    while flag in sys.argv:
+        sys.argv.remove(flag)
+    profiler = ImportProfiler().install()
+    atexit.register(profiler.report)
+    return profiler
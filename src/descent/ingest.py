@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Descent Streaming Ingest
+청크 단위 파싱 -> 지문 -> 중복 제거 -> 배치 임베딩 -> 임베딩 저장소 기록을
+용량 제한 큐로 연결한 스트리밍 적재 파이프라인
+"""
+
+import csv
+import json
+import time
+import queue
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_cache import content_fingerprint
+from embedding_store import EmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "jsonl", "parquet")
+
+@dataclass
+class RecordChunk:
+    """단계 사이를 흐르는 레코드 묶음"""
+    ids: List[str]
+    values: List[object]  # 텍스트 또는 특성 값 목록
+    fingerprints: Optional[List[int]] = None
+    vectors: Optional[np.ndarray] = None
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (id, 오류)
+
+@dataclass
+class StageCounter:
+    """단계별 처리량 카운터 (busy_s는 큐 대기를 제외한 처리 시간)"""
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    chunks: int = 0
+    busy_s: float = 0.0
+    wait_s: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """처리 시간 기준 초당 입력 레코드 수"""
+        return self.items_in / self.busy_s if self.busy_s > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "chunks": self.chunks,
+            "busy_s": round(self.busy_s, 3),
+            "wait_s": round(self.wait_s, 3),
+            "records_per_s": round(self.throughput, 1),
+        }
+
+@dataclass
+class IngestReport:
+    """적재 결과"""
+    store_path: str
+    written: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    failed_ids: List[str] = field(default_factory=list)  # 최대 100건
+    wall_time: float = 0.0
+    stages: Dict[str, StageCounter] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "store_path": self.store_path,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "failed_ids": self.failed_ids,
+            "wall_time_s": round(self.wall_time, 3),
+            "records_per_s": round(self.written / self.wall_time, 1) if self.wall_time > 0 else 0.0,
+            "stages": {name: c.to_dict() for name, c in self.stages.items()},
+        }
+
+def detect_format(path: str) -> str:
+    """확장자로 입력 형식 판별"""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    fmt = {"ndjson": "jsonl", "json": "jsonl", "pq": "parquet"}.get(suffix, suffix)
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"지원하지 않는 입력 형식: {path} (지원: {SUPPORTED_FORMATS})")
+    return fmt
+
+def shard_files(path: str) -> List[str]:
+    """입력 경로의 파일 목록 (디렉터리면 synth 샤드 part-* 를 이름순으로)"""
+    if Path(path).is_dir():
+        files = sorted(str(p) for p in Path(path).glob("part-*"))
+        if not files:
+            raise FileNotFoundError(f"샤드 파일(part-*)이 없습니다: {path}")
+        return files
+    return [path]
+
+def read_chunks(path: str, fmt: Optional[str] = None, chunk_rows: int = 10000,
+                columns: Optional[Sequence[str]] = None) -> Iterator[List[Dict]]:
+    """입력 파일(또는 part-* 샤드 디렉터리)을 chunk_rows 행의 dict 목록으로 나눠 읽기 (파일 전체를 올리지 않음)"""
+    if Path(path).is_dir():
+        for shard in shard_files(path):
+            yield from read_chunks(shard, fmt, chunk_rows, columns)
+        return
+    fmt = fmt or detect_format(path)
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet 입력에는 pyarrow가 필요합니다: pip install pyarrow") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pylist()
+        return
+
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+FINGERPRINTS_FILE = "fingerprints.bin"
+ID_HASHES_FILE = "id_hashes.bin"
+FINGERPRINT_INDEX_FILE = "fingerprint_index.bin"
+FINGERPRINT_INDEX_META = "fingerprint_index.json"
+_NO_FINGERPRINT = np.iinfo(np.int64).min  # 내용을 모르고 추가된 행 (convert 등)
+
+def _id_hash(key: str) -> int:
+    return content_fingerprint(key)
+
+def append_fingerprints(store_path: Path, ids: Sequence[str], fingerprints: Sequence[int]):
+    """저장소 행 순서대로 (id 해시, 내용 지문) 추가 - store.append 직후 호출"""
+    with open(Path(store_path) / FINGERPRINTS_FILE, "ab") as f:
+        f.write(np.asarray(fingerprints, dtype=np.int64).tobytes())
+    with open(Path(store_path) / ID_HASHES_FILE, "ab") as f:
+        f.write(np.asarray([_id_hash(k) for k in ids], dtype=np.int64).tobytes())
+
+class StoreFingerprints:
+    """저장소 행별 내용 지문 (fingerprints.bin, id_hashes.bin - 행 순서와 같은 int64)
+
+    이전 실행에서 기록한 (id, 지문)을 열 때 조회해, 바뀌지 않은 파일을 다시 적재해도
+    행이 또 추가되지 않게 한다. 조회는 id 해시로 정렬한 (해시, 마지막 지문) 배열
+    (fingerprint_index.bin)을 memmap으로 열어 이진 탐색하므로 저장소 크기만큼의
+    id 사전을 메모리에 올리지 않는다. 색인은 저장소 행 수가 바뀌었을 때만 다시 만든다.
+    내용을 모르고 추가된 행은 어떤 지문과도 같지 않은 값으로 채워 두므로 중복으로 보지 않는다.
+    """
+
+    def __init__(self, store: EmbeddingStore, chunk_rows: int = 1 << 16):
+        self.path = store.path
+        rows = len(store)
+        # 저장소 append 후 지문 기록 전에 중단되었으면 모자란 행을, 반대면 남는 꼬리를 맞춘다
+        have = self._truncate(FINGERPRINTS_FILE, rows)
+        if have < rows:
+            with open(self.path / FINGERPRINTS_FILE, "ab") as f:
+                f.write(np.full(rows - have, _NO_FINGERPRINT, dtype=np.int64).tobytes())
+        have = self._truncate(ID_HASHES_FILE, rows)
+        if have < rows:
+            self._hash_missing_ids(have, rows, chunk_rows)
+        self._hashes, self._fingerprints = self._open_index(rows)
+
+    def _truncate(self, name: str, rows: int) -> int:
+        path = self.path / name
+        path.touch()
+        have = path.stat().st_size // 8
+        if have > rows:
+            with open(path, "r+b") as f:
+                f.truncate(rows * 8)
+        return min(have, rows)
+
+    def _hash_missing_ids(self, start: int, rows: int, chunk_rows: int):
+        """id_hashes.bin이 없거나 짧으면 ids.txt를 흘려 읽어 나머지 행의 해시 기록"""
+        with open(self.path / "ids.txt", encoding="utf-8") as ids, open(self.path / ID_HASHES_FILE, "ab") as out:
+            buffer = []
+            for row, line in enumerate(ids):
+                if row >= rows:
+                    break
+                if row < start:
+                    continue
+                buffer.append(_id_hash(line.rstrip("\n")))
+                if len(buffer) >= chunk_rows:
+                    out.write(np.asarray(buffer, dtype=np.int64).tobytes())
+                    buffer = []
+            out.write(np.asarray(buffer, dtype=np.int64).tobytes())
+
+    def _open_index(self, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        index_path, meta_path = self.path / FINGERPRINT_INDEX_FILE, self.path / FINGERPRINT_INDEX_META
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if meta.get("rows") != rows:
+            meta = {"rows": rows, "entries": self._build_index(rows, index_path)}
+            meta_path.write_text(json.dumps(meta))
+        entries = meta["entries"]
+        if entries == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        index = np.memmap(index_path, dtype=np.int64, mode="r", shape=(2, entries))
+        return index[0], index[1]
+
+    def _build_index(self, rows: int, index_path: Path) -> int:
+        """id 해시 정렬 색인 생성 (같은 id는 마지막 행의 지문) -> 항목 수"""
+        if rows == 0:
+            index_path.write_bytes(b"")
+            return 0
+        hashes = np.memmap(self.path / ID_HASHES_FILE, dtype=np.int64, mode="r", shape=(rows,))
+        fingerprints = np.memmap(self.path / FINGERPRINTS_FILE, dtype=np.int64, mode="r", shape=(rows,))
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        last = np.append(sorted_hashes[1:] != sorted_hashes[:-1], True)
+        tmp = index_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(sorted_hashes[last].tobytes())
+            f.write(np.asarray(fingerprints[order[last]]).tobytes())
+        tmp.replace(index_path)
+        return int(last.sum())
+
+    def lookup(self, keys: Sequence[str]) -> List[Optional[int]]:
+        """id별 마지막 기록 지문 (없으면 None)"""
+        if not len(self._hashes):
+            return [None] * len(keys)
+        hashes = np.asarray([_id_hash(k) for k in keys], dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        found = np.asarray(self._hashes[pos]) == hashes
+        values = np.asarray(self._fingerprints[pos])
+        return [int(v) if ok else None for v, ok in zip(values, found)]
+
+    def append(self, ids: Sequence[str], fingerprints: Sequence[int]):
+        append_fingerprints(self.path, ids, fingerprints)
+
+class _Stop(Exception):
+    """다른 단계 실패로 파이프라인 중단"""
+
+_END = object()
+
+class IngestPipeline:
+    """스트리밍 적재 파이프라인
+
+    각 단계는 별도 스레드에서 실행되며 크기 queue_size의 큐로 연결된다.
+    하위 단계가 느리면 큐가 차서 상위 단계(결국 파일 읽기)가 멈추므로,
+    메모리 사용량은 입력 크기와 무관하게 대략 chunk_rows x queue_size x 단계 수로 제한된다.
+
+    중복 제거는 최근 dedupe_window 개 id 범위와 저장소에 이미 기록된 마지막 행
+    (StoreFingerprints)에서 (id, 지문)이 같은 레코드를 버린다.
+    본문이 같은 서로 다른 id는 모두 기록하되, 임베딩은 BatchEmbeddingClient의
+    지문 중복 제거·캐시로 한 번만 계산된다.
+    changelog가 주어지면 기록한 id를 source 이름으로 스티칭 변경 로그에 남기고,
+    on_write(ids, vectors)는 저장소에 추가하기 직전에 호출된다(구조화 통계 갱신 등).
+    """
+
+    def __init__(self, store: EmbeddingStore, vectorize: Callable[[RecordChunk], RecordChunk],
+                 queue_size: int = 4, dedupe_window: int = 1_000_000,
+                 changelog=None, source: str = "text",
+                 on_write: Optional[Callable[[List[str], np.ndarray], None]] = None):
+        if store.mode != "a":
+            raise PermissionError("적재 대상 저장소는 mode='a'로 열어야 합니다")
+        self.store = store
+        self.vectorize = vectorize
+        self.changelog = changelog
+        self.source = source
+        self.on_write = on_write
+        self.queue_size = max(1, queue_size)
+        self.dedupe_window = dedupe_window
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self.fingerprints = StoreFingerprints(store)
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item, counter: StageCounter):
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise _Stop()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        counter.wait_s += time.perf_counter() - start
+
+    def _get(self, q: queue.Queue, counter: StageCounter):
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise _Stop()
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        counter.wait_s += time.perf_counter() - start
+        return item
+
+    def _fingerprint(self, chunk: RecordChunk) -> RecordChunk:
+        if chunk.fingerprints is None:
+            chunk.fingerprints = [content_fingerprint(_fingerprint_text(v)) for v in chunk.values]
+        return chunk
+
+    def _dedupe(self, chunk: RecordChunk) -> RecordChunk:
+        keep = []
+        stored = self.fingerprints.lookup(chunk.ids)
+        for i, (key, fp) in enumerate(zip(chunk.ids, chunk.fingerprints)):
+            previous = self._seen.get(key)
+            if previous is None:
+                previous = stored[i]
+            self._seen[key] = fp
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.dedupe_window:
+                self._seen.popitem(last=False)
+            if previous != fp:
+                keep.append(i)
+        if len(keep) == len(chunk.ids):
+            return chunk
+        return RecordChunk(ids=[chunk.ids[i] for i in keep], values=[chunk.values[i] for i in keep],
+                           fingerprints=[chunk.fingerprints[i] for i in keep])
+
+    def run(self, chunks: Iterator[RecordChunk]) -> IngestReport:
+        report = IngestReport(store_path=str(self.store.path))
+        stages = [("fingerprint", self._fingerprint), ("dedupe", self._dedupe),
+                  ("embed", self.vectorize), ("write", None)]
+        report.stages = {name: StageCounter(name) for name in ["parse"] + [s[0] for s in stages]}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        errors: List[BaseException] = []
+
+        def parse():
+            counter = report.stages["parse"]
+            it = iter(chunks)
+            while True:
+                start = time.perf_counter()
+                chunk = next(it, _END)
+                counter.busy_s += time.perf_counter() - start
+                if chunk is _END:
+                    break
+                counter.chunks += 1
+                counter.items_in += len(chunk.ids)
+                counter.items_out += len(chunk.ids)
+                self._put(queues[0], chunk, counter)
+            self._put(queues[0], _END, counter)
+
+        def transform(index: int):
+            name, fn = stages[index]
+            counter = report.stages[name]
+            while True:
+                chunk = self._get(queues[index], counter)
+                if chunk is _END:
+                    break
+                start = time.perf_counter()
+                out = fn(chunk)
+                counter.busy_s += time.perf_counter() - start
+                counter.chunks += 1
+                counter.items_in += len(chunk.ids)
+                counter.items_out += len(out.ids)
+                if name == "dedupe":
+                    report.duplicates += len(chunk.ids) - len(out.ids)
+                if out.ids:
+                    self._put(queues[index + 1], out, counter)
+            self._put(queues[index + 1], _END, counter)
+
+        def write():
+            counter = report.stages["write"]
+            while True:
+                chunk = self._get(queues[-1], counter)
+                if chunk is _END:
+                    break
+                start = time.perf_counter()
+                failed = {key for key, _ in chunk.failed}
+                rows = [i for i, key in enumerate(chunk.ids) if key not in failed]
+                if rows:
+                    written = [chunk.ids[i] for i in rows]
+                    if self.on_write is not None:
+                        self.on_write(written, chunk.vectors[rows])
+                    self.store.append(written, chunk.vectors[rows])
+                    self.fingerprints.append(written, [chunk.fingerprints[i] for i in rows])
+                    if self.changelog is not None:
+                        self.changelog.record(written, self.source)
+                counter.busy_s += time.perf_counter() - start
+                counter.chunks += 1
+                counter.items_in += len(chunk.ids)
+                counter.items_out += len(rows)
+                report.written += len(rows)
+                report.failed += len(chunk.failed)
+                for key, error in chunk.failed:
+                    if len(report.failed_ids) < 100:
+                        report.failed_ids.append(key)
+                    logger.error(f"적재 실패 {key}: {error}")
+
+        def guarded(fn, *args):
+            try:
+                fn(*args)
+            except _Stop:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                self._stop.set()
+
+        origin = time.perf_counter()
+        threads = [threading.Thread(target=guarded, args=(parse,), name="ingest-parse")]
+        threads += [threading.Thread(target=guarded, args=(transform, i), name=f"ingest-{stages[i][0]}")
+                    for i in range(len(stages) - 1)]
+        threads.append(threading.Thread(target=guarded, args=(write,), name="ingest-write"))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        report.wall_time = time.perf_counter() - origin
+
+        if errors:
+            raise errors[0]
+        logger.info(f"적재 완료: {report.written}건 기록, 중복 {report.duplicates}건, 실패 {report.failed}건 "
+                    f"({report.wall_time:.2f}초)")
+        return report
+
+def _fingerprint_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+def text_chunks(path: str, fmt: Optional[str] = None, id_column: str = "id", text_column: str = "body",
+                hash_column: Optional[str] = "content_hash", chunk_rows: int = 10000) -> Iterator[RecordChunk]:
+    """raw_texts 형식 입력 -> RecordChunk (content_hash 컬럼이 있으면 지문으로 사용)"""
+    for rows in read_chunks(path, fmt, chunk_rows):
+        ids = [str(row[id_column]) for row in rows]
+        texts = [row.get(text_column) or "" for row in rows]
+        hashes = [row.get(hash_column) for row in rows] if hash_column else []
+        fingerprints = None
+        if hashes and all(h not in (None, "") for h in hashes):
+            fingerprints = [int(h) for h in hashes]
+        yield RecordChunk(ids=ids, values=texts, fingerprints=fingerprints)
+
+def struct_chunks(path: str, fmt: Optional[str] = None, id_column: str = "id",
+                  feature_columns: Sequence[str] = ("f1", "f2", "f3"),
+                  chunk_rows: int = 10000) -> Iterator[RecordChunk]:
+    """feat_struct 형식 입력 -> RecordChunk (빈 값은 NaN)"""
+    for rows in read_chunks(path, fmt, chunk_rows):
+        ids = [str(row[id_column]) for row in rows]
+        values = [[_to_float(row.get(col)) for col in feature_columns] for row in rows]
+        yield RecordChunk(ids=ids, values=values)
+
+def _to_float(value) -> float:
+    if value is None or value == "":
+        return float("nan")
+    return float(value)
+
+def embedding_vectorizer(client) -> Callable[[RecordChunk], RecordChunk]:
+    """BatchEmbeddingClient 기반 임베딩 단계 (실패 행은 failed에 기록)"""
+    def vectorize(chunk: RecordChunk) -> RecordChunk:
+        result = client.embed(chunk.values, fingerprints=chunk.fingerprints)
+        chunk.vectors = result.vectors
+        chunk.failed = [(chunk.ids[f.index], f.error) for f in result.failures]
+        return chunk
+    return vectorize
+
+def feature_vectorizer(chunk: RecordChunk) -> RecordChunk:
+    """특성 값을 그대로 벡터로 사용 (정규화는 stitch 단계에서 수행)"""
+    chunk.vectors = np.asarray(chunk.values, dtype=np.float32)
+    return chunk
+
+def struct_baseline(path: str, feature_columns: Sequence[str] = ("f1", "f2", "f3"),
+                    chunk_rows: int = 10000) -> Iterator[RecordChunk]:
+    """feat_struct 기준 데이터 (적재와 같은 지문을 붙인 벡터 청크)"""
+    for chunk in struct_chunks(path, feature_columns=feature_columns, chunk_rows=chunk_rows):
+        chunk.fingerprints = [content_fingerprint(_fingerprint_text(v)) for v in chunk.values]
+        yield feature_vectorizer(chunk)
+
+def text_baseline(data_dir: str, chunk_rows: int = 10000) -> Iterator[RecordChunk]:
+    """text_embeddings.csv 기준 데이터 (raw_texts 본문 지문을 붙인 벡터 청크, 본문이 없으면 지문 없음)"""
+    from ori_local import load_text_vectors
+    ids, vectors = load_text_vectors(data_dir)
+    row_of = {key: i for i, key in enumerate(ids)}
+    fingerprints = np.full(len(ids), _NO_FINGERPRINT, dtype=np.int64)
+    from ori_local import table_path
+    texts = table_path(data_dir, "raw_texts")
+    if texts is not None:
+        for chunk in text_chunks(str(texts), chunk_rows=chunk_rows):
+            fps = chunk.fingerprints or [content_fingerprint(t) for t in chunk.values]
+            for key, fp in zip(chunk.ids, fps):
+                if key in row_of:
+                    fingerprints[row_of[key]] = fp
+    for start in range(0, len(ids), chunk_rows):
+        end = start + chunk_rows
+        yield RecordChunk(ids=ids[start:end], values=[], fingerprints=fingerprints[start:end].tolist(),
+                          vectors=vectors[start:end])
+
+def open_or_create_store(path: str, dim: int, model: str, dtype: str = "float32",
+                         baseline: Optional[Callable[[], Iterator[RecordChunk]]] = None,
+                         baseline_model: Optional[str] = None) -> EmbeddingStore:
+    """추가 모드로 저장소 열기 (없으면 생성, 있으면 차원·모델 확인)
+
+    baseline이 주어지면 새로 만들 때 그 청크(id, 벡터, 지문)로 먼저 채운다. 로컬 로더는
+    저장소가 있으면 CSV 대신 저장소만 읽으므로, 적재분만 기록하면 CSV에만 있던 키가 사라진다.
+    지문도 함께 기록하므로 같은 CSV를 다시 적재하면 중복으로 걸러진다.
+    기준 데이터를 만든 모델(baseline_model)과 차원이 적재 대상과 같을 때만 채우고,
+    다르거나 모델을 알 수 없으면 한 저장소에 다른 모델의 벡터가 섞이지 않도록 거부한다.
+    """
+    if not (Path(path) / "header.json").exists():
+        if baseline is not None and baseline_model != model:
+            raise ValueError(f"기준 데이터의 모델({baseline_model or '알 수 없음'})이 적재 모델({model})과 "
+                             f"다릅니다 - 별도 저장소 경로를 지정하세요")
+        chunks = iter(baseline() if baseline is not None else [])
+        first = next(chunks, None)
+        if first is not None and first.vectors.shape[1] != dim:
+            raise ValueError(f"기준 데이터({first.vectors.shape[1]}차원)와 적재 차원({dim})이 다릅니다 "
+                             f"- 별도 저장소 경로를 지정하세요")
+        store = EmbeddingStore.create(path, dim=dim, model=model, dtype=dtype)
+        seeded = 0
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            store.append(chunk.ids, chunk.vectors)
+            append_fingerprints(store.path, chunk.ids, chunk.fingerprints)
+            seeded += len(chunk.ids)
+        if seeded:
+            logger.info(f"새 저장소를 기준 데이터 {seeded}건으로 채움: {path}")
+        return store
+    store = EmbeddingStore.open(path, mode="a")
+    if store.dim != dim or store.model != model:
+        raise ValueError(f"기존 저장소와 맞지 않습니다: {store.model}/{store.dim}차원 "
+                         f"(요청: {model}/{dim}차원)")
+    return store
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Descent Lexical Index
+raw_texts 본문의 BM25 역색인(디스크 저장, mmap 로드)과
+어휘·벡터 순위를 융합하는 하이브리드 검색 (어휘 상위 후보에서만 벡터 채점 가능)
+"""
+
+import re
+import json
+import time
+import logging
+import unicodedata
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from multi_query import _prepare_queries, blocked_topk
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_VERSION = 1
+DEFAULT_CANDIDATES = 1000
+RRF_K = 60  # 역순위 융합 상수 (Cormack et al. 기본값)
+MAX_TF = np.iinfo(np.uint16).max
+
+# 한글 음절 연속 구간 또는 영문·숫자 단어
+_TOKEN = re.compile(r"[가-힣]+|[0-9a-z]+")
+STOPWORDS = frozenset({"a", "an", "and", "the", "of", "with", "for", "to", "in", "on", "is", "are"})
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """본문 -> 색인 토큰
+
+    형태소 분석기 없이 조사가 붙은 어절('스펙과', '이미지의')도 맞도록 한글 구간은
+    음절 바이그램('스펙', '펙과')으로, 한 음절 구간은 그대로 쓴다. 영문·숫자는 소문자
+    단어 단위이며(NFKC로 전각 문자 정규화), 흔한 영어 불용어는 버린다.
+    """
+    if not text:
+        return []
+    tokens: List[str] = []
+    for run in _TOKEN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(run) > 1 and "가" <= run[0] <= "힣":
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        elif run not in STOPWORDS:
+            tokens.append(run)
+    return tokens
+
+class BM25Index:
+    """CSR 형태 역색인 (용어별 문서 번호·빈도 구간) + BM25 채점
+
+    postings_docs[term_offsets[t]:term_offsets[t + 1]]가 용어 t를 가진 문서(오름차순)이고
+    postings_tf가 같은 구간의 용어 빈도다. 저장 파일은 mmap으로 열어 질의 용어 구간만 읽는다.
+    """
+
+    def __init__(self, vocab: Dict[str, int], term_offsets: np.ndarray, postings_docs: np.ndarray,
+                 postings_tf: np.ndarray, doc_lengths: np.ndarray, keys: List[str],
+                 k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_lengths = doc_lengths
+        self.keys = keys
+        self.k1 = k1
+        self.b = b
+
+        n = len(keys)
+        df = np.diff(np.asarray(term_offsets, dtype=np.int64)).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.avgdl = float(lengths.mean()) if n and lengths.any() else 1.0
+        # 문서 길이 정규화 항 k1·(1 - b + b·|d|/avgdl)을 미리 계산
+        self._doc_norm = (k1 * (1.0 - b + b * lengths / self.avgdl)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def num_postings(self) -> int:
+        return int(len(self.postings_docs))
+
+    @classmethod
+    def build(cls, batches: Iterable[Tuple[Sequence[str], Sequence[Optional[str]]]],
+              k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """(id 목록, 본문 목록) 배치 스트림으로 색인 생성 (rule_engine.iter_csv_batches와 같은 형식)
+
+        배치마다 (용어, 문서, 빈도)를 정수 배열로만 쌓고, 마지막에 용어 번호로 한 번 정렬해
+        CSR로 바꾼다. 안정 정렬이라 용어별 문서 번호는 입력 순서(오름차순)를 유지한다.
+        """
+        start = time.time()
+        vocab: Dict[str, int] = {}
+        keys: List[str] = []
+        lengths = array("i")
+        term_parts: List[np.ndarray] = []
+        doc_parts: List[np.ndarray] = []
+        tf_parts: List[np.ndarray] = []
+        for ids, bodies in batches:
+            terms, docs, tfs = array("i"), array("i"), array("i")
+            for key, body in zip(ids, bodies):
+                doc = len(keys)
+                keys.append(key)
+                counts = Counter(tokenize(body))
+                lengths.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    terms.append(vocab.setdefault(term, len(vocab)))
+                    docs.append(doc)
+                    tfs.append(tf)
+            term_parts.append(np.frombuffer(terms, dtype=np.int32))
+            doc_parts.append(np.frombuffer(docs, dtype=np.int32))
+            tf_parts.append(np.frombuffer(tfs, dtype=np.int32))
+
+        term_ids = np.concatenate(term_parts) if term_parts else np.zeros(0, dtype=np.int32)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=offsets[1:])
+        postings_docs = np.concatenate(doc_parts)[order] if doc_parts else np.zeros(0, dtype=np.int32)
+        postings_tf = np.minimum(np.concatenate(tf_parts)[order], MAX_TF).astype(np.uint16) \
+            if tf_parts else np.zeros(0, dtype=np.uint16)
+
+        index = cls(vocab, offsets, postings_docs, postings_tf, np.frombuffer(lengths, dtype=np.int32).copy(),
+                    keys, k1=k1, b=b)
+        logger.info(f"BM25 색인 생성: 문서 {len(keys)}건, 용어 {len(vocab)}개, 포스팅 {index.num_postings}개, "
+                    f"{time.time() - start:.2f}초")
+        return index
+
+    def query_terms(self, query: str) -> np.ndarray:
+        """질의 토큰 중 색인에 있는 용어 번호 (중복 제거)"""
+        ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        return np.array(sorted(ids), dtype=np.int64)
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """질의 용어를 하나라도 가진 문서와 BM25 점수 -> (문서 번호 오름차순, 점수)"""
+        terms = self.query_terms(query)
+        if len(terms) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        starts = self.term_offsets[terms]
+        ends = self.term_offsets[terms + 1]
+        docs = np.concatenate([self.postings_docs[s:e] for s, e in zip(starts, ends)]).astype(np.int64)
+        tf = np.concatenate([self.postings_tf[s:e] for s, e in zip(starts, ends)]).astype(np.float32)
+        idf = np.repeat(self.idf[terms], ends - starts)
+        contrib = idf * tf * (self.k1 + 1.0) / (tf + self._doc_norm[docs])
+        if len(docs) * 8 >= len(self):
+            # 포스팅이 많으면 문서 수 길이의 밀집 누적이 정렬보다 빠르다
+            dense = np.bincount(docs, weights=contrib, minlength=len(self))
+            rows = np.flatnonzero(dense)
+            return rows, dense[rows].astype(np.float32)
+        rows, inverse = np.unique(docs, return_inverse=True)
+        return rows, np.bincount(inverse, weights=contrib).astype(np.float32)
+
+    def search(self, query: str, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 top-k -> (문서 번호, 점수) (점수 내림차순, 같으면 문서 번호 순)"""
+        rows, scores = self.scores(query)
+        if len(rows) > k:
+            # 동점이 흔하므로(짧은 본문·같은 문구) 경계 동점은 문서 번호가 작은 쪽을 골라 결과를 고정
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[:k - len(above)]
+            top = np.concatenate([above, ties])
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
+
+    def save(self, path: str):
+        """디렉터리에 저장 (.npy + meta.json + terms.txt + keys.txt)"""
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        np.save(out / "term_offsets.npy", np.ascontiguousarray(self.term_offsets))
+        np.save(out / "postings_docs.npy", np.ascontiguousarray(self.postings_docs))
+        np.save(out / "postings_tf.npy", np.ascontiguousarray(self.postings_tf))
+        np.save(out / "doc_lengths.npy", np.ascontiguousarray(self.doc_lengths))
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(out / "terms.txt", "w", encoding="utf-8") as f:
+            for term in terms:
+                f.write(f"{term}\n")
+        with open(out / "keys.txt", "w", encoding="utf-8") as f:
+            for key in self.keys:
+                f.write(f"{key}\n")
+        meta = {
+            "version": LEXICAL_VERSION,
+            "documents": len(self),
+            "terms": len(terms),
+            "postings": self.num_postings,
+            "avgdl": self.avgdl,
+            "k1": self.k1,
+            "b": self.b,
+        }
+        with open(out / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"BM25 색인 저장 완료: {out}")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "BM25Index":
+        src = Path(path)
+        with open(src / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("version") != LEXICAL_VERSION:
+            raise ValueError(f"지원하지 않는 BM25 색인 버전: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        with open(src / "terms.txt", encoding="utf-8") as f:
+            vocab = {line.rstrip("\n"): i for i, line in enumerate(f)}
+        with open(src / "keys.txt", encoding="utf-8") as f:
+            keys = [line.rstrip("\n") for line in f]
+        return cls(
+            vocab=vocab,
+            term_offsets=np.load(src / "term_offsets.npy"),
+            postings_docs=np.load(src / "postings_docs.npy", mmap_mode=mode),
+            postings_tf=np.load(src / "postings_tf.npy", mmap_mode=mode),
+            doc_lengths=np.load(src / "doc_lengths.npy"),
+            keys=keys,
+            k1=meta["k1"],
+            b=meta["b"],
+        )
+
+@dataclass
+class HybridHit:
+    """하이브리드 검색 결과 행 (순위는 1부터, 해당 목록에 없으면 None)"""
+    key: str
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+    bm25: Optional[float] = None
+    similarity: Optional[float] = None
+
+def rrf_fuse(*rankings: Sequence[str], rrf_k: int = RRF_K) -> List[Tuple[str, float]]:
+    """역순위 융합: 키별 Σ 1/(rrf_k + 순위) 내림차순 (같으면 먼저 나온 목록 순위 순)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+class HybridRetriever:
+    """BM25 색인 + stitched 벡터 하이브리드 검색
+
+    mode="lexical"은 BM25만, "vector"는 전체 코퍼스 코사인 전수 검색,
+    "hybrid"는 두 순위를 RRF로 융합한다. hybrid에서 prune=True면 BM25 상위
+    candidates개의 벡터만 읽어 채점하므로 전수 스캔 없이 후보 집합 안에서 순위를 매긴다
+    (어휘가 하나도 겹치지 않는 문서는 결과에 나오지 않는다).
+    """
+
+    def __init__(self, index: BM25Index, keys: Sequence[str], vectors: np.ndarray, rrf_k: int = RRF_K):
+        self.index = index
+        self.keys = list(keys)
+        self.vectors = vectors
+        self.rrf_k = rrf_k
+        position = {key: i for i, key in enumerate(self.keys)}
+        # 색인 문서 번호 -> 벡터 행 번호 (벡터가 없으면 -1)
+        self._vector_rows = np.fromiter((position.get(key, -1) for key in index.keys),
+                                        dtype=np.int64, count=len(index))
+
+    def lexical(self, query: str, n: int) -> Tuple[List[str], np.ndarray]:
+        rows, scores = self.index.search(query, n)
+        return [self.index.keys[r] for r in rows], scores
+
+    def semantic(self, query_vector: np.ndarray, n: int,
+                 rows: Optional[np.ndarray] = None) -> Tuple[List[str], np.ndarray]:
+        """코사인 top-n -> (키 목록, 유사도) (rows가 주어지면 그 벡터 행만 채점)"""
+        query = _prepare_queries(np.asarray(query_vector)[None, :], self.vectors.shape[1])
+        if rows is None:
+            top, sims = blocked_topk(query, self.vectors, n)
+            top, sims = top[0], sims[0]
+        else:
+            rows = np.unique(rows[rows >= 0])  # 정렬된 행 번호라 memmap에서도 순차 읽기
+            raw = np.asarray(self.vectors[rows], dtype=np.float32)
+            valid = ~np.isnan(raw).any(axis=1)
+            rows, raw = rows[valid], raw[valid]
+            norms = np.linalg.norm(raw, axis=1)
+            norms[norms == 0] = 1.0
+            sims = (raw @ query[0]) / norms
+            order = np.lexsort((rows, -sims))[:n]
+            top, sims = rows[order], sims[order]
+        keep = np.isfinite(sims)
+        return [self.keys[r] for r in top[keep]], sims[keep].astype(np.float32)
+
+    def search(self, query: str, query_vector: Optional[np.ndarray] = None, k: int = 10,
+               mode: str = "hybrid", candidates: int = DEFAULT_CANDIDATES, prune: bool = True) -> List[HybridHit]:
+        """질의 텍스트(+ 질의 벡터)로 top-k 검색"""
+        if mode not in ("lexical", "vector", "hybrid"):
+            raise ValueError(f"지원하지 않는 검색 모드: {mode}")
+        if mode != "lexical" and query_vector is None:
+            raise ValueError(f"{mode} 모드에는 질의 벡터가 필요합니다")
+
+        if mode == "lexical":
+            keys, scores = self.lexical(query, k)
+            return [HybridHit(key, float(s), lexical_rank=i, bm25=float(s))
+                    for i, (key, s) in enumerate(zip(keys, scores), 1)]
+        if mode == "vector":
+            keys, sims = self.semantic(query_vector, k)
+            return [HybridHit(key, float(s), vector_rank=i, similarity=float(s))
+                    for i, (key, s) in enumerate(zip(keys, sims), 1)]
+
+        lex_rows, lex_scores = self.index.search(query, candidates)
+        lex_keys = [self.index.keys[r] for r in lex_rows]
+        vec_rows = self._vector_rows[lex_rows] if prune else None
+        vec_keys, sims = self.semantic(query_vector, candidates, vec_rows)
+
+        lex_rank = {key: i for i, key in enumerate(lex_keys, 1)}
+        vec_rank = {key: i for i, key in enumerate(vec_keys, 1)}
+        bm25 = dict(zip(lex_keys, lex_scores.tolist()))
+        similarity = dict(zip(vec_keys, sims.tolist()))
+        return [
+            HybridHit(key, score, lex_rank.get(key), vec_rank.get(key), bm25.get(key), similarity.get(key))
+            for key, score in rrf_fuse(lex_keys, vec_keys, rrf_k=self.rrf_k)[:k]
+        ]
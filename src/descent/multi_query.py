@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Descent Multi-Query Evaluation
+질의 집합 x stitched 행렬 블록 행렬곱 + 질의별 top-k + 스트리밍 지표 집계
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ranking_metrics import RankingMetrics, metrics_from_ranked_labels
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueryResult:
+    """질의 하나의 top-k 결과와 지표"""
+    query_id: str
+    doc_ids: List[str]
+    scores: np.ndarray  # 코사인 유사도 (내림차순)
+    metrics: RankingMetrics
+    relevant: int = 0  # 판정된 관련 문서 수
+    hits: Dict[int, int] = field(default_factory=dict)  # K별 top-K 안의 관련 문서 수
+
+def _prepare_queries(queries: np.ndarray, dim: int) -> np.ndarray:
+    """질의 정규화 + 코퍼스 차원까지 0 채움
+
+    텍스트 전용 질의(d_t)를 stitched 코퍼스(d_t + d_s)에 쓰는 경우,
+    0 채움 후 내적은 cosine_dist UDF의 오프셋 일치 내적과 같다.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    if queries.shape[1] > dim:
+        raise ValueError(f"질의 차원({queries.shape[1]})이 코퍼스 차원({dim})보다 큽니다")
+    if queries.shape[1] < dim:
+        queries = np.pad(queries, ((0, 0), (0, dim - queries.shape[1])))
+    norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return queries / norms
+
+def blocked_topk(queries: np.ndarray, corpus: np.ndarray, k: int,
+                 corpus_block: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """질의 블록 x 코퍼스 블록 행렬곱으로 질의별 top-k (행 번호, 유사도)
+
+    corpus는 정규화 전 행렬(memmap 가능)이며 블록마다 L2 정규화한다.
+    NaN 행(NULL 임베딩)은 후보에서 제외한다.
+    """
+    n_q = len(queries)
+    best_scores = np.full((n_q, 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((n_q, 0), dtype=np.int64)
+    for start in range(0, len(corpus), corpus_block):
+        raw = np.asarray(corpus[start:start + corpus_block], dtype=np.float32)
+        invalid = np.isnan(raw).any(axis=1)
+        chunk = np.nan_to_num(raw, nan=0.0)
+        norms = np.linalg.norm(chunk, axis=1)
+        norms[norms == 0] = 1.0
+        sims = queries @ (chunk / norms[:, None]).T
+        sims[:, invalid] = -np.inf
+        scores = np.concatenate([best_scores, sims], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(chunk)), sims.shape)], axis=1)
+        kk = min(k, scores.shape[1])
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_rows = np.take_along_axis(rows, top, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+class MetricAggregator:
+    """질의별 결과를 스트리밍으로 받아 macro/micro 지표 집계"""
+
+    def __init__(self, ks: Sequence[int]):
+        self.ks = list(ks)
+        self.queries = 0
+        self._macro: Dict[str, float] = {}
+        self._hits = {k: 0 for k in self.ks}
+        self._retrieved = {k: 0 for k in self.ks}
+        self._relevant = 0
+
+    def add(self, result: QueryResult):
+        m = result.metrics
+        self.queries += 1
+        values = {"mrr": m.mrr, "average_precision": m.average_precision}
+        for k in self.ks:
+            values[f"precision@{k}"] = m.precision_at_k[k]
+            values[f"recall@{k}"] = m.recall_at_k[k]
+            values[f"ndcg@{k}"] = m.ndcg_at_k[k]
+            self._hits[k] += result.hits[k]
+            self._retrieved[k] += min(k, len(result.doc_ids))
+        for name, value in values.items():
+            self._macro[name] = self._macro.get(name, 0.0) + value
+        self._relevant += result.relevant
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        macro = {name: total / self.queries for name, total in self._macro.items()} if self.queries else {}
+        micro = {}
+        for k in self.ks:
+            micro[f"precision@{k}"] = self._hits[k] / self._retrieved[k] if self._retrieved[k] else 0.0
+            micro[f"recall@{k}"] = self._hits[k] / self._relevant if self._relevant else 0.0
+        return {"queries": self.queries, "macro": macro, "micro": micro}
+
+class MultiQueryEvaluator:
+    """질의 집합을 한 번에 평가
+
+    qrels: {query_id: {doc_id: 등급}} - 등급 > 0이면 관련 문서. 판정되지 않은
+    검색 결과는 비관련(0)으로 본다.
+    """
+
+    def __init__(self, corpus_ids: Sequence[str], corpus_vectors: np.ndarray, k: int = 100,
+                 ks: Sequence[int] = (1, 3, 5, 10), query_block: int = 256, corpus_block: int = 65536):
+        self.corpus_ids = list(corpus_ids)
+        self.corpus = corpus_vectors
+        self.k = max(k, max(ks))
+        self.ks = list(ks)
+        self.query_block = query_block
+        self.corpus_block = corpus_block
+
+    def iter_results(self, query_ids: Sequence[str], query_vectors: np.ndarray,
+                     qrels: Mapping[str, Mapping[str, float]]) -> Iterator[QueryResult]:
+        """질의 블록 단위로 검색하고 질의별 결과를 순서대로 생성"""
+        queries = _prepare_queries(query_vectors, self.corpus.shape[1])
+        for start in range(0, len(queries), self.query_block):
+            rows, scores = blocked_topk(queries[start:start + self.query_block], self.corpus,
+                                        self.k, self.corpus_block)
+            for offset in range(len(rows)):
+                qid = query_ids[start + offset]
+                judged = qrels.get(qid, {})
+                valid = np.isfinite(scores[offset])
+                doc_ids = [self.corpus_ids[r] for r in rows[offset][valid]]
+                ranked = np.array([judged.get(d, 0.0) for d in doc_ids], dtype=np.float64)
+                grades = np.array(list(judged.values()), dtype=np.float64)
+                relevant = int((grades > 0).sum())
+                metrics = metrics_from_ranked_labels(ranked, self.ks, total_relevant=relevant, ideal_labels=grades)
+                hits = {k: int((ranked[:k] > 0).sum()) for k in self.ks}
+                # 등급 판정에서 P@K는 등급 평균이 아니라 관련(등급 > 0) 문서 비율
+                metrics.precision_at_k = {k: hits[k] / min(k, len(doc_ids)) if doc_ids else 0.0 for k in self.ks}
+                yield QueryResult(
+                    query_id=qid,
+                    doc_ids=doc_ids,
+                    scores=scores[offset][valid],
+                    metrics=metrics,
+                    relevant=relevant,
+                    hits=hits,
+                )
+
+    def evaluate(self, query_ids: Sequence[str], query_vectors: np.ndarray,
+                 qrels: Mapping[str, Mapping[str, float]], output_path: Optional[str] = None) -> Dict:
+        """전체 평가 -> macro/micro 요약 (output_path가 있으면 질의별 JSONL 기록)"""
+        aggregator = MetricAggregator(self.ks)
+        out = open(output_path, "w", encoding="utf-8") if output_path else None
+        try:
+            for result in self.iter_results(query_ids, query_vectors, qrels):
+                aggregator.add(result)
+                if out is not None:
+                    out.write(json.dumps({
+                        "query_id": result.query_id,
+                        "top": result.doc_ids[:max(self.ks)],
+                        "precision_at_k": result.metrics.precision_at_k,
+                        "recall_at_k": result.metrics.recall_at_k,
+                        "ndcg_at_k": result.metrics.ndcg_at_k,
+                        "mrr": result.metrics.mrr,
+                        "average_precision": result.metrics.average_precision,
+                    }, ensure_ascii=False) + "\n")
+        finally:
+            if out is not None:
+                out.close()
+        summary = aggregator.summary()
+        logger.info(f"다중 질의 평가 완료: {summary['queries']}개 질의")
+        return summary
+
+def load_query_set(path: str) -> Tuple[List[str], List[Optional[str]], List[Optional[List[float]]], Dict[str, Dict[str, float]]]:
+    """질의 집합 JSONL 로드
+
+    각 줄: {"query_id": ..., "text": ... 또는 "vector": [...], "relevant": {doc_id: 등급} 또는 [doc_id, ...]}
+    """
+    ids, texts, vectors, qrels = [], [], [], {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            qid = str(row["query_id"])
+            ids.append(qid)
+            texts.append(row.get("text"))
+            vectors.append(row.get("vector"))
+            relevant = row.get("relevant", {})
+            qrels[qid] = {str(d): 1.0 for d in relevant} if isinstance(relevant, list) else \
+                {str(d): float(g) for d, g in relevant.items()}
+    return ids, texts, vectors, qrels
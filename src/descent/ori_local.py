@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Descent Local ORI Engine
+report_ori 뷰(create_reports.sql)와 동일한 ORI 점수를 NumPy로 인프로세스 계산
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rule_engine import REPORT_RULES, RuleSet
+
+logger = logging.getLogger(__name__)
+
+# 질의 벡터: A100 불일치 사례 (emb_view_t_norm WHERE id='A100')
+DEFAULT_QUERY_ID = "A100"
+
+@dataclass
+class LocalCorpus:
+    """로컬 ORI 계산 입력 (emb_stitched + raw_texts + 질의 벡터)"""
+    keys: List[str]
+    embeddings: np.ndarray  # (n, d) float32, NULL 임베딩 행은 NaN
+    bodies: List[Optional[str]]
+    query: np.ndarray  # (d_t,) float32, L2 정규화된 텍스트 임베딩
+
+@dataclass
+class ORIResult:
+    """ORI 계산 결과 (ori DESC 정렬, NULL은 마지막)"""
+    ids: List[str]
+    ori: np.ndarray
+    predict: np.ndarray
+    semantic_distance: np.ndarray
+    rule_score: np.ndarray
+    bodies: List[Optional[str]]
+    rule_hits: Dict[str, int] = field(default_factory=dict)  # 규칙별 매칭 행 수
+
+    def to_frame(self):
+        """report_ori 뷰와 같은 컬럼의 DataFrame으로 변환"""
+        import pandas as pd
+        return pd.DataFrame({
+            "id": self.ids,
+            "ori": self.ori.astype(np.float64),
+            "predict": self.predict,
+            "semantic_distance": self.semantic_distance.astype(np.float64),
+            "rule_score": self.rule_score.astype(np.float64),
+            "body": self.bodies,
+        })
+
+def parse_vector(text: str) -> List[float]:
+    """'[0.1, 0.2, ...]' 문자열 벡터 파싱"""
+    return json.loads(text)
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (노름이 0이면 NULLIF와 같이 NaN)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = matrix / np.where(norms > 0, norms, np.nan)[:, None]
+    return out.astype(np.float32, copy=False)
+
+def zscore(features: np.ndarray) -> np.ndarray:
+    """feat_struct_vec: AVG/STDDEV(표본) 기반 z-score (표준편차 0이면 0)"""
+    features = np.asarray(features, dtype=np.float64)
+    if len(features) < 2:
+        return np.zeros_like(features, dtype=np.float32)
+    mean = features.mean(axis=0)
+    std = features.std(axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(std > 0, (features - mean) / std, 0.0)
+    return z.astype(np.float32)
+
+def stitch(text_ids: List[str], text_vecs: np.ndarray,
+           struct_ids: List[str], struct_vecs: np.ndarray,
+           key_ids: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+    """emb_stitched 재현: 정규화된 텍스트 + 구조화 벡터 ARRAY_CONCAT
+
+    key_ids가 없으면 텍스트/구조화 id의 UNION DISTINCT를 키로 사용한다.
+    한쪽 임베딩이 없는 키는 ARRAY_CONCAT(NULL, ...)과 같이 NaN 행이 된다.
+    """
+    text_norm = l2_normalize(text_vecs)
+    struct_norm = l2_normalize(zscore(struct_vecs)) if len(struct_ids) else np.zeros((0, 0), np.float32)
+
+    if key_ids is None:
+        key_ids = list(dict.fromkeys(list(text_ids) + list(struct_ids)))
+    else:
+        key_ids = list(dict.fromkeys(list(key_ids) + list(struct_ids)))
+
+    text_pos = {k: i for i, k in enumerate(text_ids)}
+    struct_pos = {k: i for i, k in enumerate(struct_ids)}
+    d_t = text_norm.shape[1] if text_norm.ndim == 2 else 0
+    d_s = struct_norm.shape[1] if struct_norm.ndim == 2 else 0
+
+    stitched = np.full((len(key_ids), d_t + d_s), np.nan, dtype=np.float32)
+    t_rows = np.array([text_pos.get(k, -1) for k in key_ids], dtype=np.int64)
+    s_rows = np.array([struct_pos.get(k, -1) for k in key_ids], dtype=np.int64)
+    both = (t_rows >= 0) & (s_rows >= 0)
+    stitched[both, :d_t] = text_norm[t_rows[both]]
+    stitched[both, d_t:] = struct_norm[s_rows[both]]
+    return key_ids, stitched
+
+def cosine_distance(embeddings: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """cosine_dist UDF 재현
+
+    UDF는 오프셋이 같은 원소끼리만 내적을 구하고(짧은 쪽 길이까지),
+    노름은 각 벡터 전체로 계산한다. 분모가 0이면 SAFE_DIVIDE와 같이 NaN.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+    common = min(embeddings.shape[1], query.shape[0])
+    dot = embeddings[:, :common] @ query[:common]
+    denom = np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings)) * np.sqrt(query @ query)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sim = np.where(denom > 0, dot / denom, np.nan)
+    return (1.0 - sim).astype(np.float32)
+
+def minmax_normalize(values: np.ndarray) -> np.ndarray:
+    """(d - MIN(d) OVER()) / NULLIF(MAX(d) OVER() - MIN(d) OVER(), 0)"""
+    values = np.asarray(values, dtype=np.float32)
+    finite = values[~np.isnan(values)]
+    if finite.size == 0:
+        return np.full_like(values, np.nan)
+    lo, hi = finite.min(), finite.max()
+    if hi - lo == 0:
+        return np.full_like(values, np.nan)
+    return ((values - lo) / (hi - lo)).astype(np.float32)
+
+def rule_scores(bodies: List[Optional[str]], rules: RuleSet = REPORT_RULES) -> np.ndarray:
+    """IF(REGEXP_CONTAINS(body, r'(불일치|모순|상이|다름)'), 1.0, 0.0) - body가 NULL이면 0.0
+
+    행마다 정규식을 돌리지 않고 컴파일된 규칙 집합으로 배치 단위 채점한다.
+    """
+    return rules.score(bodies).scores
+
+class LocalORIEngine:
+    """인프로세스 ORI 계산기 (mode: local)"""
+
+    def __init__(self, weight: float = 0.7, threshold: float = 0.3, rules: RuleSet = REPORT_RULES):
+        self.weight = weight
+        self.threshold = threshold
+        self.rules = rules
+
+    def score(self, corpus: LocalCorpus) -> ORIResult:
+        """report_ori 뷰와 같은 ori/predict/semantic_distance/rule_score 계산"""
+        d = cosine_distance(corpus.embeddings, corpus.query)
+        dz = minmax_normalize(d)
+        matched = self.rules.score(corpus.bodies)
+        rule = matched.scores
+
+        w = np.float32(self.weight)
+        ori = w * dz + (np.float32(1.0) - w) * (np.float32(1.0) - rule)
+        # NULL ori는 CASE WHEN에서 거짓 -> 0
+        with np.errstate(invalid='ignore'):
+            predict = (ori >= np.float32(self.threshold)).astype(np.int64)
+
+        # ORDER BY ori DESC (NULL은 마지막)
+        order = np.argsort(-ori, kind='stable')
+        return ORIResult(
+            ids=[corpus.keys[i] for i in order],
+            ori=ori[order],
+            predict=predict[order],
+            semantic_distance=dz[order],
+            rule_score=rule[order],
+            bodies=[corpus.bodies[i] for i in order],
+            rule_hits=matched.hit_counts,
+        )
+
+TABLE_SUFFIXES = (".csv", ".parquet", ".jsonl")
+
+def table_path(data_dir: str, table: str) -> Optional[Path]:
+    """로컬 테이블 경로 - <table>.csv/.parquet/.jsonl 또는 synth 샤드 디렉터리 <table>/part-* (없으면 None)"""
+    data_path = Path(data_dir)
+    for suffix in TABLE_SUFFIXES:
+        if (data_path / f"{table}{suffix}").exists():
+            return data_path / f"{table}{suffix}"
+    shards = data_path / table
+    if shards.is_dir() and any(shards.glob("part-*")):
+        return shards
+    return None
+
+def _read_table(data_dir: str, table: str) -> List[Dict[str, str]]:
+    """로컬 테이블 전체 행 (CSV 값과 같도록 id는 문자열)"""
+    from ingest import read_chunks
+    path = table_path(data_dir, table)
+    if path is None:
+        raise FileNotFoundError(f"로컬 테이블이 없습니다: {Path(data_dir) / table}.csv (또는 .parquet, {table}/part-*)")
+    rows = []
+    for chunk in read_chunks(str(path)):
+        for row in chunk:
+            row["id"] = str(row["id"])
+            rows.append(row)
+    return rows
+
+def _read_store(path: Path) -> Tuple[List[str], np.ndarray]:
+    """EmbeddingStore 로드 (적재로 같은 id가 다시 추가되었으면 마지막 행 사용)"""
+    from embedding_store import EmbeddingStore
+    store = EmbeddingStore.open(str(path))
+    ids = store.ids
+    latest = {k: i for i, k in enumerate(ids)}
+    if len(latest) == len(ids):
+        return ids, np.asarray(store.vectors, dtype=np.float32)
+    rows = sorted(latest.values())
+    return [ids[i] for i in rows], np.asarray(store.vectors[rows], dtype=np.float32)
+
+def load_text_vectors(data_dir: str = "data/sample") -> Tuple[List[str], np.ndarray]:
+    """텍스트 임베딩 로드 (text_embeddings.store가 있으면 CSV 대신 사용 - ingest가 만들 때 CSV 행을 포함)"""
+    data_path = Path(data_dir)
+    # 바이너리 저장소가 있으면 우선 사용 (CSV 문자열 벡터 파싱 생략)
+    store_path = data_path / "text_embeddings.store"
+    if (store_path / "header.json").exists():
+        return _read_store(store_path)
+    text_rows = _read_table(data_dir, "text_embeddings")
+    return [row['id'] for row in text_rows], \
+        np.array([parse_vector(row['embedding']) for row in text_rows], dtype=np.float32)
+
+def load_struct_features(data_dir: str = "data/sample") -> Tuple[List[str], np.ndarray]:
+    """구조화 특징(f1, f2, f3) 로드 (struct_embeddings.store가 있으면 CSV 대신 사용 - ingest가 만들 때 CSV 행을 포함)"""
+    data_path = Path(data_dir)
+    store_path = data_path / "struct_embeddings.store"
+    if (store_path / "header.json").exists():
+        return _read_store(store_path)
+    struct_rows = _read_table(data_dir, "feat_struct")
+    return [row['id'] for row in struct_rows], \
+        np.array([[float(row['f1']), float(row['f2']), float(row['f3'])] for row in struct_rows],
+                 dtype=np.float32).reshape(len(struct_rows), 3)
+
+def load_local_corpus(data_dir: str = "data/sample", query_id: str = DEFAULT_QUERY_ID) -> LocalCorpus:
+    """로컬 테이블(raw_texts, text_embeddings, feat_struct)에서 ORI 입력 구성
+
+    테이블은 CSV 외에 Parquet, synth가 나눠 쓴 <table>/part-* 샤드도 읽는다.
+
+    emb_stitched.store(증분 스티칭 결과)가 있으면 스티칭을 다시 하지 않고 그 벡터를 쓴다.
+    """
+    data_path = Path(data_dir)
+
+    texts = _read_table(data_dir, "raw_texts")
+    bodies_by_id = {row['id']: row.get('body') for row in texts}
+    text_ids, text_vecs = load_text_vectors(data_dir)
+
+    struct_ids, struct_vecs = load_struct_features(data_dir)
+    if (data_path / "emb_stitched.store" / "header.json").exists():
+        from stitching import load_stitched
+        keys = list(dict.fromkeys([row['id'] for row in texts] + list(struct_ids)))
+        stitched = load_stitched(data_dir, keys)
+    else:
+        keys, stitched = stitch(text_ids, text_vecs, struct_ids, struct_vecs, key_ids=[row['id'] for row in texts])
+
+    if query_id not in text_ids:
+        raise ValueError(f"질의 벡터 id를 찾을 수 없습니다: {query_id}")
+    query = l2_normalize(text_vecs[[text_ids.index(query_id)]])[0]
+
+    logger.info(f"로컬 코퍼스 로드: {len(keys)}건, 차원 {stitched.shape[1]}")
+    return LocalCorpus(
+        keys=keys,
+        embeddings=stitched,
+        bodies=[bodies_by_id.get(k) for k in keys],
+        query=query,
+    )
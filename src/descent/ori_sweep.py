@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Descent ORI Sweep
+dz·rule_score를 한 번 계산한 뒤 (w, tau) 격자 전체를 NumPy 브로드캐스팅으로 평가
+"""
+
+import csv
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from ori_local import LocalCorpus, cosine_distance, minmax_normalize, rule_scores
+
+logger = logging.getLogger(__name__)
+
+# eval_metrics 뷰의 라벨과 동일
+DEFAULT_LABELS: Dict[str, int] = {"A100": 1, "A200": 1, "A300": 1, "B100": 0, "B200": 0, "C100": 0}
+
+@dataclass
+class SweepResult:
+    """격자 평가 결과 - 각 지표는 (len(weights), len(thresholds)) 행렬"""
+    weights: np.ndarray
+    thresholds: np.ndarray
+    accuracy: np.ndarray
+    precision: np.ndarray
+    recall: np.ndarray
+    f1: np.ndarray
+    labeled: int  # 라벨이 있는 행 수
+
+    def rows(self) -> List[Dict[str, float]]:
+        """격자 점 목록 (w, tau, 지표)"""
+        out = []
+        for i, w in enumerate(self.weights):
+            for j, tau in enumerate(self.thresholds):
+                out.append({
+                    "w": float(w), "tau": float(tau),
+                    "accuracy": float(self.accuracy[i, j]),
+                    "precision": float(self.precision[i, j]),
+                    "recall": float(self.recall[i, j]),
+                    "f1": float(self.f1[i, j]),
+                })
+        return out
+
+    def best(self, metric: str = "f1") -> Dict[str, float]:
+        """지표 최댓값 격자 점"""
+        values = getattr(self, metric)
+        i, j = np.unravel_index(np.argmax(values), values.shape)
+        return {"w": float(self.weights[i]), "tau": float(self.thresholds[j]),
+                "accuracy": float(self.accuracy[i, j]), "precision": float(self.precision[i, j]),
+                "recall": float(self.recall[i, j]), "f1": float(self.f1[i, j])}
+
+    def pareto_front(self) -> List[Dict[str, float]]:
+        """precision·recall 기준 비지배(Pareto) 격자 점 (recall 오름차순)"""
+        points = self.rows()
+        # recall 내림차순, precision 내림차순으로 훑으며 precision 최댓값 갱신 시에만 채택
+        points.sort(key=lambda p: (-p["recall"], -p["precision"]))
+        front, best_precision = [], -1.0
+        for p in points:
+            if p["precision"] > best_precision:
+                front.append(p)
+                best_precision = p["precision"]
+        return front[::-1]
+
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), 0.0)
+
+def sweep(dz: np.ndarray, rule: np.ndarray, y: np.ndarray, weights: Sequence[float],
+          thresholds: Sequence[float], max_cells: int = 32_000_000) -> SweepResult:
+    """격자 평가
+
+    ori = w·dz + (1-w)·(1-rule_score), predict = ori >= tau (dz가 NULL이면 0).
+    y는 라벨 배열(라벨 없음은 NaN)이며 지표 정의는 eval_metrics 뷰와 같다:
+    accuracy는 전체 행 기준, precision 분모는 라벨 없는 예측 양성도 포함한다.
+    (W, T, 행) 불리언 텐서가 max_cells를 넘지 않도록 행을 청크로 나눠 누적한다.
+    """
+    dz = np.asarray(dz, dtype=np.float32)
+    rule = np.asarray(rule, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float64)
+    positive = y == 1
+    negative = y == 0
+    w = np.asarray(weights, dtype=np.float32)[:, None, None]
+    tau = np.asarray(thresholds, dtype=np.float32)[None, :, None]
+    shape = (w.shape[0], tau.shape[1])
+
+    tp = np.zeros(shape, dtype=np.int64)
+    fp_labeled = np.zeros(shape, dtype=np.int64)
+    pred_pos = np.zeros(shape, dtype=np.int64)
+    chunk = max(1, max_cells // (shape[0] * shape[1]))
+    for start in range(0, len(dz), chunk):
+        stop = start + chunk
+        d = dz[start:stop][None, None, :]
+        r = (np.float32(1.0) - rule[start:stop])[None, None, :]
+        with np.errstate(invalid="ignore"):
+            pred = (w * d + (np.float32(1.0) - w) * r) >= tau
+        pred_pos += pred.sum(axis=2)
+        tp += pred[:, :, positive[start:stop]].sum(axis=2)
+        fp_labeled += pred[:, :, negative[start:stop]].sum(axis=2)
+
+    n = len(y)
+    actual_pos = int(positive.sum())
+    correct = tp + (int(negative.sum()) - fp_labeled)
+    return SweepResult(
+        weights=np.asarray(weights, dtype=np.float64),
+        thresholds=np.asarray(thresholds, dtype=np.float64),
+        accuracy=_safe_div(correct, np.full(shape, n)),
+        precision=_safe_div(tp, pred_pos),
+        recall=_safe_div(tp, np.full(shape, actual_pos)),
+        f1=_safe_div(2 * tp, pred_pos + actual_pos),
+        labeled=int((positive | negative).sum()),
+    )
+
+def sweep_corpus(corpus: LocalCorpus, weights: Sequence[float], thresholds: Sequence[float],
+                 labels: Mapping[str, int] = DEFAULT_LABELS) -> SweepResult:
+    """로컬 코퍼스에서 dz·rule_score를 한 번 계산한 뒤 격자 평가"""
+    dz = minmax_normalize(cosine_distance(corpus.embeddings, corpus.query))
+    rule = rule_scores(corpus.bodies)
+    nan = float("nan")
+    y = np.array([labels.get(key, nan) for key in corpus.keys], dtype=np.float64)
+    if np.isnan(y).all():
+        raise ValueError("라벨이 있는 행이 없습니다")
+    logger.info(f"ORI 스윕: 격자 {len(weights)}x{len(thresholds)}, {len(y)}건 (라벨 {int((~np.isnan(y)).sum())}건)")
+    return sweep(dz, rule, y, weights, thresholds)
+
+def load_labels_csv(path: str) -> Dict[str, int]:
+    """라벨 CSV(id,y) 로드"""
+    with open(path, encoding="utf-8", newline="") as f:
+        return {row["id"]: int(float(row["y"])) for row in csv.DictReader(f)}
+
+def save_sweep_csv(result: SweepResult, path: str):
+    """격자 결과 CSV 저장"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["w", "tau", "accuracy", "precision", "recall", "f1"])
+        writer.writeheader()
+        writer.writerows(result.rows())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Descent Quantization
+stitched 벡터 압축 (차원별 int8 스칼라 양자화, 학습된 코드북의 곱 양자화)과
+룩업 테이블 기반 비대칭 거리(float 질의 vs 코드) 및 원본 벡터 재순위
+"""
+
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ann_index import _normalize, exact_search
+
+logger = logging.getLogger(__name__)
+
+QUANT_VERSION = 1
+
+def _kmeans_l2(sample: np.ndarray, k: int, iterations: int, rng: np.random.Generator,
+               block: int = 65536) -> np.ndarray:
+    """유클리드 k-means (argmin ||x-c||² = argmax x·c - ||c||²/2)"""
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign_l2(sample, centroids, block)
+        counts = np.bincount(labels, minlength=k)
+        # np.add.at보다 빠른 정렬 후 구간 합
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+        if empty.any():
+            # 빈 센트로이드는 임의 표본으로 재시작
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            counts[empty] = 1
+        centroids = (sums / counts[:, None]).astype(np.float32)
+    return centroids
+
+def _assign_l2(vectors: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        sims = vectors[start:start + block] @ centroids.T - half_norms
+        labels[start:start + block] = sims.argmax(axis=1)
+    return labels
+
+class ScalarQuantizer:
+    """차원별 int8 스칼라 양자화 (x ≈ offset + scale·code, code ∈ [-127, 127])
+
+    float64 대비 8배, float32 대비 4배 작다. 내적은 q·offset + code·(q·scale)로
+    코드를 복원하지 않고 계산한다.
+    """
+
+    codec = "int8"
+
+    def __init__(self, offset: np.ndarray, scale: np.ndarray):
+        self.offset = np.asarray(offset, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return len(self.offset)
+
+    @property
+    def code_size(self) -> int:
+        return self.dim
+
+    @classmethod
+    def train(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        lo, hi = vectors.min(axis=0), vectors.max(axis=0)
+        scale = (hi - lo) / 254.0
+        scale[scale == 0] = 1.0
+        return cls((hi + lo) / 2.0, scale)
+
+    def encode(self, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        codes = np.empty((len(vectors), self.dim), dtype=np.int8)
+        for start in range(0, len(vectors), block):
+            chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+            codes[start:start + block] = np.clip(np.rint((chunk - self.offset) / self.scale), -127, 127)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + codes.astype(np.float32) * self.scale
+
+    def lookup_table(self, query: np.ndarray) -> Tuple[np.ndarray, float]:
+        """질의별 사전 계산 (스케일된 질의, 상수항)"""
+        query = np.asarray(query, dtype=np.float32)
+        return query * self.scale, float(query @ self.offset)
+
+    def scores(self, table: Tuple[np.ndarray, float], codes: np.ndarray, block: int = 65536) -> np.ndarray:
+        """코드 행렬과 질의의 근사 내적"""
+        scaled, bias = table
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):
+            out[start:start + block] = codes[start:start + block].astype(np.float32) @ scaled
+        return out + bias
+
+    def save(self, out: Path):
+        np.save(out / "sq_offset.npy", self.offset)
+        np.save(out / "sq_scale.npy", self.scale)
+
+    @classmethod
+    def load(cls, src: Path) -> "ScalarQuantizer":
+        return cls(np.load(src / "sq_offset.npy"), np.load(src / "sq_scale.npy"))
+
+class ProductQuantizer:
+    """곱 양자화 - 벡터를 m개 서브벡터로 나눠 서브공간별 ksub(≤256)개 코드북으로 인코딩
+
+    벡터당 m바이트이므로 768차원 float64 기준 m=192면 32배, m=96이면 64배 작다.
+    질의마다 (m, ksub) 내적 테이블을 만들고 코드로 조회해 더하는 비대칭 거리(ADC)를 쓴다.
+    """
+
+    codec = "pq"
+
+    def __init__(self, codebooks: np.ndarray):
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)  # (m, ksub, dsub)
+
+    @property
+    def m(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def ksub(self) -> int:
+        return self.codebooks.shape[1]
+
+    @property
+    def dsub(self) -> int:
+        return self.codebooks.shape[2]
+
+    @property
+    def dim(self) -> int:
+        return self.m * self.dsub
+
+    @property
+    def code_size(self) -> int:
+        return self.m
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, m: int, ksub: int = 256, iterations: int = 20,
+              max_train: int = 65536, seed: int = 42) -> "ProductQuantizer":
+        """서브공간별 k-means로 코드북 학습 (표본 최대 max_train개)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        if dim % m != 0:
+            raise ValueError(f"차원({dim})이 서브벡터 수 m({m})로 나누어떨어지지 않습니다")
+        if not 1 <= ksub <= 256:
+            raise ValueError(f"ksub는 1~256이어야 합니다: {ksub}")
+        if n < ksub:
+            raise ValueError(f"학습 벡터 수({n})가 ksub({ksub})보다 적습니다")
+
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, max_train, replace=False)] if n > max_train else vectors
+        dsub = dim // m
+        start = time.time()
+        codebooks = np.stack([
+            _kmeans_l2(np.ascontiguousarray(sample[:, j * dsub:(j + 1) * dsub]), ksub, iterations, rng)
+            for j in range(m)
+        ])
+        logger.info(f"PQ 코드북 학습: m={m}, ksub={ksub}, 표본 {len(sample)}건, {time.time() - start:.2f}초")
+        return cls(codebooks)
+
+    def encode(self, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), block):
+            chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+            for j in range(self.m):
+                sub = chunk[:, j * self.dsub:(j + 1) * self.dsub]
+                codes[start:start + block, j] = _assign_l2(sub, self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.codebooks[np.arange(self.m), codes.astype(np.int64)].reshape(len(codes), self.dim)
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        """(m, ksub) 서브벡터 내적 테이블"""
+        query = np.asarray(query, dtype=np.float32).reshape(self.m, 1, self.dsub)
+        return (self.codebooks * query).sum(axis=2)
+
+    def scores(self, table: np.ndarray, codes: np.ndarray, block: int = 65536) -> np.ndarray:
+        """테이블 조회 합으로 근사 내적 계산 (평탄화한 테이블에 서브공간 오프셋을 더해 한 번에 조회)"""
+        flat = table.ravel()
+        offsets = np.arange(self.m, dtype=np.int64) * self.ksub
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):
+            chunk = codes[start:start + block].astype(np.int64) + offsets
+            out[start:start + block] = flat[chunk].sum(axis=1)
+        return out
+
+    def save(self, out: Path):
+        np.save(out / "pq_codebooks.npy", self.codebooks)
+
+    @classmethod
+    def load(cls, src: Path) -> "ProductQuantizer":
+        return cls(np.load(src / "pq_codebooks.npy"))
+
+def default_subvectors(dim: int) -> int:
+    """서브벡터당 4차원에 가장 가까운 m (dim의 약수)"""
+    return next(m for m in range(max(1, dim // 4), 0, -1) if dim % m == 0)
+
+def load_quantizer(codec: str, src: Path):
+    if codec == "int8":
+        return ScalarQuantizer.load(src)
+    if codec == "pq":
+        return ProductQuantizer.load(src)
+    raise ValueError(f"지원하지 않는 코덱: {codec}")
+
+def rerank_exact(query: np.ndarray, rows: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """후보 행을 원본 벡터(mmap 가능)로 다시 점수 매겨 top-k -> (행 번호, 코사인 유사도)
+
+    query는 정규화되어 있어야 한다. 원본 읽기는 후보 행만큼만 일어난다.
+    """
+    order = np.argsort(rows)  # 디스크 순서로 읽기
+    sims = np.empty(len(rows), dtype=np.float32)
+    sims[order] = _normalize(np.asarray(vectors[rows[order]], dtype=np.float32)) @ query
+    sims = np.nan_to_num(sims, nan=-np.inf)
+    k = min(k, len(rows))
+    top = np.argpartition(-sims, k - 1)[:k]
+    top = top[np.argsort(-sims[top], kind='stable')]
+    return rows[top], sims[top]
+
+class QuantizedIndex:
+    """양자화된 전수 검색 인덱스 (코드만 메모리에 두고 원본은 재순위 때만 읽음)
+
+    codes[i]는 원본 행 row_ids[i]의 코드이며, NaN 행은 인덱싱하지 않는다.
+    """
+
+    def __init__(self, quantizer, codes: np.ndarray, row_ids: np.ndarray, keys: List[str]):
+        self.quantizer = quantizer
+        self.codes = codes
+        self.row_ids = row_ids
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+    def compression_ratio(self, source_dtype=np.float64) -> float:
+        """원본(source_dtype) 대비 코드 크기 비율"""
+        return self.quantizer.dim * np.dtype(source_dtype).itemsize / self.quantizer.code_size
+
+    @classmethod
+    def build(cls, keys: Sequence[str], vectors: np.ndarray, codec: str = "pq", m: Optional[int] = None,
+              ksub: int = 256, iterations: int = 20, seed: int = 42, block: int = 65536) -> "QuantizedIndex":
+        """코사인용으로 정규화한 뒤 학습·인코딩 (pq의 m 기본값: 서브벡터당 약 4차원)"""
+        vectors = np.asarray(vectors)
+        valid = ~np.isnan(vectors).any(axis=1)
+        row_ids = np.flatnonzero(valid)
+        data = _normalize(vectors[valid])
+        start = time.time()
+        if codec == "int8":
+            quantizer = ScalarQuantizer.train(data)
+        elif codec == "pq":
+            quantizer = ProductQuantizer.train(data, m or default_subvectors(data.shape[1]), ksub=ksub,
+                                               iterations=iterations, seed=seed)
+        else:
+            raise ValueError(f"지원하지 않는 코덱: {codec}")
+        codes = quantizer.encode(data, block)
+        index = cls(quantizer, codes, row_ids, list(keys))
+        logger.info(f"양자화 인덱스 생성: {len(row_ids)}건, codec={codec}, 벡터당 {quantizer.code_size}바이트 "
+                    f"(float64 대비 {index.compression_ratio():.0f}배), {time.time() - start:.2f}초")
+        return index
+
+    def search(self, query: np.ndarray, k: int = 10, rerank: int = 0,
+               vectors: Optional[np.ndarray] = None) -> Tuple[List[str], np.ndarray]:
+        """top-k 검색 -> (키 목록, 코사인 거리)
+
+        rerank > 0이고 vectors(원본, 행 순서는 build 입력과 동일)가 주어지면 근사 상위
+        k·rerank개를 원본으로 다시 계산해 top-k를 고른다.
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+        scores = self.quantizer.scores(self.quantizer.lookup_table(query), self.codes)
+        if len(scores) == 0:
+            return [], np.empty(0, dtype=np.float32)
+        shortlist = min(len(scores), k * rerank if rerank > 0 and vectors is not None else k)
+        top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+        if rerank > 0 and vectors is not None:
+            rows, sims = rerank_exact(query, self.row_ids[top], vectors, k)
+        else:
+            top = top[np.argsort(-scores[top], kind='stable')]
+            rows, sims = self.row_ids[top], scores[top]
+        return [self.keys[r] for r in rows], (1.0 - sims).astype(np.float32)
+
+    def save(self, path: str):
+        """디렉터리에 저장 (.npy + meta.json + keys.txt)"""
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        np.save(out / "codes.npy", np.ascontiguousarray(self.codes))
+        np.save(out / "row_ids.npy", np.ascontiguousarray(self.row_ids))
+        self.quantizer.save(out)
+        with open(out / "keys.txt", "w", encoding="utf-8") as f:
+            for key in self.keys:
+                f.write(f"{key}\n")
+        meta = {
+            "version": QUANT_VERSION,
+            "codec": self.quantizer.codec,
+            "dim": self.quantizer.dim,
+            "code_size": self.quantizer.code_size,
+            "size": len(self),
+            "metric": "cosine",
+        }
+        with open(out / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"양자화 인덱스 저장 완료: {out}")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "QuantizedIndex":
+        src = Path(path)
+        with open(src / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("version") != QUANT_VERSION:
+            raise ValueError(f"지원하지 않는 양자화 인덱스 버전: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        with open(src / "keys.txt", encoding="utf-8") as f:
+            keys = [line.rstrip("\n") for line in f]
+        return cls(
+            quantizer=load_quantizer(meta["codec"], src),
+            codes=np.load(src / "codes.npy", mmap_mode=mode),
+            row_ids=np.load(src / "row_ids.npy", mmap_mode=mode),
+            keys=keys,
+        )
+
+def quantization_report(index: QuantizedIndex, vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                        reranks: Sequence[int] = (0, 2, 4, 8)) -> List[Dict[str, float]]:
+    """재순위 배수별 recall@k 및 지연시간(전수 float 검색 대비)"""
+    truth = exact_search(vectors, queries, k)
+    truth_keys = [{index.keys[r] for r in row} for row in truth]
+
+    report = []
+    for rerank in reranks:
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth_keys):
+            start = time.perf_counter()
+            found, _ = index.search(query, k=k, rerank=rerank, vectors=vectors)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            hits += len(expected.intersection(found))
+        report.append({
+            "codec": index.quantizer.codec,
+            "rerank": int(rerank),
+            "k": int(k),
+            "bytes_per_vector": index.quantizer.code_size,
+            "compression_vs_float64": index.compression_ratio(),
+            "recall_at_k": hits / max(1, sum(len(t) for t in truth_keys)),
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+        })
+        logger.info(f"rerank={rerank}: recall@{k}={report[-1]['recall_at_k']:.3f}, "
+                    f"p50={report[-1]['latency_ms_p50']:.2f}ms")
+    return report
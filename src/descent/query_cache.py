@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Descent Query Result Cache
+(렌더링된 SQL, 원천 테이블 최종 수정 시각) 키 기반 Parquet 쿼리 결과 캐시 (TTL + 용량 제한)
+"""
+
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# `project.dataset.table` 형식의 테이블 참조
+TABLE_REF = re.compile(r"`([\w-]+\.[\w-]+\.[\w$-]+)`")
+
+def referenced_tables(sql: str) -> List[str]:
+    """SQL에서 백틱으로 감싼 완전한 테이블 이름 추출 (등장 순서, 중복 제거)"""
+    return list(dict.fromkeys(TABLE_REF.findall(sql)))
+
+def source_versions(client, sql: str, max_depth: int = 3) -> Dict[str, str]:
+    """SQL이 읽는 원천 테이블별 최종 수정 시각
+
+    뷰(report_ori 등)는 정의의 수정 시각이 아니라 뷰 쿼리가 읽는 테이블까지
+    따라가 수정 시각을 모은다. 메타데이터 조회(get_table)만 사용한다.
+    """
+    versions: Dict[str, str] = {}
+    seen: Set[str] = set()
+
+    def visit(query: str, depth: int):
+        for ref in referenced_tables(query):
+            if ref in seen:
+                continue
+            seen.add(ref)
+            table = client.get_table(ref)
+            versions[ref] = table.modified.isoformat() if table.modified else ""
+            view_query = getattr(table, "view_query", None)
+            if view_query and depth < max_depth:
+                visit(view_query, depth + 1)
+
+    visit(sql, 0)
+    return versions
+
+def cache_key(sql: str, versions: Dict[str, str]) -> str:
+    """정규화한 SQL 텍스트 + 원천 수정 시각 -> 캐시 키"""
+    normalized = " ".join(sql.split())
+    payload = json.dumps({"sql": normalized, "sources": sorted(versions.items())}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class QueryResultCache:
+    """디스크 쿼리 결과 캐시
+
+    결과 DataFrame은 <키>.parquet로, 메타데이터(생성·최근 접근 시각, 크기)는
+    index.json에 저장한다. ttl_seconds가 지난 항목은 조회 시 무효이며,
+    전체 크기가 max_bytes를 넘으면 최근 접근이 오래된 항목부터 지운다.
+    원천 테이블이 바뀌면 키 자체가 달라지므로 이전 항목은 자연히 밀려난다.
+    """
+
+    def __init__(self, directory: str = "artifacts/query_cache", ttl_seconds: Optional[float] = 86400,
+                 max_bytes: int = 1024 ** 3):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index_path = self.directory / "index.json"
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"캐시 인덱스를 읽을 수 없어 초기화합니다: {self._index_path}")
+            return {}
+        # 파일이 사라진 항목 정리
+        return {k: v for k, v in index.items() if (self.directory / f"{k}.parquet").exists()}
+
+    def _save_index(self):
+        tmp = self._index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2, ensure_ascii=False)
+        tmp.replace(self._index_path)
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry["created"] > self.ttl_seconds
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        (self.directory / f"{key}.parquet").unlink(missing_ok=True)
+
+    def get(self, key: str):
+        """캐시된 DataFrame (없거나 만료되면 None)"""
+        import pandas as pd
+
+        with self._lock:
+            entry = self._index.get(key)
+            now = time.time()
+            if entry is None or self._expired(entry, now):
+                if entry is not None:
+                    self._remove(key)
+                    self._save_index()
+                self.misses += 1
+                return None
+            entry["last_access"] = now
+            self._save_index()
+            self.hits += 1
+        return pd.read_parquet(self.directory / f"{key}.parquet")
+
+    def put(self, key: str, df, sql: str = ""):
+        """결과 저장 후 만료·용량 초과 항목 제거"""
+        path = self.directory / f"{key}.parquet"
+        tmp = path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(path)
+        now = time.time()
+        with self._lock:
+            self._index[key] = {"created": now, "last_access": now, "bytes": path.stat().st_size,
+                                "sql": " ".join(sql.split())[:200]}
+            self._evict(now)
+            self._save_index()
+
+    def _evict(self, now: float):
+        for key in [k for k, e in self._index.items() if self._expired(e, now)]:
+            self._remove(key)
+            self.evictions += 1
+        total = sum(e["bytes"] for e in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["bytes"]
+            self._remove(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "size_bytes": sum(e["bytes"] for e in self._index.values()),
+        }
+
+def cached_query(client, sql: str, cache: Optional[QueryResultCache],
+                 run: Optional[Callable[[str], Any]] = None):
+    """캐시 우선 쿼리 실행 -> DataFrame (cache가 None이면 항상 실행)"""
+    run = run or (lambda q: client.query(q).to_dataframe())
+    if cache is None:
+        return run(sql)
+    key = cache_key(sql, source_versions(client, sql))
+    df = cache.get(key)
+    if df is not None:
+        logger.info(f"[CACHE HIT] {key[:12]}")
+        return df
+    df = run(sql)
+    cache.put(key, df, sql)
+    return df
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Descent Ranking Metrics
+한 번의 정렬과 라벨 정렬(alignment)로 모든 K의 순위 지표를 계산
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+@dataclass
+class RankingMetrics:
+    """순위 지표 결과
+
+    라벨이 없는 문서는 DescentEvaluator의 기존 정의와 같이 P@K·nDCG@K·AP
+    계산에서 제외되고, MRR의 순위에는 포함된다.
+    """
+    precision_at_k: Dict[int, float] = field(default_factory=dict)
+    ndcg_at_k: Dict[int, float] = field(default_factory=dict)
+    recall_at_k: Dict[int, float] = field(default_factory=dict)
+    ap_at_k: Dict[int, float] = field(default_factory=dict)
+    mrr: float = 0.0
+    average_precision: float = 0.0
+
+def _discounts(n: int) -> np.ndarray:
+    return 1.0 / np.log2(np.arange(n, dtype=np.float64) + 2.0)
+
+def metrics_from_ranked_labels(ranked_labels: np.ndarray, ks: Sequence[int],
+                               total_relevant: Optional[int] = None,
+                               ideal_labels: Optional[np.ndarray] = None,
+                               mrr_label: Optional[float] = None) -> RankingMetrics:
+    """정렬된 순서의 라벨 배열(라벨 없음은 NaN)에서 모든 지표를 계산
+
+    total_relevant는 recall 분모이며, 없으면 배열 안의 관련 문서 수를 쓴다.
+    ideal_labels(전체 판정 라벨)가 주어지면 IDCG@K를 그 상위 K로 계산하고,
+    없으면 기존 정의대로 상위 K 안의 라벨을 재정렬해 계산한다.
+    mrr_label이 주어지면 MRR은 라벨이 그 값인 첫 문서 기준이고(평가기 정의는 y == 1),
+    없으면 y > 0인 첫 문서 기준이다.
+    """
+    y = np.asarray(ranked_labels, dtype=np.float64)
+    n_total = len(y)
+    labeled = ~np.isnan(y)
+    result = RankingMetrics()
+
+    # 라벨 있는 문서만의 순서 (nDCG/AP는 이 순서 기준)
+    y_valid = y[labeled]
+    relevant_valid = y_valid > 0
+    cum_labeled = np.cumsum(labeled)
+    cum_gain_y = np.cumsum(np.where(labeled, y, 0.0))
+    cum_relevant_valid = np.cumsum(relevant_valid)
+    cum_dcg = np.cumsum((2.0 ** y_valid - 1.0) * _discounts(len(y_valid)))
+    # 위치 i(라벨 있는 문서 기준)에서의 정밀도 x 관련 여부
+    precision_hits = np.where(relevant_valid, cum_relevant_valid / (np.arange(len(y_valid)) + 1.0), 0.0)
+    cum_precision_hits = np.cumsum(precision_hits)
+    binary = bool(np.isin(y_valid, (0.0, 1.0)).all())
+    cum_ideal_binary = np.cumsum(_discounts(len(y_valid)))
+    cum_ideal_global = None
+    if ideal_labels is not None:
+        ideal_sorted = np.sort(np.asarray(ideal_labels, dtype=np.float64))[::-1]
+        cum_ideal_global = np.cumsum((2.0 ** ideal_sorted - 1.0) * _discounts(len(ideal_sorted)))
+
+    if total_relevant is None:
+        total_relevant = int(relevant_valid.sum())
+
+    for k in ks:
+        n = min(k, n_total)
+        m = int(cum_labeled[n - 1]) if n > 0 else 0
+        if m == 0:
+            result.precision_at_k[k] = 0.0
+            result.ndcg_at_k[k] = 0.0
+            result.recall_at_k[k] = 0.0
+            result.ap_at_k[k] = 0.0
+            continue
+
+        result.precision_at_k[k] = float(cum_gain_y[n - 1] / m)
+
+        dcg = cum_dcg[m - 1]
+        if cum_ideal_global is not None:
+            idcg = cum_ideal_global[min(k, len(cum_ideal_global)) - 1] if len(cum_ideal_global) else 0.0
+        elif binary:
+            r = int(cum_relevant_valid[m - 1])
+            idcg = cum_ideal_binary[r - 1] if r > 0 else 0.0
+        else:
+            ideal = np.sort(y_valid[:m])[::-1]
+            idcg = float(((2.0 ** ideal - 1.0) * _discounts(m)).sum())
+        result.ndcg_at_k[k] = float(dcg / idcg) if idcg > 0 else 0.0
+
+        hits = int(cum_relevant_valid[m - 1])
+        result.recall_at_k[k] = hits / total_relevant if total_relevant else 0.0
+        result.ap_at_k[k] = float(cum_precision_hits[m - 1] / min(total_relevant, m)) if total_relevant else 0.0
+
+    first = np.flatnonzero(labeled & ((y == mrr_label) if mrr_label is not None else (y > 0)))
+    result.mrr = 1.0 / float(first[0] + 1) if len(first) else 0.0
+    result.average_precision = float(cum_precision_hits[-1] / total_relevant) if total_relevant and len(y_valid) else 0.0
+    return result
+
+def rank_and_align(ids: Sequence, scores: np.ndarray, labels: Mapping) -> np.ndarray:
+    """점수 내림차순(NaN은 마지막, 동점은 입력 순서) 정렬 후 라벨 배열 반환"""
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")
+    nan = float("nan")
+    return np.fromiter((labels.get(ids[i], nan) for i in order), dtype=np.float64, count=len(order))
+
+def compute_ranking_metrics(ids: Sequence, scores: np.ndarray, labels: Mapping,
+                            ks: Iterable[int] = (1, 3, 5, 10)) -> RankingMetrics:
+    """정렬 1회 + 라벨 정렬 1회로 P@K, nDCG@K, recall@K, AP@K, MRR, AP 계산"""
+    ranked = rank_and_align(list(ids), scores, labels)
+    return metrics_from_ranked_labels(ranked, list(ks), mrr_label=1.0)
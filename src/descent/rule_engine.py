@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Descent Rule Engine
+키워드 규칙(키워드 -> 점수, 우선순위)을 하나의 다중 패턴 매처로 컴파일해 본문을 배치 단위로 채점
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 65536
+MAX_RULES = 63  # 행별 매칭 규칙을 int64 비트마스크로 표현
+_SEPARATOR = "\x00"  # 배치 안 본문 경계 (키워드에 포함될 수 없음)
+_METACHARS = set(".^$*+?{}[]\\|()")
+
+@dataclass(frozen=True)
+class Rule:
+    """키워드 중 하나라도 본문에 포함되면 매칭 (REGEXP_CONTAINS(body, r'(k1|k2|...)')와 같음)"""
+    name: str
+    keywords: Tuple[str, ...]
+    score: float
+    priority: int = 0  # 여러 규칙이 매칭되면 높은 쪽 점수 (CASE WHEN 순서)
+
+    @classmethod
+    def from_regex(cls, name: str, pattern: str, score: float, priority: int = 0) -> "Rule":
+        """SQL의 r'(k1|k2|...)' 형태 리터럴 선택 패턴을 규칙으로 변환"""
+        body = pattern[1:-1] if pattern.startswith("(") and pattern.endswith(")") else pattern
+        keywords = tuple(body.split("|"))
+        if any(not k or any(c in _METACHARS for c in k) for k in keywords):
+            raise ValueError(f"리터럴 선택 패턴만 지원합니다: {pattern}")
+        return cls(name, keywords, score, priority)
+
+@dataclass
+class RuleScores:
+    """채점 결과 (rule은 선택된 규칙 번호, 매칭 없으면 -1)"""
+    scores: np.ndarray
+    rule: np.ndarray
+    hit_counts: Dict[str, int] = field(default_factory=dict)  # 규칙별 매칭 행 수 (우선순위 무관)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+class RuleSet:
+    """규칙 집합을 한 번 컴파일한 매처
+
+    배치의 본문을 구분자로 이어 붙여 코드포인트 배열로 바꾼 뒤, 키워드 첫 글자 표로
+    후보 위치를 한 번에 찾고 키워드별로 나머지 글자를 후보 위치에서만 벡터 비교한다.
+    행·규칙마다 정규식을 돌리지 않으며, 겹치는 키워드(예: '불일치' 안의 '일치')도
+    각각 찾으므로 규칙별 REGEXP_CONTAINS 결과와 같다.
+    """
+
+    def __init__(self, rules: Sequence[Rule], default_score: float = 0.0, name: str = "rules"):
+        if not rules:
+            raise ValueError("규칙이 없습니다")
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"규칙은 최대 {MAX_RULES}개입니다: {len(rules)}")
+        names = [r.name for r in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"규칙 이름이 중복되었습니다: {names}")
+        # 우선순위 내림차순 (같으면 선언 순서) - 번호가 작을수록 우선
+        self.rules: List[Rule] = sorted(rules, key=lambda r: -r.priority)
+        self.default_score = default_score
+        self.name = name
+        self._rule_scores = np.array([r.score for r in self.rules], dtype=np.float32)
+
+        literals = sorted({k for r in self.rules for k in r.keywords})
+        if not all(literals) or any(_SEPARATOR in k for k in literals):
+            raise ValueError("빈 키워드나 구분자 문자는 쓸 수 없습니다")
+        # 키워드 -> (코드포인트, 그 키워드를 가진 규칙 비트마스크)
+        self._literals = [
+            (np.array([ord(c) for c in literal], dtype=np.uint32),
+             np.int64(sum(1 << i for i, r in enumerate(self.rules) if literal in r.keywords)))
+            for literal in literals
+        ]
+        self._max_len = max(len(k) for k in literals)
+        self._first_chars = np.zeros(0x110000, dtype=np.bool_)
+        self._first_chars[[ord(k[0]) for k in literals]] = True
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> "RuleSet":
+        """{"name", "default_score", "rules": [{"name", "keywords" | "pattern", "score", "priority"}]}"""
+        rules = []
+        for r in spec["rules"]:
+            if "pattern" in r:
+                rules.append(Rule.from_regex(r["name"], r["pattern"], float(r["score"]), int(r.get("priority", 0))))
+            else:
+                rules.append(Rule(r["name"], tuple(r["keywords"]), float(r["score"]), int(r.get("priority", 0))))
+        return cls(rules, float(spec.get("default_score", 0.0)), spec.get("name", "rules"))
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "default_score": self.default_score,
+            "rules": [{"name": r.name, "keywords": list(r.keywords), "score": r.score, "priority": r.priority}
+                      for r in self.rules],
+        }
+
+    def to_sql(self, column: str = "body") -> str:
+        """같은 의미의 BigQuery CASE 식 (SQL 스크립트와 규칙을 맞출 때 사용)"""
+        whens = "\n".join(
+            f"  WHEN REGEXP_CONTAINS({column}, r'({'|'.join(r.keywords)})') THEN {r.score}"
+            for r in self.rules
+        )
+        return f"CASE\n{whens}\n  ELSE {self.default_score}\nEND"
+
+    def match_masks(self, bodies: Sequence[Optional[str]]) -> np.ndarray:
+        """행별 매칭 규칙 비트마스크 (NULL 본문은 매칭 없음)"""
+        texts = [body or "" for body in bodies]
+        if not texts:
+            return np.zeros(0, dtype=np.int64)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths + 1)  # 구분자 포함 각 행의 끝 위치
+        # 끝에 구분자를 덧붙여 후보 위치 + j가 배열을 넘지 않게 한다
+        joined = _SEPARATOR.join(texts) + _SEPARATOR * self._max_len
+        codes = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+        candidates = np.flatnonzero(self._first_chars[codes])
+        heads = codes[candidates]
+        rows = np.searchsorted(ends, candidates, side="right")
+        masks = np.zeros(len(texts), dtype=np.int64)
+        for literal, bits in self._literals:
+            keep = np.flatnonzero(heads == literal[0])
+            for j in range(1, len(literal)):
+                keep = keep[codes[candidates[keep] + j] == literal[j]]
+            # 같은 행이 여러 번 나와도 같은 값을 OR하므로 중복 인덱스 대입으로 충분
+            masks[rows[keep]] |= bits
+        return masks
+
+    def _score_masks(self, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rule = np.full(len(masks), -1, dtype=np.int64)
+        counts = np.zeros(len(self.rules), dtype=np.int64)
+        for i in reversed(range(len(self.rules))):
+            hit = (masks >> i) & 1 == 1
+            counts[i] = hit.sum()
+            rule[hit] = i
+        scores = np.where(rule >= 0, self._rule_scores[np.maximum(rule, 0)], np.float32(self.default_score))
+        return scores.astype(np.float32), rule, counts
+
+    def iter_scores(self, batches: Iterable[Sequence[Optional[str]]]) -> Iterator[RuleScores]:
+        """본문 배치 스트림을 채점 (배치마다 RuleScores, hit_counts는 해당 배치 기준)"""
+        for bodies in batches:
+            scores, rule, counts = self._score_masks(self.match_masks(bodies))
+            yield RuleScores(scores, rule, {r.name: int(c) for r, c in zip(self.rules, counts)})
+
+    def score(self, bodies: Sequence[Optional[str]], batch_rows: int = BATCH_ROWS) -> RuleScores:
+        """전체 본문 채점 (batch_rows개씩 이어 붙여 처리해 메모리 사용을 제한)"""
+        batches = (bodies[start:start + batch_rows] for start in range(0, len(bodies), batch_rows))
+        parts = list(self.iter_scores(batches))
+        totals = {r.name: sum(p.hit_counts[r.name] for p in parts) for r in self.rules}
+        if not parts:
+            return RuleScores(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64), totals)
+        return RuleScores(np.concatenate([p.scores for p in parts]),
+                          np.concatenate([p.rule for p in parts]), totals)
+
+# report_ori 뷰(create_reports.sql)의 rule_score
+DISCREPANCY_KEYWORDS = ("불일치", "모순", "상이", "다름")
+REPORT_RULES = RuleSet([Rule("discrepancy", DISCREPANCY_KEYWORDS, 1.0)], default_score=0.0, name="rule_score")
+
+# 12_ori_optimization.sql의 keyword_score
+KEYWORD_RULES = RuleSet([
+    Rule("discrepancy", ("불일치", "모순", "다름", "틀림", "잘못"), 0.8, priority=1),
+    Rule("agreement", ("일치", "동일", "같음", "정확"), 0.2, priority=0),
+], default_score=0.5, name="keyword_score")
+
+def iter_csv_batches(path: str, column: str = "body", id_column: str = "id",
+                     batch_rows: int = BATCH_ROWS) -> Iterator[Tuple[List[str], List[Optional[str]]]]:
+    """CSV를 batch_rows행씩 읽어 (id 목록, 본문 목록) 생성 (빈 본문은 NULL)
+
+    Parquet/JSONL 파일과 synth의 part-* 샤드 디렉터리도 같은 형식으로 읽는다.
+    """
+    from ingest import read_chunks
+
+    for rows in read_chunks(path, chunk_rows=batch_rows):
+        yield ([None if row.get(id_column) is None else str(row[id_column]) for row in rows],
+               [row.get(column) or None for row in rows])
+
+def load_ruleset(path: str) -> RuleSet:
+    """규칙 파일(.json/.yaml) 로드"""
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith((".yaml", ".yml")):
+        import yaml
+        return RuleSet.from_dict(yaml.safe_load(text))
+    return RuleSet.from_dict(json.loads(text))
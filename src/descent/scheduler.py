@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Descent Step Scheduler
+입력/출력 테이블로 선언된 파이프라인 단계를 DAG로 병렬 실행
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Step:
+    """파이프라인 단계 (inputs/outputs는 테이블·뷰 이름)"""
+    name: str
+    fn: Callable[[], object]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+
+@dataclass
+class StepTiming:
+    """단계 실행 기록 (초 단위, 스케줄 시작 기준)"""
+    name: str
+    status: str = "PENDING"  # PENDING, SUCCESS, ERROR, CANCELLED
+    start: Optional[float] = None
+    end: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+@dataclass
+class ScheduleReport:
+    """스케줄 실행 결과 및 크리티컬 패스 분석"""
+    timings: Dict[str, StepTiming]
+    dependencies: Dict[str, List[str]]
+    wall_time: float = 0.0
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_time: float = 0.0
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, t in self.timings.items() if t.status == "ERROR"]
+
+    def to_dict(self) -> Dict:
+        return {
+            "wall_time_s": round(self.wall_time, 3),
+            "critical_path": self.critical_path,
+            "critical_path_time_s": round(self.critical_path_time, 3),
+            "serial_time_s": round(sum(t.duration for t in self.timings.values()), 3),
+            "steps": {
+                name: {
+                    "status": t.status,
+                    "start_s": round(t.start, 3) if t.start is not None else None,
+                    "duration_s": round(t.duration, 3),
+                    "depends_on": self.dependencies[name],
+                    **({"error": t.error} if t.error else {}),
+                }
+                for name, t in self.timings.items()
+            },
+        }
+
+class StepFailedError(RuntimeError):
+    """하나 이상의 단계가 실패함"""
+
+    def __init__(self, report: ScheduleReport, errors: Dict[str, BaseException]):
+        self.report = report
+        self.errors = errors
+        super().__init__(f"단계 실패: {', '.join(errors)}")
+
+def build_dependencies(steps: Sequence[Step]) -> Dict[str, List[str]]:
+    """선언 순서 기준 의존성 도출
+
+    앞선 단계의 출력을 입력으로 읽거나(읽기-쓰기), 같은 대상을 쓰거나(쓰기-쓰기),
+    앞선 단계가 읽는 대상을 덮어쓰는(쓰기-읽기) 단계는 앞선 단계 뒤에 실행한다.
+    """
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"단계 이름이 중복되었습니다: {names}")
+
+    deps: Dict[str, List[str]] = {}
+    for i, step in enumerate(steps):
+        reads, writes = set(step.inputs), set(step.outputs)
+        deps[step.name] = [
+            prev.name for prev in steps[:i]
+            if set(prev.outputs) & (reads | writes) or set(prev.inputs) & writes
+        ]
+    return deps
+
+def _critical_path(timings: Dict[str, StepTiming], deps: Dict[str, List[str]], order: List[str]):
+    """의존성 경로 중 실행 시간 합이 가장 긴 경로"""
+    best: Dict[str, float] = {}
+    parent: Dict[str, Optional[str]] = {}
+    for name in order:
+        prev = max(deps[name], key=lambda d: best[d], default=None)
+        best[name] = timings[name].duration + (best[prev] if prev else 0.0)
+        parent[name] = prev
+    if not best:
+        return [], 0.0
+    tail = max(best, key=best.get)
+    path = []
+    node: Optional[str] = tail
+    while node is not None:
+        path.append(node)
+        node = parent[node]
+    return path[::-1], best[tail]
+
+class StepScheduler:
+    """의존성을 지키며 독립 단계를 워커 풀에서 동시에 실행
+
+    단계가 실패하면 그 단계에 (간접적으로) 의존하는 단계는 CANCELLED로
+    건너뛰고, 독립 단계는 계속 실행한 뒤 StepFailedError를 던진다.
+    """
+
+    def __init__(self, steps: Sequence[Step], max_workers: int = 4):
+        self.steps = {s.name: s for s in steps}
+        self.order = [s.name for s in steps]
+        self.dependencies = build_dependencies(steps)
+        self.max_workers = max(1, max_workers)
+
+    def run(self) -> ScheduleReport:
+        timings = {name: StepTiming(name) for name in self.order}
+        report = ScheduleReport(timings=timings, dependencies=self.dependencies)
+        errors: Dict[str, BaseException] = {}
+        origin = time.perf_counter()
+
+        def execute(name: str):
+            timings[name].start = time.perf_counter() - origin
+            try:
+                self.steps[name].fn()
+            finally:
+                timings[name].end = time.perf_counter() - origin
+
+        remaining = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while remaining or running:
+                for name in list(remaining):
+                    dep_status = [timings[d].status for d in self.dependencies[name]]
+                    if any(s in ("ERROR", "CANCELLED") for s in dep_status):
+                        timings[name].status = "CANCELLED"
+                        remaining.remove(name)
+                        logger.warning(f"[CANCELLED] {name}: 선행 단계 실패")
+                    elif all(s == "SUCCESS" for s in dep_status):
+                        running[pool.submit(execute, name)] = name
+                        remaining.remove(name)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        timings[name].status = "SUCCESS"
+                    else:
+                        timings[name].status = "ERROR"
+                        timings[name].error = str(error)
+                        errors[name] = error
+
+        report.wall_time = time.perf_counter() - origin
+        report.critical_path, report.critical_path_time = _critical_path(timings, self.dependencies, self.order)
+        logger.info(f"스케줄 완료: {report.wall_time:.2f}초 (크리티컬 패스 {' -> '.join(report.critical_path)}, "
+                    f"{report.critical_path_time:.2f}초)")
+        if errors:
+            raise StepFailedError(report, errors)
+        return report
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Descent SQL Scripts
+sql/*.sql의 읽기/쓰기 테이블을 파싱해 의존성 그래프를 만들고 StepScheduler로 병렬 실행
+"""
+
+import re
+import glob
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+from scheduler import ScheduleReport, Step, StepScheduler, build_dependencies
+from sql_templates import load_template, template_variables
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERN = "sql/[0-9]*.sql"
+
+# 문자열 리터럴과 주석 (테이블 이름 파싱 전에 공백으로 지움)
+_NOISE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|--[^\n]*|#[^\n]*|/\*.*?\*/", re.S)
+# 정규화 이름(project.dataset.table 또는 dataset.table)만 테이블로 본다 - 별칭·CTE는 백틱 없이 쓰임
+_TABLE = re.compile(r"`([^`\s]+\.[^`\s]+)`")
+_WRITE = re.compile(
+    r"\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP(?:ORARY)?\s+)?"
+    r"(?:SCHEMA|TABLE\s+FUNCTION|EXTERNAL\s+TABLE|SNAPSHOT\s+TABLE|MATERIALIZED\s+VIEW|TABLE|VIEW|MODEL|FUNCTION|"
+    r"(?:VECTOR\s+|SEARCH\s+)?INDEX)(?:\s+IF\s+NOT\s+EXISTS)?"
+    r"|INSERT(?:\s+INTO)?|UPDATE|DELETE(?:\s+FROM)?|MERGE(?:\s+INTO)?|TRUNCATE\s+TABLE"
+    r"|ALTER\s+(?:TABLE|VIEW|MATERIALIZED\s+VIEW)(?:\s+IF\s+EXISTS)?"
+    r"|DROP\s+(?:SCHEMA|TABLE|VIEW|MATERIALIZED\s+VIEW|MODEL|FUNCTION|(?:VECTOR\s+|SEARCH\s+)?INDEX)(?:\s+IF\s+EXISTS)?)"
+    r"\s+`([^`\s]+)`",
+    re.I,
+)
+# 벡터/검색 인덱스 이름은 보통 백틱 없이 쓴다
+_INDEX = re.compile(
+    r"\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?|DROP\s+)(?:VECTOR\s+|SEARCH\s+)?INDEX(?:\s+IF\s+(?:NOT\s+)?EXISTS)?"
+    r"\s+([A-Za-z_][\w.]*)",
+    re.I,
+)
+
+@dataclass
+class SqlScript:
+    """치환된 SQL 스크립트와 읽기/쓰기 대상"""
+    path: str
+    sql: str
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).stem
+
+def _table_name(identifier: str) -> str:
+    return identifier.lower()
+
+def _dataset(table: str) -> Optional[str]:
+    """project.dataset.table -> project.dataset (데이터셋 생성 스크립트 뒤에 오도록)"""
+    parts = table.split(".")
+    return ".".join(parts[:2]) if len(parts) == 3 else None
+
+def parse_tables(sql: str) -> Tuple[Set[str], Set[str]]:
+    """SQL에서 (읽는 테이블, 쓰는 테이블) 추출
+
+    문장 단위로 보며, 쓰는 문장(CREATE/INSERT/UPDATE/MERGE/ALTER/DROP ...)의 대상 외에
+    백틱으로 감싼 정규화 이름은 모두 읽기로 본다. 한 스크립트가 만든 뒤 읽는 테이블은
+    읽기에서 빼고, 테이블을 쓰거나 읽으면 그 데이터셋(CREATE SCHEMA 대상)도 읽는 것으로 본다.
+    """
+    text = _NOISE.sub(" ", sql)
+    reads: Set[str] = set()
+    writes: Set[str] = set()
+    for statement in text.split(";"):
+        targets = {_table_name(m.group(1)) for m in _WRITE.finditer(statement)}
+        targets |= {_table_name(m.group(1)) for m in _INDEX.finditer(statement)}
+        for m in _TABLE.finditer(statement):
+            name = _table_name(m.group(1))
+            if name not in targets and name not in writes:
+                reads.add(name)
+        writes |= targets
+    datasets = {_dataset(t) for t in reads | writes} - {None}
+    reads |= datasets - writes
+    return reads, writes
+
+def expand_paths(paths: Union[str, Iterable[str]] = DEFAULT_PATTERN) -> List[str]:
+    """glob 패턴 또는 파일 목록 -> 실행 순서(파일 이름 순) 목록"""
+    if isinstance(paths, str):
+        return sorted(glob.glob(paths), key=lambda p: Path(p).name)
+    return list(paths)
+
+def load_scripts(paths: Union[str, Iterable[str]] = DEFAULT_PATTERN,
+                 variables: Optional[Mapping[str, object]] = None) -> List[SqlScript]:
+    """SQL 파일을 치환하고 읽기/쓰기 테이블을 파싱"""
+    variables = variables if variables is not None else template_variables()
+    scripts = []
+    for path in expand_paths(paths):
+        sql = load_template(path).render(variables)
+        reads, writes = parse_tables(sql)
+        scripts.append(SqlScript(path, sql, reads, writes))
+    return scripts
+
+def build_steps(scripts: Sequence[SqlScript], execute: Callable[[SqlScript], object]) -> List[Step]:
+    """스크립트 -> StepScheduler 단계 (파일 순서가 선언 순서, 충돌하는 접근만 직렬화)"""
+    return [
+        Step(s.name, lambda s=s: execute(s), sorted(s.reads), sorted(s.writes))
+        for s in scripts
+    ]
+
+def waves(scripts: Sequence[SqlScript]) -> List[List[str]]:
+    """의존성 깊이별 스크립트 묶음 (같은 묶음은 동시에 실행 가능)"""
+    deps = build_dependencies(build_steps(scripts, lambda s: None))
+    level: Dict[str, int] = {}
+    for s in scripts:
+        level[s.name] = 1 + max((level[d] for d in deps[s.name]), default=-1)
+    grouped: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for name, lv in level.items():
+        grouped[lv].append(name)
+    return grouped
+
+def describe(scripts: Sequence[SqlScript]) -> str:
+    """실행 계획 요약 (단계별 병렬 묶음과 각 스크립트의 선행 스크립트)"""
+    deps = build_dependencies(build_steps(scripts, lambda s: None))
+    lines = []
+    for i, group in enumerate(waves(scripts), 1):
+        lines.append(f"[{i}] " + ", ".join(group))
+        for name in group:
+            if deps[name]:
+                lines.append(f"      {name} <- {', '.join(deps[name])}")
+    return "\n".join(lines)
+
+def run_scripts(scripts: Sequence[SqlScript], client, max_workers: int = 8,
+                on_done: Optional[Callable[[SqlScript, object], None]] = None) -> ScheduleReport:
+    """의존성을 지키며 스크립트를 최대 max_workers개씩 동시에 실행
+
+    실패한 스크립트에 의존하는 스크립트는 건너뛰고 StepFailedError를 던진다.
+    """
+    def execute(script: SqlScript):
+        job = client.query(script.sql)
+        job.result()
+        logger.info(f"[OK] {script.path} ({getattr(job, 'total_bytes_processed', None) or 0} bytes)")
+        if on_done is not None:
+            on_done(script, job)
+        return job
+
+    logger.info(f"SQL 스크립트 {len(scripts)}개 실행 (최대 {max_workers}개 동시)")
+    return StepScheduler(build_steps(scripts, execute), max_workers=max_workers).run()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Descent SQL Templates
+sql/*.sql 자리표시자(${GCP_PROJECT}, ${PROJECT}, ${BQ_DATASET}, ${DATASET}, 하드코딩된 descent_demo) 치환
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+# 스크립트마다 다르게 쓰인 이름 -> 표준 변수명
+ALIASES = {
+    "PROJECT": "GCP_PROJECT",
+    "PROJECT_ID": "GCP_PROJECT",
+    "GCP_PROJECT_ID": "GCP_PROJECT",
+    "DATASET": "BQ_DATASET",
+    "DATASET_ID": "BQ_DATASET",
+    "LOCATION": "BQ_LOCATION",
+}
+
+# 데이터셋 자리에 하드코딩된 이름 (`${GCP_PROJECT}.descent_demo.t` -> `${GCP_PROJECT}.${BQ_DATASET}.t`)
+LEGACY_DATASETS = ("descent_demo",)
+
+_PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+class SqlTemplateError(KeyError):
+    """치환할 값이 없는 자리표시자"""
+
+    def __str__(self):
+        return str(self.args[0]) if self.args else ""
+
+@dataclass(frozen=True)
+class SqlTemplate:
+    """컴파일된 SQL 템플릿 (리터럴 조각과 (변수명, 기본값) 조각의 나열)"""
+    parts: Tuple[Union[str, Tuple[str, Optional[str]]], ...]
+    name: str = "<sql>"
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(p[0] for p in self.parts if isinstance(p, tuple)))
+
+    def render(self, variables: Mapping[str, object]) -> str:
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            key, default = part
+            value = variables.get(key)
+            if value is None and default is not None:
+                value = default
+            if value is None:
+                raise SqlTemplateError(f"{self.name}: 템플릿 변수 {key}의 값이 없습니다")
+            out.append(str(value))
+        return "".join(out)
+
+def _normalize_legacy(source: str, legacy_datasets: Sequence[str]) -> str:
+    """백틱 식별자 안 데이터셋 자리의 하드코딩된 이름을 ${BQ_DATASET}로 바꿈"""
+    for dataset in legacy_datasets:
+        source = re.sub(rf"(`[^`.\s]+)\.{re.escape(dataset)}\.", r"\1.${BQ_DATASET}.", source)
+    return source
+
+@lru_cache(maxsize=256)
+def compile_template(source: str, name: str = "<sql>",
+                     legacy_datasets: Tuple[str, ...] = LEGACY_DATASETS) -> SqlTemplate:
+    """SQL 원문을 한 번만 파싱해 SqlTemplate으로 (같은 원문은 캐시에서 반환)"""
+    source = _normalize_legacy(source, legacy_datasets)
+    parts = []
+    pos = 0
+    for m in _PLACEHOLDER.finditer(source):
+        if m.start() > pos:
+            parts.append(source[pos:m.start()])
+        parts.append((ALIASES.get(m.group(1), m.group(1)), m.group(2)))
+        pos = m.end()
+    if pos < len(source):
+        parts.append(source[pos:])
+    return SqlTemplate(tuple(parts), name)
+
+@lru_cache(maxsize=256)
+def _load(path: str, mtime_ns: int, size: int) -> SqlTemplate:
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_template(f.read(), os.path.basename(path))
+
+def load_template(path: str) -> SqlTemplate:
+    """파일을 컴파일한 템플릿 (파일이 바뀌지 않았으면 다시 읽지 않음)"""
+    st = os.stat(path)
+    return _load(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+def template_variables(project: Optional[str] = None, dataset: Optional[str] = None,
+                       location: Optional[str] = None, **extra) -> Dict[str, object]:
+    """표준 변수 딕셔너리 (인자가 없으면 GCP_PROJECT/BQ_DATASET/BQ_LOCATION 환경변수)"""
+    variables: Dict[str, object] = {
+        "GCP_PROJECT": project or os.getenv("GCP_PROJECT"),
+        "BQ_DATASET": dataset or os.getenv("BQ_DATASET"),
+        "BQ_LOCATION": location or os.getenv("BQ_LOCATION"),
+    }
+    for key, value in extra.items():
+        variables[ALIASES.get(key, key)] = value
+    return variables
+
+def render_file(path: str, variables: Optional[Mapping[str, object]] = None) -> str:
+    """SQL 파일을 치환해 반환 (variables가 없으면 환경변수 기준)"""
+    return load_template(path).render(variables if variables is not None else template_variables())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Descent Incremental Stitching
+변경 로그에 기록된 키만 다시 스티칭하는 emb_stitched 증분 갱신 (BigQuery MERGE + 로컬 엔진)
+"""
+
+import fcntl
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from ori_local import l2_normalize, load_struct_features, load_text_vectors, table_path
+from struct_stats import StructNormalizer, stats_path
+
+logger = logging.getLogger(__name__)
+
+CHANGELOG_TABLE = "stitch_changelog"
+STITCHED_MODEL = "emb_stitched"
+
+# ---------------------------------------------------------------------------
+# BigQuery: 변경 로그 + MERGE SQL 생성
+# ---------------------------------------------------------------------------
+
+class StitchSQL:
+    """증분 스티칭 SQL 생성기
+
+    쓰기 단계(임베딩 MERGE, 구조화 특징 적재)가 바뀐 키를 stitch_changelog에
+    기록하고, merge_sql()은 로그에 있는 키만 rebuild_stitched.sql과 같은 정의로
+    다시 계산해 emb_stitched에 MERGE한다. 원천에서 사라진 키는 삭제한다.
+    로그를 남기지 않는 적재(수동 적재 등)로 생기거나 사라진 키는 MERGE 전에
+    id만 비교하는 reconcile_sql()로 보충한다.
+    """
+
+    def __init__(self, project_id: str, dataset_id: str):
+        self.table = f"{project_id}.{dataset_id}"
+
+    def changelog_ddl(self) -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS `{self.table}.{CHANGELOG_TABLE}` (
+            key STRING,
+            source STRING,
+            changed_at TIMESTAMP
+        );
+        """
+
+    def log_changes_sql(self, source: str, keys_sql: str, id_column: str = "id") -> str:
+        """keys_sql 결과의 id_column을 변경 키로 기록"""
+        return f"""
+        {self.changelog_ddl()}
+        INSERT INTO `{self.table}.{CHANGELOG_TABLE}` (key, source, changed_at)
+        SELECT DISTINCT {id_column}, '{source}', CURRENT_TIMESTAMP()
+        FROM ({keys_sql});
+        """
+
+    def reconcile_sql(self) -> str:
+        """로그 없이 바뀐 키(신규·삭제 키)를 id만 비교해 변경 로그에 기록"""
+        return self.log_changes_sql("reconcile", f"""
+            SELECT COALESCE(src.k, s.key) AS id
+            FROM (
+                SELECT id AS k FROM `{self.table}.raw_texts`
+                UNION DISTINCT
+                SELECT id FROM `{self.table}.feat_struct_vec`
+            ) src
+            FULL OUTER JOIN (SELECT key FROM `{self.table}.emb_stitched`) s ON s.key = src.k
+            WHERE s.key IS NULL OR src.k IS NULL
+        """)
+
+    def merge_sql(self, reconcile: bool = True) -> str:
+        """변경 로그의 키만 재스티칭 (스냅샷 시각까지의 로그를 소비)
+
+        reconcile이면 먼저 reconcile_sql()로 로그 없이 추가·삭제된 키를 기록해 같은 실행에서 반영한다.
+        """
+        return f"""
+        DECLARE snapshot TIMESTAMP;
+        {self.changelog_ddl()}
+        {self.reconcile_sql() if reconcile else ""}
+        SET snapshot = CURRENT_TIMESTAMP();
+        BEGIN TRANSACTION;
+
+        CREATE TEMP TABLE stitch_batch AS
+        SELECT DISTINCT key FROM `{self.table}.{CHANGELOG_TABLE}`
+        WHERE changed_at <= snapshot;
+
+        MERGE `{self.table}.emb_stitched` AS target
+        USING (
+            SELECT
+                b.key,
+                ARRAY_CONCAT(tn.embedding, sn.embedding) AS embedding,
+                (rt.id IS NOT NULL OR sv.id IS NOT NULL) AS present
+            FROM stitch_batch b
+            LEFT JOIN `{self.table}.emb_view_t_norm` tn ON tn.id = b.key
+            LEFT JOIN `{self.table}.feat_struct_vec_norm` sn ON sn.id = b.key
+            LEFT JOIN (SELECT DISTINCT id FROM `{self.table}.raw_texts`) rt ON rt.id = b.key
+            LEFT JOIN (SELECT DISTINCT id FROM `{self.table}.feat_struct_vec`) sv ON sv.id = b.key
+        ) AS source
+        ON target.key = source.key
+        WHEN MATCHED AND NOT source.present THEN
+        DELETE
+        WHEN MATCHED THEN
+        UPDATE SET embedding = source.embedding
+        WHEN NOT MATCHED AND source.present THEN
+        INSERT (key, embedding, alpha, beta) VALUES (source.key, source.embedding, 1.0, 0.5);
+
+        DELETE FROM `{self.table}.{CHANGELOG_TABLE}` WHERE changed_at <= snapshot;
+
+        COMMIT TRANSACTION;
+        """
+
+# ---------------------------------------------------------------------------
+# 로컬 엔진: 파일 변경 로그 + EmbeddingStore 부분 갱신
+# ---------------------------------------------------------------------------
+
+VectorSource = Callable[[Sequence[str]], Dict[str, np.ndarray]]
+
+class ChangeLog:
+    """로컬 스티칭 변경 로그 (JSONL, 한 줄에 {"key", "source"})
+
+    pending()은 읽은 위치(바이트)를 함께 돌려주고, commit()은 그 위치까지만
+    지우므로 스티칭 도중 추가된 로그는 다음 실행으로 넘어간다. commit()은 파일을
+    교체하므로 기록·커밋은 프로세스 간에도 <path>.lock의 flock으로 직렬화한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, mode: int = fcntl.LOCK_EX):
+        """스레드 잠금 + 잠금 파일 flock (로그 파일 자체는 commit에서 교체되므로 따로 둔다)"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock:
+                fcntl.flock(lock, mode)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def record(self, keys: Iterable[str], source: str):
+        lines = "".join(json.dumps({"key": k, "source": source}, ensure_ascii=False) + "\n" for k in keys)
+        if not lines:
+            return
+        with self._locked():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def pending(self) -> Tuple[Dict[str, Set[str]], int]:
+        """{키: 변경 원천} 및 읽은 위치"""
+        if not self.path.exists():
+            return {}, 0
+        changes: Dict[str, Set[str]] = {}
+        with self._locked(fcntl.LOCK_SH):
+            with open(self.path, "rb") as f:
+                data = f.read()
+        # 쓰는 중인 마지막 줄은 다음 실행에서 읽는다
+        offset = data.rfind(b"\n") + 1
+        for line in data[:offset].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                changes.setdefault(entry["key"], set()).add(entry["source"])
+        return changes, offset
+
+    def commit(self, offset: int):
+        """offset까지의 로그 삭제"""
+        with self._locked():
+            if not self.path.exists():
+                return
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                rest = f.read()
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_bytes(rest)
+            tmp.replace(self.path)
+
+def mapping_source(ids: Sequence[str], vectors: np.ndarray) -> VectorSource:
+    """(id 목록, 행렬) 벡터 원천"""
+    pos = {k: i for i, k in enumerate(ids)}
+    return lambda keys: {k: vectors[pos[k]] for k in keys if k in pos}
+
+def store_source(store: EmbeddingStore) -> VectorSource:
+    """EmbeddingStore 벡터 원천 (요청한 행만 memmap에서 읽음)"""
+    def lookup(keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = []
+        for k in keys:
+            try:
+                found.append((k, store.index_of(k)))
+            except KeyError:
+                continue
+        if not found:
+            return {}
+        rows = np.asarray(store.vectors[[r for _, r in found]], dtype=np.float32)
+        return {k: rows[i] for i, (k, _) in enumerate(found)}
+    return lookup
+
+def stitch_rows(keys: Sequence[str], text_source: VectorSource, struct_source: VectorSource,
+                dim: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """키 목록의 스티칭 벡터 -> (원천 존재 여부, 행렬)
+
+    struct_source는 z-score된 feat_struct_vec 벡터를 돌려준다. 한쪽이 없는 키는
+    ARRAY_CONCAT(NULL, ...)과 같이 NaN 행이다.
+    """
+    text = text_source(keys)
+    struct = struct_source(keys)
+    present = np.array([k in text or k in struct for k in keys], dtype=bool)
+    if dim is None:
+        t = next(iter(text.values()), None)
+        s = next(iter(struct.values()), None)
+        if t is None or s is None:
+            raise ValueError("스티칭 차원을 결정할 수 없습니다 (텍스트·구조화 벡터가 모두 필요)")
+        dim = len(t) + len(s)
+    out = np.full((len(keys), dim), np.nan, dtype=np.float32)
+    both = [i for i, k in enumerate(keys) if k in text and k in struct]
+    if both:
+        t_norm = l2_normalize(np.stack([text[keys[i]] for i in both]))
+        s_norm = l2_normalize(np.stack([struct[keys[i]] for i in both]))
+        if t_norm.shape[1] + s_norm.shape[1] != dim:
+            raise ValueError(f"스티칭 차원 불일치: {t_norm.shape[1]}+{s_norm.shape[1]} != {dim}")
+        out[both] = np.concatenate([t_norm, s_norm], axis=1)
+    return present, out
+
+class LocalStitcher:
+    """emb_stitched EmbeddingStore 증분 스티칭
+
+    apply()는 변경 로그의 키만 다시 계산해 기존 행은 제자리 갱신(update),
+    신규 키는 추가(append)한다. 원천에서 사라진 키는 NaN 행으로 남긴다.
+    z-score 통계 자체가 바뀌어 전체 벡터를 다시 맞춰야 하면 rebuild()를 쓴다.
+    """
+
+    def __init__(self, path: str, changelog: ChangeLog, chunk_rows: int = 65536):
+        self.path = path
+        self.changelog = changelog
+        self.chunk_rows = chunk_rows
+
+    @property
+    def exists(self) -> bool:
+        return (Path(self.path) / "header.json").exists()
+
+    def rebuild(self, keys: Sequence[str], text_source: VectorSource, struct_source: VectorSource) -> int:
+        """전체 재스티칭 (rebuild_stitched.sql과 같음) 후 변경 로그 비우기"""
+        _, offset = self.changelog.pending()
+        keys = list(dict.fromkeys(keys))
+        store = None
+        for start in range(0, len(keys), self.chunk_rows):
+            chunk = keys[start:start + self.chunk_rows]
+            _, rows = stitch_rows(chunk, text_source, struct_source, store.dim if store else None)
+            if store is None:
+                store = EmbeddingStore.create(self.path, dim=rows.shape[1], model=STITCHED_MODEL, overwrite=True)
+            store.append(chunk, rows)
+        self.changelog.commit(offset)
+        logger.info(f"전체 스티칭 완료: {len(keys)}건")
+        return len(keys)
+
+    def apply(self, text_source: VectorSource, struct_source: VectorSource) -> Dict[str, int]:
+        """변경 로그의 키만 재스티칭"""
+        changes, offset = self.changelog.pending()
+        stats = {"changed": len(changes), "updated": 0, "inserted": 0, "removed": 0}
+        if not changes:
+            return stats
+
+        updater = EmbeddingStore.open(self.path, mode="r+")
+        appender = EmbeddingStore.open(self.path, mode="a")
+        keys = list(changes)
+        existing = set(updater.ids)
+        for start in range(0, len(keys), self.chunk_rows):
+            chunk = keys[start:start + self.chunk_rows]
+            present, rows = stitch_rows(chunk, text_source, struct_source, updater.dim)
+            update_idx = [i for i, k in enumerate(chunk) if k in existing]
+            insert_idx = [i for i, k in enumerate(chunk) if k not in existing and present[i]]
+            if update_idx:
+                updater.update([chunk[i] for i in update_idx], rows[update_idx])
+            if insert_idx:
+                appender.append([chunk[i] for i in insert_idx], rows[insert_idx])
+                existing.update(chunk[i] for i in insert_idx)
+                # 추가된 행을 update 쪽 id 목록에도 반영
+                updater = EmbeddingStore.open(self.path, mode="r+")
+            stats["updated"] += sum(1 for i in update_idx if present[i])
+            stats["removed"] += sum(1 for i in update_idx if not present[i])
+            stats["inserted"] += len(insert_idx)
+
+        self.changelog.commit(offset)
+        logger.info(f"증분 스티칭 완료: 변경 {stats['changed']}건 (갱신 {stats['updated']}, "
+                    f"추가 {stats['inserted']}, 제거 {stats['removed']})")
+        return stats
+
+def changelog_path(data_dir: str) -> str:
+    return str(Path(data_dir) / "stitch_changelog.jsonl")
+
+def stitched_path(data_dir: str) -> str:
+    return str(Path(data_dir) / "emb_stitched.store")
+
+def local_sources(data_dir: str) -> Tuple[List[str], VectorSource, List[str], np.ndarray]:
+    """로컬 데이터 디렉터리의 (키 목록, 텍스트 원천, 구조화 id, 구조화 특징 원본)"""
+    from rule_engine import iter_csv_batches
+    path = table_path(data_dir, "raw_texts")
+    if path is None:
+        raise FileNotFoundError(f"로컬 테이블이 없습니다: {Path(data_dir) / 'raw_texts'}.csv")
+    text_keys = [key for ids, _ in iter_csv_batches(str(path)) for key in ids]
+    text_ids, text_vecs = load_text_vectors(data_dir)
+    struct_ids, struct_vecs = load_struct_features(data_dir)
+    keys = list(dict.fromkeys(text_keys + list(struct_ids)))
+    return keys, mapping_source(text_ids, text_vecs), list(struct_ids), struct_vecs
+
+def normalized_source(source: VectorSource, normalizer: StructNormalizer) -> VectorSource:
+    """요청한 키의 특징만 캐시된 통계로 z-score 변환"""
+    def lookup(keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = source(keys)
+        if not found:
+            return {}
+        z = normalizer.transform(np.stack(list(found.values())))
+        return {k: z[i] for i, k in enumerate(found)}
+    return lookup
+
+def stitch_local(data_dir: str = "data/sample", full: bool = False,
+                 tolerance: Optional[float] = None) -> Dict[str, float]:
+    """로컬 emb_stitched.store 갱신
+
+    저장소나 구조화 통계(struct_stats.json)가 없거나 full이면 통계를 새로 계산해
+    전체를 스티칭한다. 누적 통계의 드리프트가 허용치를 넘으면 기준을 갱신해
+    전체 재정규화하고, 아니면 변경 로그의 키만 캐시된 기준 통계로 스티칭한다.
+    """
+    stitcher = LocalStitcher(stitched_path(data_dir), ChangeLog(changelog_path(data_dir)))
+    keys, text_source, struct_ids, struct_vecs = local_sources(data_dir)
+
+    stats_file = stats_path(data_dir)
+    if Path(stats_file).exists() and not full:
+        normalizer = StructNormalizer.load(stats_file, tolerance)
+    else:
+        normalizer = StructNormalizer.fit(struct_vecs, 0.05 if tolerance is None else tolerance)
+        full = True
+    drift = normalizer.drift()
+    if normalizer.needs_renormalize():
+        logger.info(f"구조화 통계 드리프트 {drift:.3f} > {normalizer.tolerance}: 전체 재정규화")
+        normalizer.rebaseline()
+        full = True
+
+    struct_source = normalized_source(mapping_source(struct_ids, struct_vecs), normalizer)
+    if full or not stitcher.exists:
+        stats: Dict[str, float] = {"rebuilt": stitcher.rebuild(keys, text_source, struct_source)}
+    else:
+        stats = stitcher.apply(text_source, struct_source)
+    normalizer.save(stats_file)
+    stats["struct_drift"] = round(drift, 6)
+    return stats
+
+def load_stitched(data_dir: str, keys: Sequence[str]) -> np.ndarray:
+    """emb_stitched.store에서 키 순서대로 행 로드 (없는 키는 NaN)"""
+    changes, _ = ChangeLog(changelog_path(data_dir)).pending()
+    if changes:
+        logger.warning(f"스티칭되지 않은 변경 {len(changes)}건이 있습니다 (descent_cli.py stitch 실행 필요)")
+    store = EmbeddingStore.open(stitched_path(data_dir))
+    found = store_source(store)(keys)
+    out = np.full((len(keys), store.dim), np.nan, dtype=np.float32)
+    for i, k in enumerate(keys):
+        if k in found:
+            out[i] = found[k]
+    return out
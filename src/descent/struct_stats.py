@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Descent Struct Feature Statistics
+구조화 특징(feat_struct)의 영속 Welford 평균/분산 통계와 드리프트 기반 재정규화 판단
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STRUCT_FEATURES = ("f1", "f2", "f3")
+STATS_TABLE = "feat_struct_stats"
+
+@dataclass
+class RunningStats:
+    """특징별 Welford 누적 통계 (AVG/STDDEV와 같이 NULL(NaN)은 건너뜀)"""
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+
+    @classmethod
+    def empty(cls, dim: int) -> "RunningStats":
+        return cls(np.zeros(dim, dtype=np.int64), np.zeros(dim), np.zeros(dim))
+
+    def _combine(self, n_b: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray, sign: int):
+        """배치 통계 병합(sign=1) 또는 제거(sign=-1) - Chan 병렬 공식"""
+        n_a = self.count
+        n = n_a + sign * n_b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if sign > 0:
+                delta = mean_b - self.mean
+                mean = np.where(n > 0, self.mean + delta * n_b / np.maximum(n, 1), 0.0)
+                m2 = self.m2 + m2_b + delta ** 2 * n_a * n_b / np.maximum(n, 1)
+            else:
+                mean = np.where(n > 0, (self.mean * n_a - mean_b * n_b) / np.maximum(n, 1), 0.0)
+                delta = mean_b - mean
+                m2 = self.m2 - m2_b - delta ** 2 * n * n_b / np.maximum(n_a, 1)
+        self.count = n
+        self.mean = np.where(n > 0, mean, 0.0)
+        self.m2 = np.where(n > 1, np.maximum(m2, 0.0), 0.0)
+
+    def _batch(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.mean))
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=0)
+        total = np.where(valid, values, 0.0).sum(axis=0)
+        mean = np.where(n > 0, total / np.maximum(n, 1), 0.0)
+        m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+        return n, mean, m2
+
+    def update(self, values: np.ndarray):
+        """행 추가"""
+        self._combine(*self._batch(values), sign=1)
+
+    def remove(self, values: np.ndarray):
+        """이전에 추가한 행 제거 (행 갱신 = 이전 값 제거 + 새 값 추가)"""
+        self._combine(*self._batch(values), sign=-1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """표본 표준편차 (STDDEV와 같이 ddof=1, 2행 미만이면 NaN)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan)
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count.tolist(), "mean": self.mean.tolist(), "m2": self.m2.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningStats":
+        return cls(np.asarray(data["count"], dtype=np.int64), np.asarray(data["mean"], dtype=np.float64),
+                   np.asarray(data["m2"], dtype=np.float64))
+
+class StructNormalizer:
+    """캐시된 통계 기반 z-score 변환기
+
+    저장된 벡터는 기준(baseline) 평균/표준편차로 정규화된다. 새 행은 누적
+    통계만 갱신하고 기준 통계로 변환하므로, 기존 벡터를 다시 계산하지 않는다.
+    누적 통계가 기준에서 tolerance(기준 표준편차 대비 평균 이동, 표준편차 비율
+    변화 중 최댓값) 넘게 벗어나면 needs_renormalize()가 참이 되고, 이때
+    rebaseline() 후 전체 재정규화한다.
+    """
+
+    def __init__(self, running: RunningStats, base_mean: Optional[np.ndarray] = None,
+                 base_std: Optional[np.ndarray] = None, tolerance: float = 0.05):
+        self.running = running
+        self.base_mean = running.mean.copy() if base_mean is None else np.asarray(base_mean, dtype=np.float64)
+        self.base_std = running.std.copy() if base_std is None else np.asarray(base_std, dtype=np.float64)
+        self.tolerance = tolerance
+
+    @classmethod
+    def fit(cls, features: np.ndarray, tolerance: float = 0.05, chunk_rows: int = 65536) -> "StructNormalizer":
+        """전체 특징에서 통계 계산 (청크 단위 1회 스캔) 후 기준으로 고정"""
+        features = np.asarray(features)
+        running = RunningStats.empty(features.shape[1])
+        for start in range(0, len(features), chunk_rows):
+            running.update(features[start:start + chunk_rows])
+        return cls(running, tolerance=tolerance)
+
+    def observe(self, added: np.ndarray, removed: Optional[np.ndarray] = None):
+        """변경분 반영 (removed는 갱신·삭제된 행의 이전 값)
+
+        추가를 먼저 한다 - removed에 같은 배치의 앞 행이 들어 있을 수 있고, 먼저 빼면
+        중간 개수가 1 이하로 떨어져 m2가 0으로 잘린다.
+        """
+        if len(added):
+            self.running.update(added)
+        if removed is not None and len(removed):
+            self.running.remove(removed)
+
+    def drift(self) -> float:
+        """기준 대비 최대 드리프트 (기준 표준편차 단위)"""
+        base_std = np.where(np.nan_to_num(self.base_std) > 0, self.base_std, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_shift = np.abs(self.running.mean - self.base_mean) / base_std
+            std_ratio = np.abs(self.running.std / base_std - 1.0)
+        values = np.concatenate([mean_shift, std_ratio])
+        values = values[~np.isnan(values)]
+        # 기준 표준편차가 없던 특징에 분산이 생기면 재정규화 대상
+        appeared = np.isnan(base_std) & (np.nan_to_num(self.running.std) > 0)
+        if appeared.any():
+            return float("inf")
+        return float(values.max()) if values.size else 0.0
+
+    def needs_renormalize(self) -> bool:
+        return self.drift() > self.tolerance
+
+    def rebaseline(self):
+        """현재 누적 통계를 새 기준으로 고정 (이후 전체 재정규화 필요)"""
+        self.base_mean = self.running.mean.copy()
+        self.base_std = self.running.std.copy()
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        """기준 통계 z-score (표준편차가 0·NULL이면 0, ori_local.zscore와 같음)"""
+        features = np.asarray(features, dtype=np.float64)
+        std = np.nan_to_num(self.base_std)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(std > 0, (features - self.base_mean) / np.where(std > 0, std, 1.0), 0.0)
+        return z.astype(np.float32)
+
+    def to_dict(self) -> Dict:
+        return {
+            "running": self.running.to_dict(),
+            "base_mean": self.base_mean.tolist(),
+            "base_std": [None if np.isnan(s) else float(s) for s in self.base_std],
+            "tolerance": self.tolerance,
+        }
+
+    def save(self, path: str):
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        tmp.replace(target)
+
+    @classmethod
+    def load(cls, path: str, tolerance: Optional[float] = None) -> "StructNormalizer":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        base_std = np.array([np.nan if s is None else s for s in data["base_std"]], dtype=np.float64)
+        return cls(RunningStats.from_dict(data["running"]), data["base_mean"], base_std,
+                   tolerance=data["tolerance"] if tolerance is None else tolerance)
+
+def stats_path(data_dir: str) -> str:
+    return str(Path(data_dir) / "struct_stats.json")
+
+def ingest_hook(normalizer: StructNormalizer, store) -> Callable[[List[str], np.ndarray], None]:
+    """적재 기록 직전 호출되는 통계 갱신 훅 (이미 있던 id는 이전 값을 제거)
+
+    이전 값은 로더가 읽는 것과 같은 저장소에서 찾는다(ingest가 새 저장소를 CSV 기준
+    데이터로 채우므로 CSV에서 온 값도 포함). 같은 배치에 같은 id가 여러 번 나오면
+    뒤 행의 이전 값은 앞 행이다.
+    """
+    def observe(ids: List[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        old_rows: List[int] = []
+        earlier: List[int] = []
+        latest: Dict[str, int] = {}
+        for i, key in enumerate(ids):
+            if key in latest:
+                earlier.append(latest[key])
+            else:
+                try:
+                    old_rows.append(store.index_of(key))
+                except KeyError:
+                    pass
+            latest[key] = i
+        removed = [np.asarray(store.vectors[old_rows], dtype=np.float64)] if old_rows else []
+        if earlier:
+            removed.append(vectors[earlier])
+        normalizer.observe(vectors, np.concatenate(removed) if removed else None)
+    return observe
+
+class StructStatsSQL:
+    """feat_struct_stats 기반 증분 정규화 SQL 생성기
+
+    신규 feat_struct 행(feat_struct_vec에 없는 id)만 집계해 누적 통계에 병합하고,
+    그 행만 기준 통계로 정규화해 feat_struct_vec에 추가한 뒤 스티칭 변경 로그에
+    기록한다. 드리프트가 허용치를 넘으면 기준을 갱신하고 전체를 재정규화한다.
+    기존 행의 값이 바뀐 경우는 full_sql()로 재정규화한다.
+    """
+
+    def __init__(self, project_id: str, dataset_id: str, features: Sequence[str] = STRUCT_FEATURES):
+        self.table = f"{project_id}.{dataset_id}"
+        self.features = list(features)
+
+    def _unpivot(self, source: str) -> str:
+        return " UNION ALL ".join(
+            f"SELECT '{f}' AS feature, {f} AS value FROM {source}" for f in self.features)
+
+    def _vector(self, alias: str = "f") -> str:
+        return ",\n                ".join(
+            f"SAFE_DIVIDE({alias}.{f} - (SELECT base_mean FROM stats WHERE feature = '{f}'), "
+            f"NULLIF((SELECT base_std FROM stats WHERE feature = '{f}'), 0))" for f in self.features)
+
+    def ddl(self) -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS `{self.table}.{STATS_TABLE}` (
+            feature STRING,
+            n INT64,
+            mean FLOAT64,
+            m2 FLOAT64,
+            base_mean FLOAT64,
+            base_std FLOAT64,
+            updated_at TIMESTAMP
+        );
+        """
+
+    def full_sql(self) -> str:
+        """전체 스캔으로 통계·기준 재설정 후 feat_struct_vec 재정규화"""
+        return f"""
+        {self.ddl()}
+        CREATE OR REPLACE TABLE `{self.table}.{STATS_TABLE}` AS
+        SELECT feature, COUNT(value) AS n, AVG(value) AS mean,
+               COALESCE(VAR_SAMP(value) * (COUNT(value) - 1), 0) AS m2,
+               AVG(value) AS base_mean, STDDEV(value) AS base_std,
+               CURRENT_TIMESTAMP() AS updated_at
+        FROM ({self._unpivot(f"`{self.table}.feat_struct`")})
+        GROUP BY feature;
+
+        CREATE OR REPLACE TABLE `{self.table}.feat_struct_vec` AS
+        WITH stats AS (SELECT * FROM `{self.table}.{STATS_TABLE}`)
+        SELECT
+            f.id,
+            [
+                {self._vector()}
+            ] AS embedding
+        FROM `{self.table}.feat_struct` f;
+        """
+
+    def incremental_sql(self, tolerance: float) -> str:
+        """신규 행만 통계 병합·정규화 (드리프트 초과 시 전체 재정규화)"""
+        from stitching import StitchSQL
+        project_id, dataset_id = self.table.split(".", 1)
+        stitch_sql = StitchSQL(project_id, dataset_id)
+        return f"""
+        DECLARE drift FLOAT64;
+        {self.ddl()}
+        -- 최초 실행: 이미 정규화된 행(feat_struct_vec)으로 통계·기준 초기화
+        IF NOT EXISTS (SELECT 1 FROM `{self.table}.{STATS_TABLE}`) THEN
+            INSERT INTO `{self.table}.{STATS_TABLE}` (feature, n, mean, m2, base_mean, base_std, updated_at)
+            SELECT feature, COUNT(value), AVG(value),
+                   COALESCE(VAR_SAMP(value) * (COUNT(value) - 1), 0),
+                   AVG(value), STDDEV(value), CURRENT_TIMESTAMP()
+            FROM ({self._unpivot(f"(SELECT f.* FROM `{self.table}.feat_struct` f JOIN `{self.table}.feat_struct_vec` USING (id))")})
+            GROUP BY feature;
+        END IF;
+
+        CREATE TEMP TABLE struct_delta AS
+        SELECT f.* FROM `{self.table}.feat_struct` f
+        LEFT JOIN `{self.table}.feat_struct_vec` v USING (id)
+        WHERE v.id IS NULL;
+
+        -- Chan 병렬 공식으로 누적 통계 병합
+        MERGE `{self.table}.{STATS_TABLE}` AS s
+        USING (
+            SELECT feature, COUNT(value) AS n_b, AVG(value) AS mean_b,
+                   COALESCE(VAR_SAMP(value) * (COUNT(value) - 1), 0) AS m2_b
+            FROM ({self._unpivot("struct_delta")})
+            GROUP BY feature
+        ) AS d
+        ON s.feature = d.feature
+        WHEN MATCHED AND d.n_b > 0 THEN
+        UPDATE SET
+            n = s.n + d.n_b,
+            mean = s.mean + (d.mean_b - s.mean) * d.n_b / (s.n + d.n_b),
+            m2 = s.m2 + d.m2_b + POW(d.mean_b - s.mean, 2) * s.n * d.n_b / (s.n + d.n_b),
+            updated_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN
+        INSERT (feature, n, mean, m2, base_mean, base_std, updated_at)
+        VALUES (d.feature, d.n_b, d.mean_b, d.m2_b, d.mean_b,
+                IF(d.n_b > 1, SQRT(d.m2_b / (d.n_b - 1)), NULL), CURRENT_TIMESTAMP());
+
+        SET drift = (
+            SELECT MAX(GREATEST(
+                ABS(mean - base_mean) / NULLIF(base_std, 0),
+                ABS(SAFE_DIVIDE(SQRT(SAFE_DIVIDE(m2, n - 1)), NULLIF(base_std, 0)) - 1)
+            ))
+            FROM `{self.table}.{STATS_TABLE}`
+        );
+
+        IF drift > {tolerance} THEN
+            UPDATE `{self.table}.{STATS_TABLE}`
+            SET base_mean = mean, base_std = SQRT(SAFE_DIVIDE(m2, n - 1))
+            WHERE TRUE;
+
+            CREATE OR REPLACE TABLE `{self.table}.feat_struct_vec` AS
+            WITH stats AS (SELECT * FROM `{self.table}.{STATS_TABLE}`)
+            SELECT f.id, [
+                {self._vector()}
+            ] AS embedding
+            FROM `{self.table}.feat_struct` f;
+
+            {stitch_sql.log_changes_sql("struct", f"SELECT id FROM `{self.table}.feat_struct`")}
+        ELSE
+            INSERT INTO `{self.table}.feat_struct_vec` (id, embedding)
+            WITH stats AS (SELECT * FROM `{self.table}.{STATS_TABLE}`)
+            SELECT f.id, [
+                {self._vector()}
+            ] AS embedding
+            FROM struct_delta f;
+
+            {stitch_sql.log_changes_sql("struct", "SELECT id FROM struct_delta")}
+        END IF;
+        """
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Descent Synthetic Corpus
+시드 고정 대규모 합성 코퍼스 생성 (raw_texts, feat_struct, raw_docs, labels + 선택적 임베딩)
+
+블록(BLOCK_ROWS 행) 단위로 생성해 바로 샤드 파일에 쓰므로 메모리 사용량은 행 수와
+무관하다. 블록마다 (seed, 블록 번호)로 난수를 만들기 때문에 샤드 크기를 바꿔도
+같은 시드는 같은 행을 만든다.
+"""
+
+import csv
+import json
+import logging
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BLOCK_ROWS = 65536
+
+CATEGORIES = ["gpu", "laptop", "monitor", "phone", "tablet", "camera", "router", "ssd"]
+KINDS = ["manual", "spec", "review"]
+SPECS = ["{n}GB memory", "{n}W power draw", "{n}Hz refresh rate", "{n}MP sensor", "{n}mm thickness",
+         "{n}-core processor", "{n}TB storage", "{n}h battery life"]
+ADJECTIVES = ["High-performance", "Durable", "Compact", "Professional", "Lightweight", "Budget", "Premium"]
+# REPORT_RULES(rule_engine, 불일치|모순|상이|다름)에 걸리는 문구
+DISCREPANCY_PHRASES = ["스펙과 이미지가 불일치", "표기 용량과 실측이 상이", "설명과 사진이 다름", "제원표와 본문이 모순"]
+NEUTRAL_PHRASES = ["정상 출고 제품", "사양 확인 완료", "이미지와 설명 일치", ""]
+
+TABLE_COLUMNS = {
+    "raw_texts": ["id", "body", "kind", "meta"],
+    "feat_struct": ["id", "f1", "f2", "f3", "meta"],
+    # raw_docs.ref(OBJECTREF)는 Object Table 등록 시 생성되므로 uri만 쓴다
+    "raw_docs": ["uri", "kind", "meta"],
+    "labels": ["id", "y"],
+}
+
+@dataclass
+class SynthConfig:
+    """합성 코퍼스 설정"""
+    rows: int = 100_000
+    seed: int = 42
+    discrepancy_rate: float = 0.05  # 불일치(y=1) 행 비율
+    rule_recall: float = 0.8  # 불일치 행 중 본문에 불일치 문구가 들어가는 비율
+    rule_false_positive_rate: float = 0.01  # 정상 행에 불일치 문구가 들어가는 비율
+    label_rate: float = 0.01  # labels에 포함할 행 비율
+    docs_rate: float = 0.2  # raw_docs(이미지/PDF)가 있는 행 비율
+    embeddings: bool = False  # text/struct 임베딩 저장소 생성
+    dim: int = 64
+    clusters: int = 32  # 임베딩 군집 수
+    cluster_spread: float = 0.15  # 군집 내 잡음 크기 (군집 중심은 단위 노름)
+    outlier_rate: float = 0.01  # 군집과 무관한 이상치 벡터 비율
+    shard_rows: int = 1_000_000
+    format: str = "csv"  # csv, parquet
+    id_prefix: str = "S"
+
+class ShardWriter:
+    """테이블 하나를 shard_rows 행 단위 파일로 나눠 쓰는 스트리밍 작성기
+
+    전체가 샤드 하나에 들어가면 로컬 로더가 읽는 <table>.csv 이름을 쓰고,
+    아니면 <table>/part-NNNNN.<ext> 로 나눈다.
+    """
+
+    def __init__(self, out_dir: Path, table: str, columns: List[str], fmt: str, shard_rows: int, single: bool):
+        self.out_dir = out_dir
+        self.table = table
+        self.columns = columns
+        self.fmt = fmt
+        self.shard_rows = shard_rows
+        self.single = single
+        self.paths: List[str] = []
+        self.rows = 0
+        self._shard_rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def clear(self):
+        """이전 생성의 출력(<table>.csv/.parquet, <table>/part-*) 제거 - 형식·샤드 수가 달라도 낡은 샤드가 섞이지 않게"""
+        for ext in ("csv", "parquet"):
+            (self.out_dir / f"{self.table}.{ext}").unlink(missing_ok=True)
+        shutil.rmtree(self.out_dir / self.table, ignore_errors=True)
+
+    def _open(self):
+        ext = "csv" if self.fmt == "csv" else "parquet"
+        if self.single:
+            path = self.out_dir / f"{self.table}.{ext}"
+        else:
+            path = self.out_dir / self.table / f"part-{len(self.paths):05d}.{ext}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.paths.append(str(path))
+        self._shard_rows_written = 0
+        if self.fmt == "csv":
+            self._file = open(path, "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+        else:
+            self._file = path  # ParquetWriter는 첫 배치의 스키마로 연다
+            self._writer = None
+
+    def write(self, data: Dict[str, Sequence]):
+        n = len(data[self.columns[0]])
+        start = 0
+        while start < n:
+            if self._file is None or self._shard_rows_written >= self.shard_rows:
+                self._close_shard()
+                self._open()
+            take = min(n - start, self.shard_rows - self._shard_rows_written)
+            part = {c: data[c][start:start + take] for c in self.columns}
+            if self.fmt == "csv":
+                self._writer.writerows(zip(*(part[c] for c in self.columns)))
+            else:
+                self._write_parquet(part)
+            self._shard_rows_written += take
+            self.rows += take
+            start += take
+
+    def _write_parquet(self, part: Dict[str, Sequence]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow") from e
+        table = pa.table({c: list(v) if isinstance(v, list) else np.asarray(v) for c, v in part.items()})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(str(self._file), table.schema)
+        self._writer.write_table(table)
+
+    def _close_shard(self):
+        if self._file is None:
+            return
+        if self.fmt == "csv":
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+        self._file = self._writer = None
+
+    def close(self):
+        if self._file is None and not self.paths:
+            self._open()  # 행이 없어도 헤더/스키마가 있는 빈 파일을 남긴다
+        self._close_shard()
+
+def cluster_centers(cfg: SynthConfig) -> np.ndarray:
+    rng = np.random.default_rng([cfg.seed, 0xC1])
+    centers = rng.standard_normal((cfg.clusters, cfg.dim)).astype(np.float32)
+    return centers / np.linalg.norm(centers, axis=1, keepdims=True)
+
+def generate_block(cfg: SynthConfig, block_no: int, start: int, n: int,
+                   centers: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """행 [start, start + n) 생성 -> 테이블별 컬럼 dict (+ 임베딩)"""
+    rng = np.random.default_rng([cfg.seed, block_no])
+    ids = [f"{cfg.id_prefix}{i:09d}" for i in range(start, start + n)]
+    discrepant = rng.random(n) < cfg.discrepancy_rate
+    category = rng.integers(0, len(CATEGORIES), n)
+    kind = rng.integers(0, len(KINDS), n)
+    adjective = rng.integers(0, len(ADJECTIVES), n)
+    spec = rng.integers(0, len(SPECS), n)
+    spec_value = rng.integers(1, 129, n)
+    mentions = np.where(discrepant, rng.random(n) < cfg.rule_recall, rng.random(n) < cfg.rule_false_positive_rate)
+    phrase = rng.integers(0, len(DISCREPANCY_PHRASES), n)
+    neutral = rng.integers(0, len(NEUTRAL_PHRASES), n)
+
+    bodies = [
+        f"{ADJECTIVES[adjective[i]]} {CATEGORIES[category[i]]} with {SPECS[spec[i]].format(n=spec_value[i])}. "
+        + (DISCREPANCY_PHRASES[phrase[i]] if mentions[i] else NEUTRAL_PHRASES[neutral[i]])
+        for i in range(n)
+    ]
+    metas = [f"{CATEGORIES[c]}_spec" for c in category]
+
+    # 구조화 특징: 범주별 기준값 근처, 불일치 행은 기준값에서 크게 벗어남
+    base = np.linspace(0.2, 0.8, len(CATEGORIES))[category]
+    features = np.clip(base[:, None] + rng.normal(0, 0.05, (n, 3)), 0, 1)
+    shift = rng.choice([-0.4, 0.4], size=(n, 3))
+    features[discrepant] = np.clip(features[discrepant] + shift[discrepant], 0, 1)
+    features = np.round(features, 4)
+
+    has_doc = rng.random(n) < cfg.docs_rate
+    doc_rows = np.flatnonzero(has_doc)
+    doc_is_pdf = rng.random(len(doc_rows)) < 0.3
+    labeled = np.flatnonzero(rng.random(n) < cfg.label_rate)
+
+    block = {
+        "raw_texts": {"id": ids, "body": bodies, "kind": [KINDS[k] for k in kind], "meta": metas},
+        "feat_struct": {"id": ids, "f1": features[:, 0], "f2": features[:, 1], "f3": features[:, 2], "meta": metas},
+        "raw_docs": {
+            "uri": [f"gs://descent-synth/docs/{ids[i]}.{'pdf' if pdf else 'png'}" for i, pdf in zip(doc_rows, doc_is_pdf)],
+            "kind": ["pdf" if pdf else "image" for pdf in doc_is_pdf],
+            "meta": [metas[i] for i in doc_rows],
+        },
+        "labels": {"id": [ids[i] for i in labeled], "y": discrepant[labeled].astype(np.int64)},
+        "discrepant": discrepant,
+    }
+
+    if cfg.embeddings:
+        centers = cluster_centers(cfg) if centers is None else centers
+        assignment = rng.integers(0, cfg.clusters, n)
+        text = centers[assignment] + rng.normal(0, cfg.cluster_spread / np.sqrt(cfg.dim), (n, cfg.dim))
+        # 불일치 행은 군집에서 한 방향으로 밀려나고, 이상치는 군집과 무관한 무작위 벡터
+        drift = rng.standard_normal((n, cfg.dim)) / np.sqrt(cfg.dim)
+        text[discrepant] += 0.5 * drift[discrepant]
+        outlier = rng.random(n) < cfg.outlier_rate
+        text[outlier] = rng.standard_normal((int(outlier.sum()), cfg.dim))
+        block["text_vectors"] = text.astype(np.float32)
+        block["struct_vectors"] = features.astype(np.float32)
+    return block
+
+def generate(out_dir: str, cfg: SynthConfig, log: Callable[[str], None] = logger.info) -> Dict[str, Any]:
+    """합성 코퍼스를 out_dir에 스트리밍 생성 -> 매니페스트 (manifest.json에도 저장)"""
+    if cfg.format not in ("csv", "parquet"):
+        raise ValueError(f"지원하지 않는 형식: {cfg.format} (csv/parquet)")
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    single = cfg.rows <= cfg.shard_rows
+    writers = {t: ShardWriter(root, t, cols, cfg.format, cfg.shard_rows, single) for t, cols in TABLE_COLUMNS.items()}
+    for writer in writers.values():
+        writer.clear()
+    if not cfg.embeddings:
+        for name in ("text", "struct"):
+            shutil.rmtree(root / f"{name}_embeddings.store", ignore_errors=True)
+
+    stores = {}
+    centers = None
+    if cfg.embeddings:
+        from embedding_store import EmbeddingStore
+        centers = cluster_centers(cfg)
+        stores["text"] = EmbeddingStore.create(str(root / "text_embeddings.store"), dim=cfg.dim,
+                                               model=f"synthetic-{cfg.seed}", overwrite=True)
+        stores["struct"] = EmbeddingStore.create(str(root / "struct_embeddings.store"), dim=3,
+                                                 model="feat_struct", overwrite=True)
+
+    discrepancies = 0
+    first_discrepant: Optional[str] = None
+    for block_no, start in enumerate(range(0, cfg.rows, BLOCK_ROWS)):
+        n = min(BLOCK_ROWS, cfg.rows - start)
+        block = generate_block(cfg, block_no, start, n, centers)
+        for table, writer in writers.items():
+            writer.write(block[table])
+        if stores:
+            ids = block["raw_texts"]["id"]
+            stores["text"].append(ids, block["text_vectors"])
+            stores["struct"].append(ids, block["struct_vectors"])
+        hits = np.flatnonzero(block["discrepant"])
+        discrepancies += len(hits)
+        if first_discrepant is None and len(hits):
+            first_discrepant = block["raw_texts"]["id"][hits[0]]
+        if block_no % 16 == 15 or start + n >= cfg.rows:
+            log(f"합성 코퍼스: {start + n:,}/{cfg.rows:,}행")
+
+    for writer in writers.values():
+        writer.close()
+
+    manifest = {
+        "config": asdict(cfg),
+        "tables": {t: {"rows": w.rows, "files": w.paths} for t, w in writers.items()},
+        "discrepancies": discrepancies,
+        # 로컬 ORI 질의 벡터로 쓸 수 있는 불일치 행 (PipelineConfig.local_query_id)
+        "query_id": first_discrepant,
+        "embeddings": {name: str(root / f"{name}_embeddings.store") for name in stores},
+    }
+    with open(root / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Descent Tracing
+파이프라인 단계·하위 작업의 중첩 스팬 기록 및 JSONL / Prometheus textfile 증분 내보내기
+"""
+
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 스팬에 누적되는 카운터 (Prometheus 내보내기 대상)
+COUNTERS = ("rows", "bytes", "cache_hits", "retries", "slot_ms")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("descent_span", default=None)
+
+@dataclass
+class Span:
+    """실행 구간 하나 (시간은 epoch 초, wall_s는 단조 시계 기준)"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"  # pipeline, step, query, submit, wait, download, upload, embed, embed_batch, cache_lookup
+    start: float = 0.0
+    end: Optional[float] = None
+    wall_s: float = 0.0
+    status: str = "OK"
+    error: Optional[str] = None
+    counters: Dict[str, float] = field(default_factory=dict)
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    _t0: float = field(default=0.0, repr=False)
+
+    def add(self, **counts: float) -> "Span":
+        """카운터 누적 (rows, bytes, cache_hits, retries, slot_ms 등)"""
+        for key, value in counts.items():
+            if value is not None:
+                self.counters[key] = self.counters.get(key, 0) + value
+        return self
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("_t0")
+        return data
+
+class _NoopSpan:
+    """트레이싱 비활성 시 사용하는 빈 스팬"""
+    span_id = None
+
+    def add(self, **counts):
+        return self
+
+    def set(self, **attrs):
+        return self
+
+NOOP_SPAN = _NoopSpan()
+
+class JsonlSpanExporter:
+    """종료된 스팬을 즉시 한 줄씩 JSONL에 추가 (실행 도중에도 읽을 수 있음)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = None  # 첫 스팬에서 연다 (스팬이 없으면 빈 파일을 만들지 않음)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class PrometheusTextfileExporter:
+    """스팬 이름별 누적 지표를 node_exporter textfile 형식으로 기록
+
+    스팬이 끝날 때마다 임시 파일에 쓰고 교체하므로 수집기가 반쯤 쓴 파일을 읽지 않는다.
+    """
+
+    def __init__(self, path: str, prefix: str = "descent"):
+        self.path = Path(path)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def export(self, span: Span):
+        with self._lock:
+            stats = self._stats.setdefault(span.name, {"count": 0, "errors": 0, "seconds": 0.0, "last": 0.0})
+            stats["count"] += 1
+            stats["errors"] += span.status != "OK"
+            stats["seconds"] += span.wall_s
+            stats["last"] = span.wall_s
+            for key in COUNTERS:
+                stats[key] = stats.get(key, 0) + span.counters.get(key, 0)
+            self._write()
+
+    def render(self) -> str:
+        p = self.prefix
+
+        def label(name: str) -> str:
+            return name.replace("\\", "\\\\").replace('"', '\\"')
+
+        names = sorted(self._stats)
+        lines = [f"# HELP {p}_span_duration_seconds 스팬 실행 시간",
+                 f"# TYPE {p}_span_duration_seconds summary"]
+        for name in names:
+            lines.append(f'{p}_span_duration_seconds_sum{{span="{label(name)}"}} {self._stats[name]["seconds"]}')
+            lines.append(f'{p}_span_duration_seconds_count{{span="{label(name)}"}} {self._stats[name]["count"]}')
+        metrics = [(f"{p}_span_last_duration_seconds", "gauge", "마지막 스팬 실행 시간", "last"),
+                   (f"{p}_span_errors_total", "counter", "실패한 스팬 수", "errors")]
+        metrics += [(f"{p}_span_{key}_total", "counter", f"스팬 {key} 누적", key) for key in COUNTERS]
+        for metric, kind, help_text, key in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name in names:
+                lines.append(f'{metric}{{span="{label(name)}"}} {self._stats[name].get(key, 0)}')
+        return "\n".join(lines) + "\n"
+
+    def _write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def close(self):
+        pass
+
+class Tracer:
+    """중첩 스팬 기록기
+
+    부모 스팬은 contextvar로 전파되며, 스레드 풀처럼 컨텍스트가 이어지지 않는
+    곳에서는 parent를 직접 넘긴다. enabled=False면 빈 스팬만 돌려준다.
+    """
+
+    def __init__(self, exporters: Sequence[Any] = (), trace_id: Optional[str] = None, enabled: bool = True):
+        self.exporters = list(exporters)
+        self.trace_id = trace_id or new_run_id()
+        self.enabled = enabled
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", parent: Optional[Span] = None, **attrs) -> Iterator[Span]:
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        parent = parent if parent is not None else _current.get()
+        span = Span(name=name, trace_id=self.trace_id, span_id=uuid.uuid4().hex[:16],
+                    parent_id=getattr(parent, "span_id", None), kind=kind, start=time.time(),
+                    attrs=dict(attrs), _t0=time.perf_counter())
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.error = str(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end = time.time()
+            span.wall_s = time.perf_counter() - span._t0
+            self._export(span)
+
+    def wrap(self, name: str, fn: Callable[[], Any], kind: str = "internal",
+             parent: Optional[Span] = None) -> Callable[[], Any]:
+        """fn 실행을 스팬으로 감싼 함수 (스케줄러 워커 스레드용)"""
+        def traced():
+            with self.span(name, kind=kind, parent=parent):
+                return fn()
+        return traced
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"스팬 내보내기 실패 ({type(exporter).__name__}): {e}")
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+
+NULL_TRACER = Tracer(enabled=False, trace_id="disabled")
+
+def current_span():
+    """현재 컨텍스트의 스팬 (없으면 빈 스팬)"""
+    return _current.get() or NOOP_SPAN
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+def file_tracer(trace_dir: str, metrics_textfile: Optional[str] = None,
+                run_id: Optional[str] = None) -> Tracer:
+    """<trace_dir>/<run_id>.jsonl (+ Prometheus textfile)로 내보내는 트레이서"""
+    run_id = run_id or new_run_id()
+    exporters: List[Any] = [JsonlSpanExporter(str(Path(trace_dir) / f"{run_id}.jsonl"))]
+    if metrics_textfile:
+        exporters.append(PrometheusTextfileExporter(metrics_textfile))
+    return Tracer(exporters, trace_id=run_id)
+
+def load_spans(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """JSONL 트레이스 파일들에서 스팬 로드 (끝이 잘린 줄은 건너뜀)"""
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+def summarize_spans(spans: Sequence[Dict[str, Any]], kinds: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """스팬 이름별 실행 간 p50/p95 실행 시간 및 카운터 합계 (p95 내림차순)"""
+    import numpy as np
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        if kinds and span.get("kind") not in kinds:
+            continue
+        groups.setdefault(span["name"], []).append(span)
+
+    rows = []
+    for name, group in groups.items():
+        wall = np.array([s["wall_s"] for s in group], dtype=np.float64)
+        row = {
+            "name": name,
+            "kind": group[0].get("kind"),
+            "runs": len({s["trace_id"] for s in group}),
+            "count": len(group),
+            "errors": sum(s.get("status") != "OK" for s in group),
+            "p50_s": float(np.percentile(wall, 50)),
+            "p95_s": float(np.percentile(wall, 95)),
+            "max_s": float(wall.max()),
+        }
+        for key in COUNTERS:
+            row[key] = sum(s.get("counters", {}).get(key, 0) for s in group)
+        rows.append(row)
+    rows.sort(key=lambda r: r["p95_s"], reverse=True)
+    return rows
@@ -0,0 +1,44 @@
+"""IVF 인덱스의 전수 검색 기준값(exact_search)과 recall 보고 점검"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from ann_index import IVFIndex, exact_search, recall_report  # noqa: E402
+
+def brute_force(vectors, query, k):
+    valid = [i for i, v in enumerate(vectors) if not np.isnan(v).any()]
+    sims = {i: float(np.dot(vectors[i], query) / (np.linalg.norm(vectors[i]) * np.linalg.norm(query)))
+            for i in valid}
+    return sorted(sims, key=lambda i: -sims[i])[:k]
+
+def test_matches_brute_force_across_blocks():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 8)).astype(np.float32)
+    vectors[rng.choice(200, 20, replace=False)] = np.nan
+    queries = rng.standard_normal((10, 8)).astype(np.float32)
+
+    truth = exact_search(vectors, queries, k=7, block=32)
+    for query, rows in zip(queries, truth):
+        assert rows.tolist() == brute_force(vectors, query, 7)
+
+def test_fewer_valid_rows_than_k_drops_invalid_rows():
+    vectors = np.array([[1, 0], [np.nan, np.nan], [0, 1], [np.nan, 0]], dtype=np.float32)
+    queries = np.array([[1, 0.1], [np.nan, 1]], dtype=np.float32)
+
+    truth = exact_search(vectors, queries, k=4, block=2)
+    assert truth[0].tolist() == [0, 2]  # NaN 행은 기준값에 들어가지 않는다
+    assert truth[1].tolist() == []  # NaN 질의는 비교 대상이 없다
+
+def test_recall_report_counts_only_valid_truth():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((6, 4)).astype(np.float32)
+    vectors[[1, 4]] = np.nan
+    keys = [f"k{i}" for i in range(6)]
+    index = IVFIndex.build(keys, vectors, nlist=1)
+
+    report = recall_report(index, vectors, vectors[[0, 2]], k=10, nprobes=[1])
+    assert report[0]["recall_at_k"] == 1.0
@@ -0,0 +1,76 @@
+"""비동기 잡 레이어 (FakeJobBackend, BigQuery 없이 실행)"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from async_jobs import AsyncJobRunner, FakeJobBackend, JobStats  # noqa: E402
+from descent_pipeline_v2 import PipelineConfig, PipelineRunner  # noqa: E402
+
+def fast_runner(backend, **kwargs) -> AsyncJobRunner:
+    return AsyncJobRunner(backend, initial_delay=0.01, max_delay=0.02, **kwargs)
+
+def test_jobs_are_awaited_concurrently():
+    backend = FakeJobBackend(latency=0.2)
+    queries = {f"step_{i}": f"SELECT {i}" for i in range(10)}
+
+    start = time.monotonic()
+    results = asyncio.run(fast_runner(backend).run_many(queries))
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0  # 순차 실행이면 2초
+    assert set(results) == set(queries)
+    assert all(isinstance(r, JobStats) for r in results.values())
+    assert len(backend.submitted) == 10
+
+def test_submit_does_not_block_the_event_loop():
+    backend = FakeJobBackend(latency=0.0, submit_delay=0.2)
+    start = time.monotonic()
+    asyncio.run(fast_runner(backend).run_many({f"s{i}": f"SELECT {i}" for i in range(5)}))
+    assert time.monotonic() - start < 0.6  # 루프에서 제출하면 1초
+
+def test_job_errors_propagate():
+    backend = FakeJobBackend(latency=0.01, failures={"bad": ValueError("잡 실패")})
+    queries = {"ok": "SELECT 1", "broken": "SELECT bad"}
+
+    results = asyncio.run(fast_runner(backend).run_many(queries, return_exceptions=True))
+    assert isinstance(results["ok"], JobStats)
+    assert isinstance(results["broken"], ValueError)
+    with pytest.raises(ValueError):
+        asyncio.run(fast_runner(backend).run_many(queries))
+
+def test_wait_times_out():
+    backend = FakeJobBackend(latency=5.0)
+    with pytest.raises(TimeoutError):
+        asyncio.run(fast_runner(backend, timeout=0.05).run("SELECT 1", "slow"))
+
+def test_transient_errors_are_resubmitted():
+    backend = FakeJobBackend(latency=0.0, flaky={"flaky": 2})
+    retries = []
+    runner = fast_runner(backend, retry_on=(ConnectionError,), retry_initial=0.01)
+    stats = asyncio.run(runner.run("SELECT flaky", "step", on_retry=retries.append))
+    assert isinstance(stats, JobStats)
+    assert len(retries) == 2 and len(backend.submitted) == 3
+
+    backend = FakeJobBackend(latency=0.0, flaky={"flaky": 100})
+    runner = fast_runner(backend, retry_on=(ConnectionError,), retry_initial=0.01, retry_deadline=0.05)
+    with pytest.raises(ConnectionError):
+        asyncio.run(runner.run("SELECT flaky", "step"))
+
+def test_pipeline_queries_go_through_the_job_runner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = FakeJobBackend(latency=0.05)
+    config = PipelineConfig(project_id="test-project", dataset_id="test_dataset", mode="oss",
+                            enable_incremental=False, enable_tracing=False, metrics_textfile=None)
+    runner = PipelineRunner(config, job_runner=fast_runner(backend))
+    runner.run_pipeline()
+
+    steps = {entry["step"] for entry in runner.cost_log}
+    assert steps == {"add_content_hash", "create_ori_params", "create_evaluation_harness"}
+    assert len(backend.submitted) == 3
+    assert (tmp_path / "artifacts" / "cost_report.csv").exists()
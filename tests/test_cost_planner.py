@@ -0,0 +1,61 @@
+"""비용 계획기 예산 점검 (FakeDryRunClient, BigQuery 없이 실행)"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from cost_planner import TIB, BudgetExceededError, CostPlan, FakeDryRunClient, QueryEstimate  # noqa: E402
+from descent_pipeline_v2 import PipelineConfig, PipelineRunner  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # plan()·run_pipeline은 artifacts/ 아래에 기록한다
+    monkeypatch.chdir(tmp_path)
+
+def runner(client, **overrides) -> PipelineRunner:
+    config = PipelineConfig(project_id="test-project", dataset_id="test_dataset", enable_tracing=False,
+                            metrics_textfile=None, **overrides)
+    return PipelineRunner(config, client=client)
+
+def test_plan_collects_canned_estimates():
+    client = FakeDryRunClient({"emb_stitched": 5 * TIB}, default_bytes=1024)
+    plan = runner(client).plan()
+
+    assert client.queries, "모든 단계가 드라이런되어야 한다"
+    assert not plan.unknown
+    assert plan.total_bytes >= 5 * TIB
+    assert plan.within_budget  # 예산 미설정
+
+def test_over_budget_refuses_to_run():
+    client = FakeDryRunClient({"emb_stitched": 5 * TIB})
+    pipeline = runner(client, max_bytes_per_run=10)
+
+    plan = pipeline.plan()
+    assert not plan.within_budget
+    with pytest.raises(BudgetExceededError):
+        pipeline.run_pipeline()
+
+def test_failed_estimates_fail_closed_when_budgeted():
+    client = FakeDryRunClient(errors={"SELECT": RuntimeError("dry run unavailable")})
+    pipeline = runner(client, max_bytes_per_run=10 * TIB)
+
+    plan = pipeline.plan()
+    assert plan.unknown and plan.total_bytes == 0
+    assert not plan.within_budget
+    with pytest.raises(BudgetExceededError):
+        pipeline.run_pipeline()
+
+def test_unknown_estimates_without_budget():
+    plan = CostPlan([QueryEstimate("step", None, error="boom")])
+    assert plan.within_budget
+    plan.strict = True
+    assert not plan.within_budget
+
+def test_slot_budget_needs_history():
+    plan = CostPlan([QueryEstimate("step", 100)], max_slot_ms=1000.0)
+    assert not plan.within_budget
+    plan.estimates[0].slot_ms = 10.0
+    assert plan.within_budget
@@ -0,0 +1,86 @@
+"""배치 임베딩 클라이언트 (HashEmbeddingBackend, 모델 호출 없이 실행)"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from embedding_client import BatchEmbeddingClient, HashEmbeddingBackend, pack_batches  # noqa: E402
+
+class ShortVectorBackend(HashEmbeddingBackend):
+    """short_on 텍스트에 차원이 모자란 벡터를 돌려주는 백엔드"""
+
+    def __init__(self, short_on, **kwargs):
+        super().__init__(**kwargs)
+        self.short_on = set(short_on)
+
+    def embed(self, texts):
+        vectors = super().embed(texts)
+        return [v[:-1] if t in self.short_on else v for t, v in zip(texts, vectors)]
+
+def client(backend, **kwargs) -> BatchEmbeddingClient:
+    kwargs.setdefault("max_retries", 2)
+    return BatchEmbeddingClient(backend, retry_delay=0.0, **kwargs)
+
+def test_pack_batches_respects_size_and_token_limits():
+    texts = ["a" * 40] * 7  # 11토큰씩
+    assert pack_batches(texts, max_batch_size=3, max_batch_tokens=10_000) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert pack_batches(texts, max_batch_size=100, max_batch_tokens=25) == [[0, 1], [2, 3], [4, 5], [6]]
+    # 한도보다 큰 텍스트도 혼자 한 배치가 된다
+    assert pack_batches(["a" * 400, "b"], max_batch_size=100, max_batch_tokens=10) == [[0], [1]]
+
+def test_vectors_are_deterministic_and_in_input_order():
+    backend = HashEmbeddingBackend(dimension=16)
+    texts = [f"text {i}" for i in range(50)]
+    result = client(backend, max_batch_size=8, max_in_flight=3).embed(texts)
+
+    assert result.vectors.shape == (50, 16)
+    assert result.ok.all() and not result.failures
+    assert result.batches == 7
+    expected = np.asarray(HashEmbeddingBackend(dimension=16).embed(texts), dtype=np.float32)
+    np.testing.assert_allclose(result.vectors, expected, rtol=1e-6)
+
+def test_failed_batch_is_bisected_to_isolate_bad_rows():
+    texts = [f"t{i}" for i in range(64)]
+    texts[5] = "bad"
+    backend = HashEmbeddingBackend(dimension=8, fail_on=["bad"])
+    result = client(backend, max_batch_size=100).embed(texts)
+
+    assert [(f.index, f.text) for f in result.failures] == [(5, "bad")]
+    assert result.ok.sum() == 63 and np.isnan(result.vectors[5]).all()
+    # 재시도 3번 + 이분 분할 호출 2번씩 6단계 (64 -> 1), 텍스트마다 재시도하지 않는다
+    assert backend.calls == 3 + 2 * 6
+
+def test_isolation_is_capped():
+    texts = [f"t{i}" for i in range(64)]
+    texts[5] = "bad"
+    backend = HashEmbeddingBackend(dimension=8, fail_on=["bad"])
+    result = client(backend, max_batch_size=100, max_isolation_calls=3).embed(texts)
+
+    assert backend.calls == 3 + 3
+    assert len(result.failures) == 64
+    assert all("격리 호출 한도" in f.error for f in result.failures if f.index != 5)
+
+def test_wrong_dimension_rows_are_reported_not_raised():
+    backend = ShortVectorBackend(["short"], dimension=8)
+    result = client(backend).embed(["ok 1", "short", "ok 2"])
+
+    assert [f.index for f in result.failures] == [1]
+    assert "차원 불일치" in result.failures[0].error
+    assert result.ok.tolist() == [True, False, True]
+
+def test_failures_are_reported_for_every_duplicate_and_not_cached(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    backend = HashEmbeddingBackend(dimension=8, fail_on=["bad"])
+    texts = ["good", "bad", "good", "bad"]
+    result = client(backend, cache=cache).embed(texts)
+
+    assert [f.index for f in result.failures] == [1, 3]
+    assert result.ok.tolist() == [True, False, True, False]
+
+    backend.fail_on.clear()
+    again = client(backend, cache=cache).embed(texts)
+    assert again.ok.all() and again.cache_hits == 2
@@ -0,0 +1,25 @@
+"""로컬 지문이 BigQuery FARM_FINGERPRINT와 같은 값인지 점검"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from embedding_cache import content_fingerprint  # noqa: E402
+
+# BigQuery 문서의 FARM_FINGERPRINT 예시 값
+@pytest.mark.parametrize("text, expected", [
+    ("", -7286425919675154353),
+    ("1footrue", -1541654101129638711),
+    ("2applefalse", 2794438866806483259),
+    ("3true", -4880158226897771312),
+])
+def test_matches_bigquery_farm_fingerprint(text, expected):
+    assert content_fingerprint(text) == expected
+
+def test_long_text_is_signed_int64():
+    fp = content_fingerprint("불일치 본문 " * 100)
+    assert -(1 << 63) <= fp < (1 << 63)
+    assert fp == content_fingerprint("불일치 본문 " * 100)
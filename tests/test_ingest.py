@@ -0,0 +1,66 @@
+"""스트리밍 적재 중복 제거 (저장소 지문 색인, 기준 데이터 채우기)"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from embedding_store import EmbeddingStore  # noqa: E402
+from ingest import (ID_HASHES_FILE, IngestPipeline, StoreFingerprints, feature_vectorizer,  # noqa: E402
+                    open_or_create_store, struct_baseline, struct_chunks)
+
+def write_struct_csv(path: Path, rows):
+    lines = ["id,f1,f2,f3"] + [f"{key},{a},{b},{c}" for key, a, b, c in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def ingest(store_path: Path, csv_path: Path):
+    store = open_or_create_store(str(store_path), 3, "feat_struct")
+    return IngestPipeline(store, feature_vectorizer).run(struct_chunks(str(csv_path)))
+
+def test_reingest_skips_unchanged_rows(tmp_path):
+    csv_path = tmp_path / "feat_struct.csv"
+    write_struct_csv(csv_path, [("A", 0.1, 0.2, 0.3), ("B", 0.4, 0.5, 0.6)])
+    first = ingest(tmp_path / "s.store", csv_path)
+    assert (first.written, first.duplicates) == (2, 0)
+
+    second = ingest(tmp_path / "s.store", csv_path)
+    assert (second.written, second.duplicates) == (0, 2)
+
+    write_struct_csv(csv_path, [("A", 0.1, 0.2, 0.3), ("B", 0.9, 0.5, 0.6), ("C", 1.0, 1.0, 1.0)])
+    third = ingest(tmp_path / "s.store", csv_path)
+    assert (third.written, third.duplicates) == (2, 1)
+    assert EmbeddingStore.open(str(tmp_path / "s.store")).ids == ["A", "B", "B", "C"]
+
+def test_seeded_rows_are_fingerprinted(tmp_path):
+    csv_path = tmp_path / "feat_struct.csv"
+    write_struct_csv(csv_path, [("A", 0.1, 0.2, 0.3), ("B", 0.4, 0.5, 0.6), ("C", 0.7, 0.8, 0.9)])
+    store = open_or_create_store(str(tmp_path / "s.store"), 3, "feat_struct",
+                                 baseline=lambda: struct_baseline(str(csv_path)), baseline_model="feat_struct")
+    assert len(store) == 3
+
+    report = IngestPipeline(store, feature_vectorizer).run(struct_chunks(str(csv_path)))
+    assert (report.written, report.duplicates) == (0, 3)
+
+def test_baseline_of_another_model_is_refused(tmp_path):
+    csv_path = tmp_path / "feat_struct.csv"
+    write_struct_csv(csv_path, [("A", 0.1, 0.2, 0.3)])
+    with pytest.raises(ValueError):
+        open_or_create_store(str(tmp_path / "s.store"), 3, "feat_struct",
+                             baseline=lambda: struct_baseline(str(csv_path)), baseline_model=None)
+    assert not (tmp_path / "s.store").exists()
+
+def test_store_without_fingerprints_is_indexed(tmp_path):
+    # convert 등으로 지문 없이 만든 저장소: id 해시는 ids.txt에서 채우고, 지문이 없으니 중복으로 보지 않는다
+    store = EmbeddingStore.create(str(tmp_path / "s.store"), dim=3, model="feat_struct")
+    store.append(["A", "B", "A"], np.ones((3, 3), dtype=np.float32))
+    store = EmbeddingStore.open(str(tmp_path / "s.store"), mode="a")
+
+    fingerprints = StoreFingerprints(store)
+    assert (tmp_path / "s.store" / ID_HASHES_FILE).stat().st_size == 3 * 8
+    found = fingerprints.lookup(["A", "B", "Z"])
+    assert found[0] is not None and found[1] is not None and found[2] is None
+    fingerprints.append(["C"], [42])
+    assert StoreFingerprints(store).lookup(["C"]) == [None]  # 저장소에 없는 행의 지문은 꼬리로 잘린다
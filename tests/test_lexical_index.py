@@ -0,0 +1,96 @@
+"""BM25 역색인을 BM25 공식의 직접 계산과 비교"""
+
+import math
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from lexical_index import BM25Index, rrf_fuse, tokenize  # noqa: E402
+
+WORDS = ["가방", "스펙과", "이미지의", "색상", "불일치", "Red", "ＵＳＢ", "the", "cable", "2024", "a", "무게"]
+
+def bm25_reference(docs, query, k1=1.2, b=0.75):
+    """문서별 Σ_t idf(t)·tf·(k1+1) / (tf + k1·(1 - b + b·|d|/avgdl)), idf = ln(1 + (N - df + 0.5)/(df + 0.5))"""
+    tokens = [tokenize(d) for d in docs]
+    n = len(docs)
+    avgdl = sum(map(len, tokens)) / n if n and any(tokens) else 1.0
+    df = Counter(t for toks in tokens for t in set(toks))
+    scores = {}
+    for i, toks in enumerate(tokens):
+        tf = Counter(toks)
+        score = 0.0
+        for term in set(tokenize(query)):  # 질의 용어는 중복 없이 한 번씩
+            if tf[term]:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(toks) / avgdl))
+        if score:
+            scores[i] = score
+    return scores
+
+RARE = ["희귀품", "zeta"]
+
+def random_docs(rng, n):
+    docs = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(0, 8))]
+        if rng.random() < 0.03:
+            words.append(rng.choice(RARE))
+        docs.append(None if rng.random() < 0.05 else " ".join(words))
+    return docs
+
+def batches(docs, size):
+    ids = [f"d{i}" for i in range(len(docs))]
+    return ((ids[s:s + size], docs[s:s + size]) for s in range(0, len(docs), size))
+
+@pytest.mark.parametrize("n_docs, vocabulary, dense", [(20, WORDS, True), (400, RARE, False)],
+                         ids=["dense", "sparse"])
+def test_scores_match_formula(n_docs, vocabulary, dense):
+    rng = random.Random(n_docs)
+    for _ in range(30):
+        docs = random_docs(rng, n_docs)
+        k1, b = rng.choice([(1.2, 0.75), (2.0, 0.3), (0.9, 1.0)])
+        index = BM25Index.build(batches(docs, rng.randint(1, 50)), k1=k1, b=b)
+        query = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4)))
+        terms = index.query_terms(query)
+        postings = int((index.term_offsets[terms + 1] - index.term_offsets[terms]).sum())
+        if len(terms):
+            # 밀집 누적(포스팅이 많을 때)과 정렬 누적 경로를 각각 점검
+            assert (postings * 8 >= len(index)) == dense
+
+        expected = bm25_reference(docs, query, k1, b)
+        rows, scores = index.scores(query)
+        assert rows.tolist() == sorted(expected)
+        np.testing.assert_allclose(scores, [expected[r] for r in rows.tolist()], rtol=1e-5)
+
+        # top-k: 점수 내림차순, 경계 동점은 문서 번호가 작은 쪽
+        k = rng.randint(1, 10)
+        top, top_scores = index.search(query, k)
+        by_row = dict(zip(rows.tolist(), scores.tolist()))
+        assert top.tolist() == sorted(by_row, key=lambda r: (-by_row[r], r))[:k]
+        np.testing.assert_allclose(top_scores, [expected[r] for r in top.tolist()], rtol=1e-5)
+
+def test_save_load_roundtrip(tmp_path):
+    docs = random_docs(random.Random(1), 50)
+    index = BM25Index.build(batches(docs, 7), k1=1.5, b=0.5)
+    index.save(str(tmp_path / "bm25"))
+    loaded = BM25Index.load(str(tmp_path / "bm25"))
+
+    assert loaded.keys == index.keys and (loaded.k1, loaded.b) == (1.5, 0.5)
+    for query in ["가방 색상", "red cable", "없는말"]:
+        for a, b in zip(index.search(query, 5), loaded.search(query, 5)):
+            np.testing.assert_array_equal(a, b)
+
+def test_tokenize_bigrams_and_normalization():
+    assert tokenize("스펙과 이미지의 Red ＵＳＢ the 가") == ["스펙", "펙과", "이미", "미지", "지의", "red", "usb", "가"]
+    assert tokenize(None) == []
+
+def test_rrf_fuse():
+    fused = rrf_fuse(["a", "b", "c"], ["b", "d"], rrf_k=60)
+    assert [k for k, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
@@ -0,0 +1,121 @@
+"""다중 질의 평가를 전수 검색 + 교과서 지표 정의와 비교"""
+
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from multi_query import MultiQueryEvaluator, blocked_topk, load_query_set  # noqa: E402
+
+KS = [1, 3, 5, 10]
+
+def brute_force_ranking(corpus, query, k):
+    q = np.pad(query, (0, corpus.shape[1] - len(query)))
+    sims = []
+    for i, row in enumerate(corpus):
+        if np.isnan(row).any():
+            continue
+        norm = np.linalg.norm(row) * np.linalg.norm(q)
+        sims.append((float(row @ q / norm) if norm else 0.0, i))
+    sims.sort(key=lambda s: (-s[0], s[1]))
+    return [i for _, i in sims[:k]]
+
+def reference_metrics(ranked_ids, judged):
+    """P@K = 관련 수 / 검색 수, recall@K, nDCG@K(전체 판정 기준 IDCG), MRR, AP"""
+    grades = [judged.get(d, 0.0) for d in ranked_ids]
+    relevant = sum(1 for g in judged.values() if g > 0)
+    ideal = sorted(judged.values(), reverse=True)
+    out = {"precision_at_k": {}, "recall_at_k": {}, "ndcg_at_k": {}}
+    for k in KS:
+        top = grades[:k]
+        hits = sum(1 for g in top if g > 0)
+        out["precision_at_k"][k] = hits / len(top) if top else 0.0
+        out["recall_at_k"][k] = hits / relevant if relevant else 0.0
+        dcg = sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(top))
+        idcg = sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(ideal[:k]))
+        out["ndcg_at_k"][k] = dcg / idcg if idcg > 0 else 0.0
+    first = next((i for i, g in enumerate(grades) if g > 0), None)
+    out["mrr"] = 1.0 / (first + 1) if first is not None else 0.0
+    hits, precisions = 0, []
+    for i, g in enumerate(grades):
+        if g > 0:
+            hits += 1
+            precisions.append(hits / (i + 1))
+    out["average_precision"] = sum(precisions) / relevant if relevant else 0.0
+    return out
+
+@pytest.fixture
+def case():
+    rng = np.random.default_rng(11)
+    corpus = rng.standard_normal((120, 6)).astype(np.float32)
+    corpus[rng.choice(120, 10, replace=False)] = np.nan
+    ids = [f"d{i}" for i in range(120)]
+    queries = rng.standard_normal((25, 4)).astype(np.float32)  # 텍스트 전용 질의 (0 채움)
+    query_ids = [f"q{i}" for i in range(25)]
+    qrels = {}
+    for qid in query_ids[:-1]:  # 마지막 질의는 판정 없음
+        docs = rng.choice(ids, int(rng.integers(1, 15)), replace=False)
+        qrels[qid] = {str(d): float(rng.integers(0, 4)) for d in docs}
+    return corpus, ids, queries, query_ids, qrels
+
+def test_blocked_topk_matches_brute_force(case):
+    corpus, _, queries, _, _ = case
+    padded = np.pad(queries, ((0, 0), (0, 2)))
+    padded /= np.linalg.norm(padded, axis=1, keepdims=True)
+    rows, scores = blocked_topk(padded, corpus, k=12, corpus_block=17)
+    for query, got, sims in zip(queries, rows, scores):
+        assert got.tolist() == brute_force_ranking(corpus, query, 12)
+        assert np.all(np.diff(sims) <= 0)
+
+def test_per_query_and_aggregate_metrics(case, tmp_path):
+    corpus, ids, queries, query_ids, qrels = case
+    evaluator = MultiQueryEvaluator(ids, corpus, k=20, ks=KS, query_block=4, corpus_block=33)
+    output = tmp_path / "per_query.jsonl"
+    summary = evaluator.evaluate(query_ids, queries, qrels, output_path=str(output))
+
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [r["query_id"] for r in rows] == query_ids
+    macro = {}
+    micro_hits = {k: 0 for k in KS}
+    micro_retrieved = {k: 0 for k in KS}
+    total_relevant = 0
+    for row, query, qid in zip(rows, queries, query_ids):
+        judged = qrels.get(qid, {})
+        ranking = [ids[i] for i in brute_force_ranking(corpus, query, 20)]
+        expected = reference_metrics(ranking, judged)
+        assert row["top"] == ranking[:max(KS)]
+        for name in ("precision_at_k", "recall_at_k", "ndcg_at_k"):
+            for k in KS:
+                assert row[name][str(k)] == pytest.approx(expected[name][k]), (qid, name, k)
+                macro[f"{name.split('_')[0]}@{k}"] = macro.get(f"{name.split('_')[0]}@{k}", 0.0) + expected[name][k]
+        for name in ("mrr", "average_precision"):
+            assert row[name] == pytest.approx(expected[name]), (qid, name)
+            macro[name] = macro.get(name, 0.0) + expected[name]
+        total_relevant += sum(1 for g in judged.values() if g > 0)
+        for k in KS:
+            micro_hits[k] += sum(1 for d in ranking[:k] if judged.get(d, 0.0) > 0)
+            micro_retrieved[k] += min(k, len(ranking))
+
+    assert summary["queries"] == len(query_ids)
+    for name, total in macro.items():
+        assert summary["macro"][name] == pytest.approx(total / len(query_ids)), name
+    for k in KS:
+        assert summary["micro"][f"precision@{k}"] == pytest.approx(micro_hits[k] / micro_retrieved[k])
+        assert summary["micro"][f"recall@{k}"] == pytest.approx(micro_hits[k] / total_relevant)
+
+def test_load_query_set_accepts_lists_and_grades(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text(
+        '{"query_id": 1, "text": "가방", "relevant": ["A", "B"]}\n'
+        '\n'
+        '{"query_id": "q2", "vector": [0.1, 0.2], "relevant": {"C": 2}}\n', encoding="utf-8")
+    ids, texts, vectors, qrels = load_query_set(str(path))
+    assert ids == ["1", "q2"]
+    assert texts == ["가방", None]
+    assert vectors == [None, [0.1, 0.2]]
+    assert qrels == {"1": {"A": 1.0, "B": 1.0}, "q2": {"C": 2.0}}
@@ -0,0 +1,83 @@
+"""로컬 ORI가 report_ori 뷰(sql/create_reports.sql)와 행 단위로 같은지 점검"""
+
+import math
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "descent"))
+
+from ori_local import LocalORIEngine, load_local_corpus  # noqa: E402
+
+SAMPLE = str(ROOT / "data" / "sample")
+RULE = re.compile(r"(불일치|모순|상이|다름)")
+
+def reference_report_ori(corpus, weight=0.7, threshold=0.3):
+    """뷰 SQL을 행 단위로 그대로 옮긴 참조 구현 (float64, NULL은 None)"""
+    q = [float(x) for x in corpus.query]
+    d = []
+    for vec in corpus.embeddings:
+        if np.isnan(vec).any():
+            d.append(None)
+            continue
+        dot = sum(a * b for a, b in zip(vec, q))
+        denom = math.sqrt(sum(a * a for a in vec)) * math.sqrt(sum(b * b for b in q))
+        d.append(None if denom == 0 else 1.0 - dot / denom)
+    finite = [x for x in d if x is not None]
+    lo, hi = min(finite), max(finite)
+    rows = {}
+    for key, dist, body in zip(corpus.keys, d, corpus.bodies):
+        dz = None if dist is None or hi == lo else (dist - lo) / (hi - lo)
+        rule = 1.0 if body is not None and RULE.search(body) else 0.0
+        ori = None if dz is None else weight * dz + (1 - weight) * (1.0 - rule)
+        predict = 1 if ori is not None and ori >= threshold else 0
+        rows[key] = (ori, predict, dz, rule)
+    return rows
+
+def test_sample_matches_report_ori_view():
+    result = LocalORIEngine().score(load_local_corpus(SAMPLE, "A100"))
+    frame = result.to_frame()
+
+    assert list(frame.columns) == ["id", "ori", "predict", "semantic_distance", "rule_score", "body"]
+    assert frame["id"].tolist() == ["A102", "A101", "A100"]  # ORDER BY ori DESC
+    np.testing.assert_allclose(frame["ori"], [1.0, 0.56138, 0.3], atol=1e-5)
+    assert frame["predict"].tolist() == [1, 1, 1]
+    np.testing.assert_allclose(frame["semantic_distance"], [1.0, 0.37341, 0.0], atol=1e-5)
+    assert frame["rule_score"].tolist() == [0.0, 0.0, 0.0]
+
+def test_rows_match_reference_including_rules_and_nulls(tmp_path):
+    # 규칙 매칭 행, 본문 없는 행, 구조화 특징이 없는 행(NULL 임베딩)을 포함한 코퍼스
+    (tmp_path / "raw_texts.csv").write_text(
+        "id,body\n"
+        "Q,기준 질의 본문\n"
+        "R,이미지와 설명이 불일치\n"
+        "N,\n"
+        "M,구조화 특징이 없는 행\n"
+        "S,사양이 상이함\n", encoding="utf-8")
+    rng = np.random.default_rng(7)
+    text_rows = ["id,embedding"] + [f'{k},"{rng.standard_normal(6).round(4).tolist()}"' for k in "QRNMS"]
+    (tmp_path / "text_embeddings.csv").write_text("\n".join(text_rows) + "\n", encoding="utf-8")
+    struct_rows = ["id,f1,f2,f3"] + [f"{k},{a:.3f},{b:.3f},{c:.3f}" for k, (a, b, c)
+                                     in zip("QRNS", rng.random((4, 3)))]
+    (tmp_path / "feat_struct.csv").write_text("\n".join(struct_rows) + "\n", encoding="utf-8")
+
+    corpus = load_local_corpus(str(tmp_path), "Q")
+    result = LocalORIEngine().score(corpus)
+    expected = reference_report_ori(corpus)
+
+    assert sorted(result.ids) == sorted(expected)
+    for i, key in enumerate(result.ids):
+        ori, predict, dz, rule = expected[key]
+        assert result.predict[i] == predict, key
+        assert result.rule_score[i] == rule, key
+        if ori is None:
+            assert np.isnan(result.ori[i]) and np.isnan(result.semantic_distance[i]), key
+        else:
+            assert result.ori[i] == pytest.approx(ori, abs=1e-5), key
+            assert result.semantic_distance[i] == pytest.approx(dz, abs=1e-5), key
+    assert result.ids[-1] == "M"  # NULL ori는 마지막
+    assert result.rule_hits == {"discrepancy": 2}
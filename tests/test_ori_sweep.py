@@ -0,0 +1,74 @@
+"""ORI 격자 스윕이 eval_metrics 뷰(sql/03_incremental_idempotency.sql)의 지표 정의와 같은지 점검"""
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "descent"))
+
+from ori_local import LocalORIEngine, load_local_corpus  # noqa: E402
+from ori_sweep import DEFAULT_LABELS, sweep, sweep_corpus  # noqa: E402
+
+def safe_divide(a, b):
+    return a / b if b else 0.0  # SAFE_DIVIDE의 NULL은 0으로 비교
+
+def eval_metrics(predict, y):
+    """eval_metrics 뷰를 행 단위로 옮긴 참조 구현 (라벨 없음은 None, LEFT JOIN)"""
+    total = len(predict)
+    correct = sum(1 for p, l in zip(predict, y) if l is not None and p == l)
+    tp = sum(1 for p, l in zip(predict, y) if p == 1 and l == 1)
+    predicted = sum(1 for p in predict if p == 1)
+    actual = sum(1 for l in y if l == 1)
+    return {"accuracy": correct / total, "precision": safe_divide(tp, predicted),
+            "recall": safe_divide(tp, actual), "f1": safe_divide(2 * tp, predicted + actual)}
+
+def brute_force(dz, rule, y, w, tau):
+    predict = []
+    for d, r in zip(dz, rule):
+        ori = None if math.isnan(d) else w * d + (1 - w) * (1 - r)
+        predict.append(1 if ori is not None and ori >= tau else 0)  # report_ori의 CASE WHEN
+    return eval_metrics(predict, [None if math.isnan(v) else int(v) for v in y])
+
+def test_grid_matches_brute_force_definitions():
+    rng = np.random.default_rng(3)
+    n = 60
+    dz = rng.random(n)
+    dz[rng.choice(n, 6, replace=False)] = np.nan
+    rule = rng.integers(0, 2, n).astype(float)
+    y = rng.choice([0.0, 1.0, np.nan], n)
+    weights = np.linspace(0.0, 1.0, 11)
+    thresholds = np.linspace(0.005, 0.995, 23)  # 점수와 정확히 겹치지 않는 격자
+
+    # 작은 max_cells로 행 청크 누적 경로까지 점검
+    result = sweep(dz, rule, y, weights, thresholds, max_cells=11 * 23 * 7)
+    assert result.labeled == int((~np.isnan(y)).sum())
+    for i, w in enumerate(weights):
+        for j, tau in enumerate(thresholds):
+            expected = brute_force(dz, rule, y, w, tau)
+            for metric, value in expected.items():
+                assert getattr(result, metric)[i, j] == pytest.approx(value), (w, tau, metric)
+
+def test_pareto_front_is_the_non_dominated_set():
+    rng = np.random.default_rng(5)
+    result = sweep(rng.random(40), rng.integers(0, 2, 40).astype(float), rng.choice([0.0, 1.0], 40),
+                   np.linspace(0, 1, 9), np.linspace(0.01, 0.99, 15))
+    points = {(p["recall"], p["precision"]) for p in result.rows()}
+    expected = {p for p in points
+                if not any(q[0] >= p[0] and q[1] >= p[1] and q != p for q in points)}
+
+    front = result.pareto_front()
+    assert [(p["recall"], p["precision"]) for p in front] == sorted(expected)
+    assert result.best("f1")["f1"] == pytest.approx(result.f1.max())
+
+def test_sample_cell_matches_local_ori_report():
+    corpus = load_local_corpus(str(ROOT / "data" / "sample"), "A100")
+    frame = LocalORIEngine().score(corpus).to_frame()
+    expected = eval_metrics(frame["predict"].tolist(), [DEFAULT_LABELS.get(k) for k in frame["id"]])
+
+    result = sweep_corpus(corpus, [0.7], [0.3])
+    for metric, value in expected.items():
+        assert getattr(result, metric)[0, 0] == pytest.approx(value)
@@ -0,0 +1,80 @@
+"""순위 지표 엔진이 기존 DescentEvaluator(pandas) 정의와 같은 값을 내는지 회귀 점검"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from ranking_metrics import compute_ranking_metrics  # noqa: E402
+
+KS = [1, 3, 5, 10]
+
+# --- 기존 eval_harness.calculate_* 구현 (벡터화 이전) ---
+
+def old_precision_at_k(df, labels, k_values):
+    df_sorted = df.sort_values('ori', ascending=False)
+    precision_at_k = {}
+    for k in k_values:
+        top_k = df_sorted.head(k)
+        merged = top_k.merge(labels, on='id', how='left')
+        valid_labels = merged.dropna(subset=['y'])
+        precision_at_k[k] = valid_labels['y'].mean() if len(valid_labels) > 0 else 0.0
+    return precision_at_k
+
+def old_ndcg(df, labels, k=10):
+    df_sorted = df.sort_values('ori', ascending=False)
+    merged = df_sorted.head(k).merge(labels, on='id', how='left')
+    valid_labels = merged.dropna(subset=['y'])
+    if len(valid_labels) == 0:
+        return 0.0
+    dcg = 0.0
+    for i, (_, row) in enumerate(valid_labels.iterrows()):
+        dcg += (2**row['y'] - 1) / np.log2(i + 2)
+    ideal_order = valid_labels.sort_values('y', ascending=False)
+    idcg = 0.0
+    for i, (_, row) in enumerate(ideal_order.iterrows()):
+        idcg += (2**row['y'] - 1) / np.log2(i + 2)
+    return dcg / idcg if idcg > 0 else 0.0
+
+def old_mrr(df, labels):
+    df_sorted = df.sort_values('ori', ascending=False)
+    merged = df_sorted.merge(labels, on='id', how='left')
+    valid_labels = merged.dropna(subset=['y'])
+    if len(valid_labels) == 0:
+        return 0.0
+    relevant_docs = valid_labels[valid_labels['y'] == 1]
+    if len(relevant_docs) == 0:
+        return 0.0
+    return 1.0 / (relevant_docs.index[0] + 1)
+
+def random_case(rng, grades):
+    n = int(rng.integers(0, 30))
+    ids = [f"c{i}" for i in range(n)]
+    # 동점이 없도록 서로 다른 점수 (기존 구현은 불안정 정렬)
+    df = pd.DataFrame({"id": ids, "ori": rng.permutation(n) / max(n, 1) + rng.random() * 1e-3})
+    labeled = [i for i in ids if rng.random() < 0.6]  # 일부는 라벨 없음
+    labels = pd.DataFrame({"id": labeled + ["missing"], "y": rng.choice(grades, len(labeled) + 1).astype(float)})
+    return df, labels
+
+@pytest.mark.parametrize("grades", [[0, 1], [0, 1, 2, 3]], ids=["binary", "graded"])
+def test_matches_previous_pandas_definitions(grades):
+    rng = np.random.default_rng(2024)
+    for _ in range(200):
+        df, labels = random_case(rng, grades)
+        m = compute_ranking_metrics(df["id"].tolist(), df["ori"].to_numpy(dtype=float),
+                                    dict(zip(labels["id"], labels["y"])), KS)
+        expected_p = old_precision_at_k(df, labels, KS)
+        for k in KS:
+            assert m.precision_at_k[k] == pytest.approx(expected_p[k])
+            assert m.ndcg_at_k[k] == pytest.approx(old_ndcg(df, labels, k))
+        assert m.mrr == pytest.approx(old_mrr(df, labels))
+
+def test_unlabeled_rows_are_skipped_for_precision_but_ranked_for_mrr():
+    m = compute_ranking_metrics(["a", "b", "c"], np.array([0.9, 0.8, 0.7]), {"b": 0.0, "c": 1.0}, [2])
+    assert m.precision_at_k[2] == 0.0  # 상위 2개 중 라벨 있는 b만 평균
+    assert m.ndcg_at_k[2] == 0.0
+    assert m.mrr == pytest.approx(1 / 3)  # 라벨 없는 a도 순위에 포함
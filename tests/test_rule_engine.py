@@ -0,0 +1,76 @@
+"""다중 패턴 규칙 매처를 규칙별 부분 문자열 검사(REGEXP_CONTAINS)와 퍼징 비교"""
+
+import random
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from rule_engine import KEYWORD_RULES, Rule, RuleSet, iter_csv_batches  # noqa: E402
+
+ALPHABET = "불일치동같음모순a b\x00😀"  # 겹치는 키워드, 구분자 문자, 코드포인트 > 0xFFFF 포함
+
+def reference(ruleset, bodies):
+    """우선순위 순서로 첫 매칭 규칙 선택 (CASE WHEN), 규칙별 매칭 행 수"""
+    rule, scores = [], []
+    counts = {r.name: 0 for r in ruleset.rules}
+    for body in bodies:
+        hits = [i for i, r in enumerate(ruleset.rules) if body is not None and any(k in body for k in r.keywords)]
+        for i in hits:
+            counts[ruleset.rules[i].name] += 1
+        rule.append(hits[0] if hits else -1)
+        scores.append(ruleset.rules[hits[0]].score if hits else ruleset.default_score)
+    return rule, scores, counts
+
+def random_word(rng, lo, hi):
+    return "".join(rng.choice(ALPHABET.replace("\x00", "")) for _ in range(rng.randint(lo, hi)))
+
+def test_fuzz_against_substring_matching():
+    rng = random.Random(17)
+    for _ in range(200):
+        rules = [Rule(f"r{i}", tuple({random_word(rng, 1, 3) for _ in range(rng.randint(1, 3))}),
+                      float(rng.randint(0, 9)) / 10, priority=rng.randint(0, 2))
+                 for i in range(rng.randint(1, 5))]
+        ruleset = RuleSet(rules, default_score=0.5)
+        bodies = [None if rng.random() < 0.1 else "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+                  for _ in range(rng.randint(0, 40))]
+
+        result = ruleset.score(bodies, batch_rows=rng.randint(1, 16))
+        rule, scores, counts = reference(ruleset, bodies)
+        assert result.rule.tolist() == rule
+        np.testing.assert_allclose(result.scores, np.array(scores, dtype=np.float32))
+        assert result.hit_counts == counts
+
+def test_priority_ties_keep_declaration_order():
+    ruleset = RuleSet([Rule("first", ("a",), 0.1), Rule("second", ("b",), 0.9), Rule("top", ("c",), 0.5, priority=1)])
+    result = ruleset.score(["ab", "ba", "abc", "x", None])
+    assert [ruleset.rules[i].name if i >= 0 else None for i in result.rule] == ["first", "first", "top", None, None]
+
+def test_keyword_rules_match_the_sql_case_expression():
+    bodies = ["색상이 불일치", "사양 일치", "정확하지 않고 잘못됨", "설명 없음", None, "동일하지만 틀림"]
+    result = KEYWORD_RULES.score(bodies)
+    expected = []
+    for body in bodies:
+        score = 0.5
+        for r in KEYWORD_RULES.rules:  # to_sql()의 WHEN 순서
+            if body is not None and re.search("(" + "|".join(r.keywords) + ")", body):
+                score = r.score
+                break
+        expected.append(score)
+    np.testing.assert_allclose(result.scores, np.array(expected, dtype=np.float32))
+    assert RuleSet.from_dict(KEYWORD_RULES.to_dict()).to_sql() == KEYWORD_RULES.to_sql()
+
+def test_from_regex_rejects_non_literal_patterns():
+    assert Rule.from_regex("d", "(불일치|모순)", 1.0).keywords == ("불일치", "모순")
+    with pytest.raises(ValueError):
+        Rule.from_regex("d", "(불.치|모순)", 1.0)
+
+def test_csv_batches_treat_empty_body_as_null(tmp_path):
+    path = tmp_path / "raw_texts.csv"
+    path.write_text("id,body\n1,첫 행\n2,\n3,셋째\n", encoding="utf-8")
+    batches = list(iter_csv_batches(str(path), batch_rows=2))
+    assert batches == [(["1", "2"], ["첫 행", None]), (["3"], ["셋째"])]
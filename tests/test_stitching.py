@@ -0,0 +1,38 @@
+"""스티칭 변경 로그의 프로세스 간 기록·커밋 직렬화 점검"""
+
+import multiprocessing
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from stitching import ChangeLog  # noqa: E402
+
+def write_keys(path: str, worker: int, count: int):
+    log = ChangeLog(path)
+    for i in range(count):
+        log.record([f"w{worker}-{i}"], "text")
+
+def test_commit_keeps_records_from_other_processes(tmp_path):
+    path = str(tmp_path / "stitch" / "changelog.jsonl")
+    log = ChangeLog(path)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=write_keys, args=(path, w, 300)) for w in range(4)]
+    for p in workers:
+        p.start()
+
+    seen = set()
+    while any(p.is_alive() for p in workers):
+        changes, offset = log.pending()
+        seen.update(changes)
+        log.commit(offset)
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+    changes, offset = log.pending()
+    seen.update(changes)
+
+    # 커밋이 파일을 교체하는 동안 다른 프로세스가 추가한 기록도 잃지 않는다
+    assert seen == {f"w{w}-{i}" for w in range(4) for i in range(300)}
+    log.commit(offset)
+    assert log.pending() == ({}, 0)
@@ -0,0 +1,35 @@
+"""합성 코퍼스 샤드 출력을 로컬 로더가 그대로 읽는지 점검"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "descent"))
+
+from ori_local import LocalORIEngine, load_local_corpus, table_path  # noqa: E402
+from rule_engine import iter_csv_batches  # noqa: E402
+from stitching import local_sources  # noqa: E402
+from synth import SynthConfig, generate  # noqa: E402
+
+def quiet(_: str):
+    pass
+
+def test_sharded_corpus_loads_locally(tmp_path):
+    manifest = generate(str(tmp_path), SynthConfig(rows=3000, shard_rows=1000, embeddings=True, dim=8), log=quiet)
+    assert len(manifest["tables"]["raw_texts"]["files"]) == 3
+    assert table_path(str(tmp_path), "raw_texts") == tmp_path / "raw_texts"
+
+    corpus = load_local_corpus(str(tmp_path), manifest["query_id"])
+    assert len(corpus.keys) == 3000
+    result = LocalORIEngine().score(corpus)
+    assert len(result.ids) == 3000
+
+    ids = [key for batch, _ in iter_csv_batches(str(tmp_path / "raw_texts"), batch_rows=700) for key in batch]
+    assert ids == corpus.keys
+    keys, _, struct_ids, _ = local_sources(str(tmp_path))
+    assert len(keys) == 3000 and len(struct_ids) == 3000
+
+def test_regenerating_clears_stale_shards(tmp_path):
+    generate(str(tmp_path), SynthConfig(rows=3000, shard_rows=1000), log=quiet)
+    generate(str(tmp_path), SynthConfig(rows=500, shard_rows=1000), log=quiet)
+    assert not (tmp_path / "raw_texts").exists()
+    assert table_path(str(tmp_path), "raw_texts") == tmp_path / "raw_texts.csv"